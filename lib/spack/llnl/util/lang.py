@@ -452,6 +452,8 @@ class HashableMap(MutableMapping):
     """This is a hashable, comparable dictionary.  Hash is performed on
        a tuple of the values in the dictionary."""
 
+    __slots__ = ('dict',)
+
     def __init__(self):
         self.dict = {}
 
@@ -707,6 +709,19 @@ def __init__(self, message):
         super(RequiredAttributeError, self).__init__(message)
 
 
+def slot_names(cls):
+    """Names of the attributes stored in the __slots__ of a class and of
+    its bases, excluding __dict__ and __weakref__."""
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, string_types):
+            slots = (slots,)
+        names.extend(name for name in slots
+                     if name not in ('__dict__', '__weakref__'))
+    return names
+
+
 class ObjectWrapper(object):
     """Base class that wraps an object. Derived classes can add new behavior
     while staying undercover.
@@ -714,24 +729,35 @@ class ObjectWrapper(object):
     This class is modeled after the stackoverflow answer:
     * http://stackoverflow.com/a/1445289/771663
     """
-    def __init__(self, wrapped_object):
+    def __new__(cls, wrapped_object, *args, **kwargs):
         wrapped_cls = type(wrapped_object)
         wrapped_name = wrapped_cls.__name__
 
         # If the wrapped object is already an ObjectWrapper, or a derived class
-        # of it, adding type(self) in front of type(wrapped_object)
+        # of it, adding cls in front of type(wrapped_object)
         # results in an inconsistent MRO.
         #
         # TODO: the implementation below doesn't account for the case where we
         # TODO: have different base classes of ObjectWrapper, say A and B, and
         # TODO: we want to wrap an instance of A with B.
-        if type(self) not in wrapped_cls.__mro__:
-            self.__class__ = type(wrapped_name, (type(self), wrapped_cls), {})
+        #
+        # The instance is created with its final type, rather than having
+        # its __class__ reassigned, so that wrapped classes can use __slots__
+        if cls not in wrapped_cls.__mro__:
+            wrapper_cls = type(wrapped_name, (cls, wrapped_cls), {})
         else:
-            self.__class__ = type(wrapped_name, (wrapped_cls,), {})
+            wrapper_cls = type(wrapped_name, (wrapped_cls,), {})
+        return object.__new__(wrapper_cls)
 
+    def __init__(self, wrapped_object):
         self.__dict__ = wrapped_object.__dict__
 
+        # Attributes stored in slots are copied, so unlike the ones in
+        # __dict__ they are not shared with the wrapped object
+        for name in slot_names(type(wrapped_object)):
+            if hasattr(wrapped_object, name):
+                setattr(self, name, getattr(wrapped_object, name))
+
 
 class Singleton(object):
     """Simple wrapper for lazily initialized singleton objects."""
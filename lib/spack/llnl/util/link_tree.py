@@ -7,17 +7,31 @@
 
 from __future__ import print_function
 
+import itertools
 import os
 import shutil
 import filecmp
+import multiprocessing.pool
 
-from llnl.util.filesystem import traverse_tree, mkdirp, touch
+from llnl.util.filesystem import mkdirp, touch
 import llnl.util.tty as tty
 
 __all__ = ['LinkTree']
 
 empty_file_name = '.spack-empty'
 
+#: Maximum number of threads used to list directories and to create links.
+#: Threads mostly wait for the file system, so there can be more of them
+#: than cores.
+max_threads = 16
+
+#: Batches with fewer items than this are processed in the calling thread
+min_parallel_items = 8
+
+# os.scandir is only available in Python 3.5 and later, elsewhere the
+# file types are found with one stat per file.
+_scandir = getattr(os, 'scandir', None)
+
 
 def remove_link(src, dest):
     if not os.path.islink(dest):
@@ -29,6 +43,177 @@ def remove_link(src, dest):
         os.remove(dest)
 
 
+class _ThreadMap(object):
+    """Calls a function on each item of a batch, in a pool of threads that
+    is started the first time a batch is large enough to benefit from it.
+    """
+    def __init__(self, threads=None):
+        self.threads = max_threads if threads is None else threads
+        self._pool = None
+
+    def __call__(self, func, items):
+        items = list(items)
+        if self.threads < 2 or len(items) < min_parallel_items:
+            return [func(item) for item in items]
+
+        if self._pool is None:
+            self._pool = multiprocessing.pool.ThreadPool(self.threads)
+        return self._pool.map(func, items)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+
+def _list_source_dir(path):
+    """Returns (name, is_dir) pairs for the entries of the directory at path.
+
+    Like in ``traverse_tree``, symbolic links to directories are not
+    directories, so that they are linked rather than descended into.
+    """
+    if _scandir:
+        return [(e.name, e.is_dir(follow_symlinks=False))
+                for e in _scandir(path)]
+
+    entries = []
+    for name in os.listdir(path):
+        child = os.path.join(path, name)
+        entries.append(
+            (name, os.path.isdir(child) and not os.path.islink(child)))
+    return entries
+
+
+def _list_dest_dir(path):
+    """Returns a dictionary mapping the names of the existing entries of the
+    directory at path to whether they are directories, following symbolic
+    links like ``os.path.exists`` and ``os.path.isdir`` do. Returns None if
+    path is not a directory.
+    """
+    entries = {}
+    try:
+        if _scandir:
+            for e in _scandir(path):
+                if not e.is_symlink():
+                    entries[e.name] = e.is_dir(follow_symlinks=False)
+                elif os.path.exists(e.path):
+                    entries[e.name] = os.path.isdir(e.path)
+        else:
+            for name in os.listdir(path):
+                child = os.path.join(path, name)
+                if os.path.exists(child):
+                    entries[name] = os.path.isdir(child)
+    except OSError:
+        return None
+    return entries
+
+
+def _scan_trees(roots, thread_map):
+    """Walks the trees at roots at the same time, one level of directories
+    after the other, listing all the directories of a level concurrently.
+
+    Returns, for each root, the directories of its tree level by level and
+    the other files of its tree, as paths relative to the root ('' being the
+    root itself).
+    """
+    scanned = [([], []) for _ in roots]
+    level = [(i, '') for i in range(len(roots))]
+    depth = 0
+    while level:
+        listings = thread_map(
+            lambda item: _list_source_dir(
+                os.path.join(roots[item[0]], item[1])),
+            level)
+
+        next_level = []
+        for (i, rel_dir), entries in zip(level, listings):
+            levels, files = scanned[i]
+            if len(levels) == depth:
+                levels.append([])
+            levels[depth].append(rel_dir)
+
+            for name, is_dir in entries:
+                rel_path = os.path.join(rel_dir, name)
+                if is_dir:
+                    next_level.append((i, rel_path))
+                else:
+                    files.append(rel_path)
+
+        level = next_level
+        depth += 1
+
+    return scanned
+
+
+def _filter_tree(levels, files, ignore):
+    """Removes the paths matching ignore from a scanned tree, along with
+    everything under ignored directories, like ``traverse_tree`` does."""
+    ignored = set()
+    kept_levels = []
+    for level in levels:
+        kept = []
+        for rel_dir in level:
+            if (rel_dir and os.path.dirname(rel_dir) in ignored or
+                    ignore(rel_dir)):
+                ignored.add(rel_dir)
+            else:
+                kept.append(rel_dir)
+        if kept:
+            kept_levels.append(kept)
+
+    kept_files = [f for f in files
+                  if os.path.dirname(f) not in ignored and not ignore(f)]
+    return kept_levels, kept_files
+
+
+def _list_dest_dirs(dest_root, levels, thread_map):
+    """Lists the directories of dest_root matching the directories of a
+    source tree, one level after the other. Directories whose parent is not
+    a directory in dest_root are not listed at all."""
+    listings = {}
+    for level in levels:
+        level = [d for d in level
+                 if not d or (listings.get(os.path.dirname(d)) or {}).get(
+                     os.path.basename(d))]
+        entries = thread_map(
+            lambda d: _list_dest_dir(os.path.join(dest_root, d)), level)
+        listings.update(zip(level, entries))
+    return listings
+
+
+def _dest_state(dest_root, listings, rel_path):
+    """Returns whether rel_path is a directory in dest_root (True), another
+    kind of file (False) or doesn't exist (None), using listings."""
+    if not rel_path:
+        if not os.path.exists(dest_root):
+            return None
+        return os.path.isdir(dest_root)
+
+    entries = listings.get(os.path.dirname(rel_path))
+    if not entries:
+        return None
+    return entries.get(os.path.basename(rel_path))
+
+
+def scan_trees(trees):
+    """Scans the source directories of many LinkTrees at once.
+
+    Each LinkTree scans its source directory the first time it is needed.
+    Scanning the trees of many packages together beforehand lists their
+    directories concurrently, instead of one tree after the other while
+    they are merged.
+    """
+    trees = [t for t in trees if t._scanned is None]
+    with _ThreadMap() as thread_map:
+        scanned = _scan_trees([t._root for t in trees], thread_map)
+    for tree, tree_scan in zip(trees, scanned):
+        tree._scanned = tree_scan
+
+
 class LinkTree(object):
     """Class to create trees of symbolic links from a source directory.
 
@@ -38,79 +223,134 @@ class LinkTree(object):
     Trees comprise symlinks only to files; directries are never
     symlinked to, to prevent the source directory from ever being
     modified.
+
+    The source tree is scanned once, the first time it is needed, and is
+    not expected to change while the LinkTree is in use. Directories are
+    listed, and links created, from a pool of threads, since on parallel
+    file systems most of the time is spent waiting for metadata operations.
     """
     def __init__(self, source_root):
         if not os.path.exists(source_root):
             raise IOError("No such file or directory: '%s'", source_root)
 
         self._root = source_root
+        self._scanned = None
+
+    def _source_tree(self, ignore, thread_map):
+        """Returns the directories of the source tree level by level and its
+        files, as relative paths, skipping the ones matching ignore."""
+        if self._scanned is None:
+            self._scanned = _scan_trees([self._root], thread_map)[0]
+        return _filter_tree(self._scanned[0], self._scanned[1], ignore)
+
+    def _compare(self, dest_root, ignore, thread_map):
+        """Scans the source tree and the matching directories of dest_root.
+
+        Returns the directories of the source tree level by level, its files
+        and the listings of the directories of dest_root (see
+        ``_dest_state``).
+        """
+        levels, files = self._source_tree(ignore, thread_map)
+        return levels, files, _list_dest_dirs(dest_root, levels, thread_map)
+
+    def _conflicts(self, dest_root, levels, files, listings):
+        """Returns the directory conflicts between the source tree and
+        dest_root, and the files of the source tree that exist in dest_root.
+        """
+        conflicts = []
+        for rel_dir in itertools.chain(*levels):
+            if _dest_state(dest_root, listings, rel_dir) is False:
+                conflicts.append("File blocks directory: %s" %
+                                 os.path.join(dest_root, rel_dir))
+
+        existing = []
+        for rel_path in files:
+            state = _dest_state(dest_root, listings, rel_path)
+            dest = os.path.join(dest_root, rel_path)
+            if state:
+                conflicts.append("Directory blocks directory: %s" % dest)
+            if state is not None:
+                existing.append(dest)
+
+        return conflicts, existing
 
     def find_conflict(self, dest_root, ignore=None,
                       ignore_file_conflicts=False):
         """Returns the first file in dest that conflicts with src"""
         ignore = ignore or (lambda x: False)
-        conflicts = self.find_dir_conflicts(dest_root, ignore)
+        with _ThreadMap() as thread_map:
+            levels, files, listings = self._compare(
+                dest_root, ignore, thread_map)
+        conflicts, existing = self._conflicts(
+            dest_root, levels, files, listings)
 
         if not ignore_file_conflicts:
-            conflicts.extend(
-                dst for src, dst
-                in self.get_file_map(dest_root, ignore).items()
-                if os.path.exists(dst))
+            conflicts.extend(existing)
 
         if conflicts:
             return conflicts[0]
 
     def find_dir_conflicts(self, dest_root, ignore):
-        conflicts = []
-        kwargs = {'follow_nonexisting': False, 'ignore': ignore}
-        for src, dest in traverse_tree(self._root, dest_root, **kwargs):
-            if os.path.isdir(src):
-                if os.path.exists(dest) and not os.path.isdir(dest):
-                    conflicts.append("File blocks directory: %s" % dest)
-            elif os.path.exists(dest) and os.path.isdir(dest):
-                conflicts.append("Directory blocks directory: %s" % dest)
-        return conflicts
+        with _ThreadMap() as thread_map:
+            levels, files, listings = self._compare(
+                dest_root, ignore, thread_map)
+        return self._conflicts(dest_root, levels, files, listings)[0]
 
     def get_file_map(self, dest_root, ignore):
-        merge_map = {}
-        kwargs = {'follow_nonexisting': True, 'ignore': ignore}
-        for src, dest in traverse_tree(self._root, dest_root, **kwargs):
-            if not os.path.isdir(src):
-                merge_map[src] = dest
-        return merge_map
-
-    def merge_directories(self, dest_root, ignore):
-        for src, dest in traverse_tree(self._root, dest_root, ignore=ignore):
-            if os.path.isdir(src):
-                if not os.path.exists(dest):
-                    mkdirp(dest)
-                    continue
-
-                if not os.path.isdir(dest):
+        with _ThreadMap() as thread_map:
+            _, files = self._source_tree(ignore, thread_map)
+        return dict((os.path.join(self._root, f), os.path.join(dest_root, f))
+                    for f in files)
+
+    def _merge_directories(self, dest_root, levels, listings, thread_map):
+        for level in levels:
+            missing, empty = [], []
+            for rel_dir in level:
+                dest = os.path.join(dest_root, rel_dir)
+                state = _dest_state(dest_root, listings, rel_dir)
+                if state is None:
+                    missing.append(dest)
+                elif not state:
                     raise ValueError("File blocks directory: %s" % dest)
+                elif listings.get(rel_dir) == {}:
+                    # mark empty directories so they aren't removed on
+                    # unmerge.
+                    empty.append(os.path.join(dest, empty_file_name))
 
-                # mark empty directories so they aren't removed on unmerge.
-                if not os.listdir(dest):
-                    marker = os.path.join(dest, empty_file_name)
-                    touch(marker)
-
-    def unmerge_directories(self, dest_root, ignore):
-        for src, dest in traverse_tree(
-                self._root, dest_root, ignore=ignore, order='post'):
-            if os.path.isdir(src):
-                if not os.path.exists(dest):
-                    continue
-                elif not os.path.isdir(dest):
-                    raise ValueError("File blocks directory: %s" % dest)
+            thread_map(mkdirp, missing)
+            thread_map(touch, empty)
 
-                # remove directory if it is empty.
-                if not os.listdir(dest):
-                    shutil.rmtree(dest, ignore_errors=True)
+    def merge_directories(self, dest_root, ignore):
+        with _ThreadMap() as thread_map:
+            levels, _, listings = self._compare(dest_root, ignore, thread_map)
+            self._merge_directories(dest_root, levels, listings, thread_map)
+
+    def _unmerge_directories(self, dest_root, levels, thread_map):
+        def unmerge_directory(rel_dir):
+            dest = os.path.join(dest_root, rel_dir)
+            if not os.path.exists(dest):
+                return
+            elif not os.path.isdir(dest):
+                raise ValueError("File blocks directory: %s" % dest)
+
+            # remove directory if it is empty.
+            if not os.listdir(dest):
+                shutil.rmtree(dest, ignore_errors=True)
+
+            # remove empty dir marker if present.
+            marker = os.path.join(dest, empty_file_name)
+            if os.path.exists(marker):
+                os.remove(marker)
+
+        # deeper directories first, so that directories are emptied
+        # before they are checked.
+        for level in reversed(levels):
+            thread_map(unmerge_directory, level)
 
-                # remove empty dir marker if present.
-                marker = os.path.join(dest, empty_file_name)
-                if os.path.exists(marker):
-                    os.remove(marker)
+    def unmerge_directories(self, dest_root, ignore):
+        with _ThreadMap() as thread_map:
+            levels, _ = self._source_tree(ignore, thread_map)
+            self._unmerge_directories(dest_root, levels, thread_map)
 
     def merge(self, dest_root, ignore_conflicts=False, ignore=None,
               link=os.symlink, relative=False):
@@ -120,7 +360,7 @@ def merge(self, dest_root, ignore_conflicts=False, ignore=None,
         Keyword Args:
 
         ignore_conflicts (bool): if True, do not break when the target exists;
-            return a list of files that could not be linked
+            warn about the files that could not be linked
 
         ignore (callable): callable that returns True if a file is to be
             ignored in the merge (by default ignore nothing)
@@ -131,29 +371,46 @@ def merge(self, dest_root, ignore_conflicts=False, ignore=None,
             (default False)
 
         """
+        existing = self.merge_skip_existing(
+            dest_root, ignore_conflicts=ignore_conflicts, ignore=ignore,
+            link=link, relative=relative)
+        for c in existing:
+            tty.warn("Could not merge: %s" % c)
+
+    def merge_skip_existing(self, dest_root, ignore_conflicts=False,
+                            ignore=None, link=os.symlink, relative=False):
+        """Like ``merge``, but silently skips the files that already exist in
+        dest when ignoring conflicts, and returns them."""
         if ignore is None:
             ignore = lambda x: False
 
-        conflict = self.find_conflict(
-            dest_root, ignore=ignore, ignore_file_conflicts=ignore_conflicts)
-        if conflict:
-            raise MergeConflictError(conflict)
-
-        self.merge_directories(dest_root, ignore)
-        existing = []
-        for src, dst in self.get_file_map(dest_root, ignore).items():
-            if os.path.exists(dst):
-                existing.append(dst)
-            elif relative:
+        def link_file(rel_path):
+            src = os.path.join(self._root, rel_path)
+            dst = os.path.join(dest_root, rel_path)
+            if relative:
                 abs_src = os.path.abspath(src)
                 dst_dir = os.path.dirname(os.path.abspath(dst))
-                rel = os.path.relpath(abs_src, dst_dir)
-                link(rel, dst)
+                link(os.path.relpath(abs_src, dst_dir), dst)
             else:
                 link(src, dst)
 
-        for c in existing:
-            tty.warn("Could not merge: %s" % c)
+        with _ThreadMap() as thread_map:
+            # find all the conflicts in a single pass over both trees
+            levels, files, listings = self._compare(
+                dest_root, ignore, thread_map)
+            conflicts, existing = self._conflicts(
+                dest_root, levels, files, listings)
+            if not ignore_conflicts:
+                conflicts.extend(existing)
+            if conflicts:
+                raise MergeConflictError(conflicts[0])
+
+            self._merge_directories(dest_root, levels, listings, thread_map)
+            thread_map(link_file, [
+                f for f in files
+                if _dest_state(dest_root, listings, f) is None])
+
+        return existing
 
     def unmerge(self, dest_root, ignore=None, remove_file=remove_link):
         """Unlink all files in dest that exist in src.
@@ -163,9 +420,12 @@ def unmerge(self, dest_root, ignore=None, remove_file=remove_link):
         if ignore is None:
             ignore = lambda x: False
 
-        for src, dst in self.get_file_map(dest_root, ignore).items():
-            remove_file(src, dst)
-        self.unmerge_directories(dest_root, ignore)
+        with _ThreadMap() as thread_map:
+            levels, files = self._source_tree(ignore, thread_map)
+            thread_map(lambda f: remove_file(os.path.join(self._root, f),
+                                             os.path.join(dest_root, f)),
+                       files)
+            self._unmerge_directories(dest_root, levels, thread_map)
 
 
 class MergeConflictError(Exception):
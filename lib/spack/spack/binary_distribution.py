@@ -12,6 +12,7 @@
 import tempfile
 import hashlib
 import glob
+import multiprocessing.pool
 from ordereddict_backport import OrderedDict
 
 from contextlib import closing
@@ -31,6 +32,7 @@
 import spack.fetch_strategy as fs
 import spack.util.file_cache as file_cache
 import spack.relocate as relocate
+import spack.util.cpus
 import spack.util.gpg
 import spack.util.spack_json as sjson
 import spack.util.spack_yaml as syaml
@@ -45,6 +47,16 @@
 _build_cache_relative_path = 'build_cache'
 _build_cache_keys_relative_path = '_pgp'
 
+#: File next to the package index recording, for each spec.yaml file, the
+#: fingerprint it had when it was indexed and the DAG hash of its spec
+_index_sources_name = 'index.sources.json'
+
+#: Directory next to the package index holding the hash-prefix shards
+_index_shards_relative_path = 'index'
+
+#: Number of leading characters of the DAG hash selecting a shard
+_index_shard_prefix_length = 2
+
 
 class BinaryCacheIndex(object):
     """
@@ -705,12 +717,142 @@ def sign_tarball(key, force, specfile_path):
     spack.util.gpg.sign(key, specfile_path, '%s.asc' % specfile_path)
 
 
-def generate_package_index(cache_prefix):
+def _fetch_spec_file(cache_prefix, file_path):
+    """Fetch and parse a spec.yaml file from the build cache, returning
+    None if it can't be read."""
+    try:
+        yaml_url = url_util.join(cache_prefix, file_path)
+        tty.debug('fetching {0}'.format(yaml_url))
+        _, _, yaml_file = web_util.read_from_url(yaml_url)
+        yaml_contents = codecs.getreader('utf-8')(yaml_file).read()
+        return Spec.from_yaml(yaml_contents)
+    except (URLError, web_util.SpackWebError) as url_err:
+        tty.error('Error reading spec.yaml: {0}'.format(file_path))
+        tty.error(url_err)
+
+
+def _read_json_from_url(url):
+    _, _, json_file = web_util.read_from_url(url)
+    return sjson.load(codecs.getreader('utf-8')(json_file).read())
+
+
+def _read_indexed_sources(cache_prefix, tmpdir):
+    """Return the spec.yaml files that were used to generate the current
+    package index at ``cache_prefix``.
+
+    Returns:
+        A dictionary mapping each spec.yaml file to a dictionary with its
+        ``fingerprint`` and the ``spec`` read from the index. The dictionary
+        is empty if there is no index, or if it can't be read.
+    """
+    try:
+        sources = _read_json_from_url(
+            url_util.join(cache_prefix, _index_sources_name))['sources']
+
+        _, _, index_file = web_util.read_from_url(
+            url_util.join(cache_prefix, 'index.json'))
+        index_path = os.path.join(tmpdir, 'old_index.json')
+        with open(index_path, 'w') as f:
+            f.write(codecs.getreader('utf-8')(index_file).read())
+
+        old_db = spack_db.Database(
+            None, db_dir=os.path.join(tmpdir, 'old_db_root'),
+            enable_transaction_locking=False)
+        old_db._read_from_file(index_path)
+    except Exception as err:
+        tty.debug('Unable to read the current index at {0}: {1}'.format(
+            cache_prefix, err))
+        return {}
+
+    indexed = {}
+    for file_path, source in sources.items():
+        record = old_db._data.get(source['hash'])
+        if record and record.in_buildcache:
+            indexed[file_path] = {
+                'fingerprint': source['fingerprint'],
+                'spec': record.spec
+            }
+    return indexed
+
+
+def _push_index_shards(db, cache_prefix, tmpdir, incremental):
+    """Split the package index in shards selected by a prefix of the DAG
+    hash, and push them to ``cache_prefix`` with their manifest.
+
+    Each shard contains the records of the specs in the build cache whose
+    hash starts with its prefix, together with their dependencies, so that
+    it can be read on its own. The manifest maps each prefix to the hash of
+    its shard, so clients need to fetch only the shards they need. Shards
+    that didn't change since the last run are not pushed again.
+    """
+    shards_url = url_util.join(cache_prefix, _index_shards_relative_path)
+    shards_dir = os.path.join(tmpdir, _index_shards_relative_path)
+    mkdirp(shards_dir)
+
+    old_shards = {}
+    if incremental:
+        try:
+            old_shards = _read_json_from_url(url_util.join(
+                shards_url, 'manifest.json'))['manifest']['shards']
+        except Exception as err:
+            tty.debug('Unable to read index shards manifest: {0}'.format(err))
+
+    shard_hashes = {}
+    for key, record in db._data.items():
+        if record.in_buildcache:
+            prefix = key[:_index_shard_prefix_length]
+            shard_hashes.setdefault(prefix, set()).update(
+                s.dag_hash() for s in record.spec.traverse())
+
+    shards = {}
+    for prefix, hashes in sorted(shard_hashes.items()):
+        shard_path = os.path.join(shards_dir, '{0}.json'.format(prefix))
+        with open(shard_path, 'w') as f:
+            db._write_to_file(f, hashes=sorted(hashes))
+        with open(shard_path) as f:
+            shards[prefix] = compute_hash(f.read())
+
+        if old_shards.get(prefix) != shards[prefix]:
+            web_util.push_to_url(
+                shard_path,
+                url_util.join(shards_url, os.path.basename(shard_path)),
+                keep_original=False,
+                extra_args={'ContentType': 'application/json'})
+
+    # Push the manifest only after all the shards it refers to
+    manifest_path = os.path.join(shards_dir, 'manifest.json')
+    with open(manifest_path, 'w') as f:
+        sjson.dump({'manifest': {
+            'prefix_length': _index_shard_prefix_length,
+            'shards': shards
+        }}, f)
+    web_util.push_to_url(
+        manifest_path,
+        url_util.join(shards_url, 'manifest.json'),
+        keep_original=False,
+        extra_args={'ContentType': 'application/json'})
+
+    for prefix in set(old_shards) - set(shards):
+        web_util.remove_url(
+            url_util.join(shards_url, '{0}.json'.format(prefix)))
+
+
+def generate_package_index(cache_prefix, incremental=False, shards=False,
+                           concurrency=32):
     """Create the build cache index page.
 
     Creates (or replaces) the "index.json" page at the location given in
     cache_prefix.  This page contains a link for each binary package (.yaml)
     under cache_prefix.
+
+    Args:
+        cache_prefix (str): url of the build cache
+        incremental (bool): if True, reuse the entries of the current index
+            for spec.yaml files that didn't change since it was generated,
+            and fetch only the new or modified ones
+        shards (bool): if True, also publish the index as a set of shards
+            selected by a prefix of the DAG hash, plus a manifest
+        concurrency (int): maximum number of concurrent requests
     """
     tmpdir = tempfile.mkdtemp()
     db_root_dir = os.path.join(tmpdir, 'db_root')
@@ -719,10 +861,11 @@ def generate_package_index(cache_prefix):
                            record_fields=['spec', 'ref_count', 'in_buildcache'])
 
     try:
-        file_list = (
+        file_list = [
             entry
             for entry in web_util.list_url(cache_prefix)
-            if entry.endswith('.yaml'))
+            if entry.endswith('.yaml')]
+        fingerprints = web_util.list_url_fingerprints(cache_prefix)
     except KeyError as inst:
         msg = 'No packages at {0}: {1}'.format(cache_prefix, inst)
         tty.warn(msg)
@@ -736,22 +879,50 @@ def generate_package_index(cache_prefix):
         tty.warn(msg)
         return
 
-    tty.debug('Retrieving spec.yaml files from {0} to build index'.format(
-        cache_prefix))
+    if fingerprints is None:
+        if incremental:
+            tty.warn('Cannot tell which files changed at {0}, all of them '
+                     'are fetched: incremental mode is inactive'.format(
+                         cache_prefix))
+        fingerprints = {}
+
+    # Reuse the specs of files that didn't change since the last index
+    indexed = _read_indexed_sources(cache_prefix, tmpdir) if incremental \
+        else {}
+    specs = {}
     for file_path in file_list:
-        try:
-            yaml_url = url_util.join(cache_prefix, file_path)
-            tty.debug('fetching {0}'.format(yaml_url))
-            _, _, yaml_file = web_util.read_from_url(yaml_url)
-            yaml_contents = codecs.getreader('utf-8')(yaml_file).read()
-            # yaml_obj = syaml.load(yaml_contents)
-            # s = Spec.from_yaml(yaml_obj)
-            s = Spec.from_yaml(yaml_contents)
-            db.add(s, None)
-            db.mark(s, 'in_buildcache', True)
-        except (URLError, web_util.SpackWebError) as url_err:
-            tty.error('Error reading spec.yaml: {0}'.format(file_path))
-            tty.error(url_err)
+        entry = indexed.get(file_path)
+        if entry and entry['fingerprint'] == fingerprints.get(file_path):
+            specs[file_path] = entry['spec']
+    to_fetch = [f for f in file_list if f not in specs]
+
+    tty.debug('Retrieving {0} spec.yaml files from {1} to build index'.format(
+        len(to_fetch), cache_prefix))
+    tp = multiprocessing.pool.ThreadPool(processes=concurrency)
+    try:
+        fetched = tp.map(
+            llnl.util.lang.star(_fetch_spec_file),
+            [(cache_prefix, file_path) for file_path in to_fetch])
+    finally:
+        tp.terminate()
+        tp.join()
+    specs.update(
+        (f, s) for f, s in zip(to_fetch, fetched) if s is not None)
+
+    # Add specs in listing order, so that the same build cache always
+    # results in the same index
+    sources = {}
+    for file_path in file_list:
+        if file_path not in specs:
+            continue
+        s = specs[file_path]
+        db.add(s, None)
+        db.mark(s, 'in_buildcache', True)
+        if file_path in fingerprints:
+            sources[file_path] = {
+                'fingerprint': fingerprints[file_path],
+                'hash': s.dag_hash()
+            }
 
     try:
         index_json_path = os.path.join(db_root_dir, 'index.json')
@@ -768,6 +939,14 @@ def generate_package_index(cache_prefix):
         with open(index_hash_path, 'w') as f:
             f.write(index_hash)
 
+        # Write the spec.yaml files the index was generated from
+        index_sources_path = os.path.join(db_root_dir, _index_sources_name)
+        with open(index_sources_path, 'w') as f:
+            sjson.dump({'sources': sources}, f)
+
+        if shards:
+            _push_index_shards(db, cache_prefix, tmpdir, incremental)
+
         # Push the index itself
         web_util.push_to_url(
             index_json_path,
@@ -781,6 +960,13 @@ def generate_package_index(cache_prefix):
             url_util.join(cache_prefix, 'index.json.hash'),
             keep_original=False,
             extra_args={'ContentType': 'text/plain'})
+
+        # Push the sources, used for incremental updates
+        web_util.push_to_url(
+            index_sources_path,
+            url_util.join(cache_prefix, _index_sources_name),
+            keep_original=False,
+            extra_args={'ContentType': 'application/json'})
     except Exception as err:
         msg = 'Encountered problem pushing package index to {0}: {1}'.format(
             cache_prefix, err)
@@ -1167,6 +1353,14 @@ def relocate_package(spec, allow_root):
     tty.debug("Relocating package from",
               "%s to %s." % (old_layout_root, new_layout_root))
 
+    # Text replacement is CPU bound, so relocate files in a pool of
+    # processes. Files that don't contain any of the old prefixes are
+    # skipped after a plain byte search.
+    relocate_options = {
+        'concurrency': spack.util.cpus.cpus_available(),
+        'use_processes': True
+    }
+
     def is_backup_file(file):
         return file.endswith('~')
 
@@ -1208,7 +1402,9 @@ def is_backup_file(file):
 
         # For all buildcaches
         # relocate the install prefixes in text files including dependencies
-        relocate.relocate_text(text_names, prefix_to_prefix_text)
+        relocate.relocate_text(
+            text_names, prefix_to_prefix_text, **relocate_options
+        )
 
         paths_to_relocate = [old_prefix, old_layout_root]
         paths_to_relocate.extend(prefix_to_hash.keys())
@@ -1218,13 +1414,17 @@ def is_backup_file(file):
             map(lambda filename: os.path.join(workdir, filename),
                 buildinfo['relocate_binaries'])))
         # relocate the install prefixes in binary files including dependencies
-        relocate.relocate_text_bin(files_to_relocate, prefix_to_prefix_bin)
+        relocate.relocate_text_bin(
+            files_to_relocate, prefix_to_prefix_bin, **relocate_options
+        )
 
     # If we are installing back to the same location
     # relocate the sbang location if the spack directory changed
     else:
         if old_spack_prefix != new_spack_prefix:
-            relocate.relocate_text(text_names, prefix_to_prefix_text)
+            relocate.relocate_text(
+                text_names, prefix_to_prefix_text, **relocate_options
+            )
 
 
 def extract_tarball(spec, filename, allow_root=False, unsigned=False,
@@ -914,6 +914,12 @@ def _setup_pkg_and_run(serialized_pkg, function, kwargs, child_pipe,
 
         pkg = serialized_pkg.restore()
 
+        # The parent may be running several builds at once and share the
+        # build jobs among them
+        make_jobs = kwargs.get('make_jobs')
+        if make_jobs:
+            _limit_build_jobs(make_jobs)
+
         if not kwargs.get('fake', False):
             kwargs['unmodified_env'] = os.environ.copy()
             setup_package(pkg, dirty=kwargs.get('dirty', False),
@@ -965,7 +971,80 @@ def _setup_pkg_and_run(serialized_pkg, function, kwargs, child_pipe,
             input_multiprocess_fd.close()
 
 
-def start_build_process(pkg, function, kwargs):
+def _limit_build_jobs(jobs):
+    """Make ``determine_number_of_jobs()`` return at most ``jobs`` in this
+    process, whatever the command line asked for.
+
+    This only ever modifies in-memory configuration scopes, and is meant to
+    be called in build processes.
+    """
+    if 'command_line' in spack.config.scopes():
+        spack.config.set('config:build_jobs', jobs, scope='command_line')
+    else:
+        spack.config.config.push_scope(spack.config.InternalConfigScope(
+            'command_line', {'config': {'build_jobs': jobs}}))
+
+
+class BuildProcess(object):
+    """A child process started by ``start_build_process()``.
+
+    The process can be passed to ``multiprocessing.connection.wait()``
+    to wait for its result to be ready.
+    """
+
+    def __init__(self, pkg, process, pipe):
+        self.pkg = pkg
+        self.process = process
+        self.pipe = pipe
+
+    def fileno(self):
+        return self.pipe.fileno()
+
+    def poll(self):
+        """Return True if the result of the process is ready."""
+        return self.pipe.poll()
+
+    def terminate(self):
+        """Terminate the process and wait for it to exit."""
+        self.process.terminate()
+        self.process.join()
+        self.pipe.close()
+
+    def complete(self):
+        """Wait for the process to exit and return the result of its
+        function, or raise the error it failed with."""
+        try:
+            child_result = self.pipe.recv()
+        except EOFError:
+            self.process.join()
+            raise InstallError(
+                'Build process for {0} exited unexpectedly with code {1}'
+                .format(self.pkg.name, self.process.exitcode))
+        finally:
+            self.pipe.close()
+        self.process.join()
+
+        # If returns a StopPhase, raise it
+        if isinstance(child_result, StopPhase):
+            # do not print
+            raise child_result
+
+        # let the caller know which package went wrong.
+        if isinstance(child_result, InstallError):
+            child_result.pkg = self.pkg
+
+        if isinstance(child_result, ChildError):
+            # If the child process raised an error, print its output here
+            # rather than waiting until the call to SpackError.die() in
+            # main(). This allows exception handling output to be logged
+            # from within Spack. see spack.main.SpackCommand.
+            child_result.print_context()
+            raise child_result
+
+        return child_result
+
+
+def start_build_process(pkg, function, kwargs, wait=True):
     """Create a child process to do part of a spack build.
 
     Args:
@@ -974,6 +1053,9 @@ def start_build_process(pkg, function, kwargs):
             child process for.
         function (callable): argless function to run in the child
             process.
+        wait (bool): if False, return a ``BuildProcess`` as soon as the
+            child process is started, instead of waiting for its result.
+            Standard input is only forwarded to processes we wait for.
 
     Usage::
 
@@ -1011,7 +1093,7 @@ def child_fun():
 
     try:
         # Forward sys.stdin when appropriate, to allow toggling verbosity
-        if sys.stdin.isatty() and hasattr(sys.stdin, 'fileno'):
+        if wait and sys.stdin.isatty() and hasattr(sys.stdin, 'fileno'):
             input_fd = os.dup(sys.stdin.fileno())
             input_multiprocess_fd = MultiProcessFd(input_fd)
 
@@ -1030,27 +1112,15 @@ def child_fun():
         if input_multiprocess_fd is not None:
             input_multiprocess_fd.close()
 
-    child_result = parent_pipe.recv()
-    p.join()
-
-    # If returns a StopPhase, raise it
-    if isinstance(child_result, StopPhase):
-        # do not print
-        raise child_result
-
-    # let the caller know which package went wrong.
-    if isinstance(child_result, InstallError):
-        child_result.pkg = pkg
+    # Only the child writes to its end of the pipe: closing it here lets
+    # the parent notice if the child dies without sending a result.
+    child_pipe.close()
 
-    if isinstance(child_result, ChildError):
-        # If the child process raised an error, print its output here rather
-        # than waiting until the call to SpackError.die() in main(). This
-        # allows exception handling output to be logged from within Spack.
-        # see spack.main.SpackCommand.
-        child_result.print_context()
-        raise child_result
+    process = BuildProcess(pkg, p, parent_pipe)
+    if not wait:
+        return process
 
-    return child_result
+    return process.complete()
 
 
 def get_package_context(traceback, context=3):
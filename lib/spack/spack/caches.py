@@ -4,9 +4,11 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
 """Caches used by Spack to store data"""
+import errno
 import os
 
 import llnl.util.lang
+import llnl.util.tty as tty
 from llnl.util.filesystem import mkdirp
 
 import spack.error
@@ -15,6 +17,7 @@
 import spack.fetch_strategy
 import spack.util.file_cache
 import spack.util.path
+import spack.util.spack_json as sjson
 
 
 def misc_cache_location():
@@ -39,6 +42,38 @@ def _misc_cache():
 misc_cache = llnl.util.lang.Singleton(_misc_cache)
 
 
+def read_misc_cache_json(key):
+    """Return the dictionary stored as JSON in an entry of the misc cache,
+    or an empty dictionary if it can't be read."""
+    try:
+        if not misc_cache.init_entry(key):
+            return {}
+        with misc_cache.read_transaction(key) as f:
+            return sjson.load(f)
+    except Exception as e:
+        tty.debug('Cannot read {0} from the misc cache [{1}]'.format(key, e))
+        return {}
+
+
+def update_misc_cache_json(key, data):
+    """Merge a dictionary into the one stored as JSON in an entry of the
+    misc cache. Entries that can't be read are overwritten, and failures to
+    write are ignored: the misc cache only saves work."""
+    try:
+        misc_cache.init_entry(key)
+        with misc_cache.write_transaction(key) as (old, new):
+            stored = {}
+            if old:
+                try:
+                    stored = sjson.load(old)
+                except Exception:
+                    pass
+            stored.update(data)
+            sjson.dump(stored, new)
+    except Exception as e:
+        tty.debug('Cannot write {0} to the misc cache [{1}]'.format(key, e))
+
+
 def fetch_cache_location():
     """Filesystem cache of downloaded archives.
 
@@ -88,7 +123,13 @@ def symlink(self, mirror_ref):
                 # to https://github.com/spack/spack/pull/13908)
                 os.unlink(cosmetic_path)
             mkdirp(os.path.dirname(cosmetic_path))
-            os.symlink(relative_dst, cosmetic_path)
+            try:
+                os.symlink(relative_dst, cosmetic_path)
+            except OSError as e:
+                # Another process mirroring the same resource may have
+                # created the link in the meantime
+                if e.errno != errno.EEXIST:
+                    raise
 
 
 #: Spack's local cache for downloaded source archives
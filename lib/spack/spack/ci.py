@@ -19,6 +19,7 @@
 from six.moves.urllib.parse import urlencode
 from six.moves.urllib.request import build_opener, HTTPHandler, Request
 
+import llnl.util.lang
 import llnl.util.tty as tty
 import llnl.util.filesystem as fs
 
@@ -33,6 +34,7 @@
 import spack.mirror
 import spack.paths
 import spack.repo
+import spack.spec
 from spack.spec import Spec
 import spack.util.executable as exe
 import spack.util.spack_yaml as syaml
@@ -437,8 +439,13 @@ def append_dep(s, d):
     return deps_json_obj
 
 
+@llnl.util.lang.memoized
+def _spec_matcher(match_string):
+    return spack.spec.SpecMatcher(match_string)
+
+
 def spec_matches(spec, match_string):
-    return spec.satisfies(match_string)
+    return _spec_matcher(match_string)(spec)
 
 
 def copy_attributes(attrs_list, src_dict, dest_dict):
@@ -234,6 +234,12 @@ def setup_parser(subparser):
     update_index.add_argument(
         '-k', '--keys', default=False, action='store_true',
         help='If provided, key index will be updated as well as package index')
+    update_index.add_argument(
+        '-i', '--incremental', default=False, action='store_true',
+        help='Only fetch the spec files that changed since the last update')
+    update_index.add_argument(
+        '--shards', default=False, action='store_true',
+        help='Also publish the index as shards selected by hash prefix')
     update_index.set_defaults(func=buildcache_update_index)
 
 
@@ -769,12 +775,14 @@ def buildcache_copy(args):
         shutil.copyfile(cdashid_src_path, cdashid_dest_path)
 
 
-def update_index(mirror_url, update_keys=False):
+def update_index(mirror_url, update_keys=False, incremental=False,
+                 shards=False):
     mirror = spack.mirror.MirrorCollection().lookup(mirror_url)
     outdir = url_util.format(mirror.push_url)
 
     bindist.generate_package_index(
-        url_util.join(outdir, bindist.build_cache_relative_path()))
+        url_util.join(outdir, bindist.build_cache_relative_path()),
+        incremental=incremental, shards=shards)
 
     if update_keys:
         keys_url = url_util.join(outdir,
@@ -790,7 +798,8 @@ def buildcache_update_index(args):
     if args.mirror_url:
         outdir = args.mirror_url
 
-    update_index(outdir, update_keys=args.keys)
+    update_index(outdir, update_keys=args.keys,
+                 incremental=args.incremental, shards=args.shards)
 
 
 def buildcache(parser, args):
@@ -5,9 +5,15 @@
 from __future__ import print_function
 
 import argparse
+import hashlib
+import inspect
+import multiprocessing
+import multiprocessing.pool
 import os
 import re
+import signal
 import sys
+import time
 from collections import defaultdict, namedtuple
 
 import llnl.util.filesystem
@@ -15,9 +21,12 @@
 import llnl.util.tty.colify as colify
 import six
 import spack
+import spack.caches
 import spack.cmd
 import spack.cmd.common.arguments
 import spack.error
+import spack.subprocess_context
+import spack.util.cpus
 import spack.util.environment
 import spack.util.spack_yaml as syaml
 
@@ -43,6 +52,14 @@ def setup_parser(subparser):
         '--scope', choices=scopes, metavar=scopes_metavar,
         default=spack.config.default_modify_scope('packages'),
         help="configuration scope to modify")
+    find_parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help="number of processes detecting the versions of executables"
+             " (default: number of cores, up to 16)")
+    find_parser.add_argument(
+        '--timeout', type=int, default=60, metavar='SECONDS',
+        help="give up detecting a package in a directory after this many"
+             " seconds (default: 60)")
     spack.cmd.common.arguments.add_common_arguments(find_parser, ['tags'])
     find_parser.add_argument('packages', nargs=argparse.REMAINDER)
 
@@ -69,17 +86,36 @@ def _get_system_executables():
     search_paths = llnl.util.filesystem.search_paths_for_executables(
         *path_hints)
 
+    # List the search directories concurrently, since they are often on
+    # network file systems
+    executables = _map_in_threads(_executables_in, search_paths)
+
     path_to_exe = {}
     # Reverse order of search directories so that an exe in the first PATH
     # entry overrides later entries
-    for search_path in reversed(search_paths):
-        for exe in os.listdir(search_path):
-            exe_path = os.path.join(search_path, exe)
-            if is_executable(exe_path):
-                path_to_exe[exe_path] = exe
+    for search_path, exes in reversed(list(zip(search_paths, executables))):
+        for exe in exes:
+            path_to_exe[os.path.join(search_path, exe)] = exe
     return path_to_exe
 
 
+def _executables_in(search_path):
+    return [exe for exe in os.listdir(search_path)
+            if is_executable(os.path.join(search_path, exe))]
+
+
+def _map_in_threads(func, items):
+    if len(items) < 2:
+        return [func(x) for x in items]
+
+    tp = multiprocessing.pool.ThreadPool(processes=min(16, len(items)))
+    try:
+        return tp.map(func, items)
+    finally:
+        tp.terminate()
+        tp.join()
+
+
 ExternalPackageEntry = namedtuple(
     'ExternalPackageEntry',
     ['spec', 'base_dir'])
@@ -174,7 +210,8 @@ def external_find(args):
     if not args.tags and not packages_to_check:
         packages_to_check = spack.repo.path.all_packages()
 
-    pkg_to_entries = _get_external_packages(packages_to_check)
+    pkg_to_entries = _get_external_packages(
+        packages_to_check, jobs=args.jobs, timeout=args.timeout)
     new_entries = _update_pkg_config(
         args.scope, pkg_to_entries, args.not_buildable
     )
@@ -257,7 +294,155 @@ def _update_pkg_config(scope, pkg_to_entries, not_buildable):
     return all_new_specs
 
 
-def _get_external_packages(packages_to_check, system_path_to_exe=None):
+#: Entry of the misc cache storing the results of previous detections
+_detection_cache_entry = os.path.join('external', 'detected.json')
+
+
+def _package_fingerprint(pkg):
+    """Hash of the file defining the package, so that detection results are
+    not reused once the way the package detects itself changed."""
+    try:
+        with open(inspect.getfile(pkg.__class__), 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except (IOError, OSError, TypeError):
+        return None
+
+
+def _detection_key(pkg, prefix, exes_in_prefix):
+    """Return the key of the detection of a package among executables in a
+    prefix, and the state of the inputs of the detection: the package and
+    the path, inode and modification time of the executables. Returns None
+    if the detection can't be cached."""
+    executables = []
+    try:
+        for exe in sorted(exes_in_prefix):
+            stat = os.stat(exe)
+            executables.append([exe, stat.st_ino, stat.st_mtime])
+    except OSError:
+        return None
+
+    fingerprint = _package_fingerprint(pkg)
+    if not fingerprint:
+        return None
+
+    key = '{0}:{1}'.format(pkg.name, prefix)
+    return key, {'package': fingerprint, 'executables': executables}
+
+
+def _read_detection_cache():
+    return spack.caches.read_misc_cache_json(_detection_cache_entry)
+
+
+def _write_detection_cache(detected):
+    spack.caches.update_misc_cache_json(_detection_cache_entry, detected)
+
+
+def _specs_to_cache(specs):
+    """Return the data needed to reconstruct detected specs, or None if
+    they can't be stored."""
+    try:
+        return [{'spec': str(spec),
+                 'prefix': spec.external_path,
+                 'modules': spec.external_modules,
+                 'extra_attributes': dict(spec.extra_attributes or {})}
+                for spec in specs]
+    except Exception:
+        return None
+
+
+def _specs_from_cache(data):
+    specs = []
+    for item in data:
+        spec = spack.spec.Spec(
+            item['spec'],
+            external_path=item['prefix'],
+            external_modules=item['modules'])
+        specs.append(spack.spec.Spec.from_detection(
+            spec, extra_attributes=item['extra_attributes']))
+    return specs
+
+
+def _determine_specs(pkg, prefix, exes_in_prefix):
+    return list(_convert_to_iterable(
+        pkg.determine_spec_details(prefix, exes_in_prefix)))
+
+
+def _determine_specs_task(index):
+    # Run the executables in a process group led by the worker, so that
+    # they can be killed along with it if the detection is given up
+    if os.getpgid(0) != os.getpid():
+        os.setpgid(0, 0)
+
+    state = spack.subprocess_context.worker_state
+    state['pids'][index] = os.getpid()
+    state['started'][index] = time.time()
+    return _determine_specs(*state['detections'][index])
+
+
+def _kill_detection(pid):
+    """Kill a worker stuck on a detection, and the executables it runs."""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        # The worker is gone already
+        pass
+
+
+def _run_detections(detections, jobs, timeout):
+    """Call ``determine_spec_details`` for each (package, prefix,
+    executables) detection, in a pool of up to ``jobs`` processes.
+
+    Detections usually run the executables to query their version, and
+    some executables hang, so detections that take more than ``timeout``
+    seconds from the time a worker starts them are given up: their worker
+    is killed along with the executables it runs, and replaced by the pool.
+    Returns the specs found by each detection, or None where the detection
+    was given up.
+    """
+    jobs = min(jobs, len(detections))
+
+    if jobs > 1 and spack.subprocess_context.can_fork_workers():
+        tty.debug('Running {0} detections with {1} processes'
+                  .format(len(detections), jobs))
+        # Times at which workers started each detection, 0 until then, and
+        # the workers that started them
+        started = multiprocessing.Array('d', len(detections), lock=False)
+        pids = multiprocessing.Array('i', len(detections), lock=False)
+        with spack.subprocess_context.workers(
+                jobs, detections=detections, started=started,
+                pids=pids) as pool:
+            results = [pool.apply_async(_determine_specs_task, (i,))
+                       for i in range(len(detections))]
+            found = []
+            try:
+                for i, (pkg, prefix, _) in enumerate(detections):
+                    result = results[i]
+                    while not result.ready() and (
+                            not started[i] or
+                            time.time() < started[i] + timeout):
+                        result.wait(0.1)
+
+                    if result.ready():
+                        found.append(result.get())
+                        continue
+
+                    tty.warn('Gave up detecting {0} in {1} after {2} seconds'
+                             .format(pkg.name, prefix, timeout))
+                    _kill_detection(pids[i])
+                    found.append(None)
+            finally:
+                # Terminating the pool would leave the executables run by
+                # unfinished detections behind
+                for i in range(len(found), len(detections)):
+                    if started[i] and not results[i].ready():
+                        _kill_detection(pids[i])
+            return found
+
+    return [_determine_specs(*x) for x in detections]
+
+
+def _get_external_packages(packages_to_check, system_path_to_exe=None,
+                           jobs=None, timeout=60):
     if not system_path_to_exe:
         system_path_to_exe = _get_system_executables()
 
@@ -275,9 +460,12 @@ def _get_external_packages(packages_to_check, system_path_to_exe=None):
                 for pkg in pkgs:
                     pkg_to_found_exes[pkg].add(path)
 
-    pkg_to_entries = defaultdict(list)
-    resolved_specs = {}  # spec -> exe found for the spec
-
+    # TODO: iterate through this in a predetermined order (e.g. by package
+    # name) to get repeatable results when there are conflicts. Note that
+    # if we take the prefixes returned by _group_by_prefix, then consider
+    # them in the order that they appear in PATH, this should be sufficient
+    # to get repeatable results.
+    detections = []
     for pkg, exes in pkg_to_found_exes.items():
         if not hasattr(pkg, 'determine_spec_details'):
             tty.warn("{0} must define 'determine_spec_details' in order"
@@ -285,62 +473,92 @@ def _get_external_packages(packages_to_check, system_path_to_exe=None):
                      " of the package.".format(pkg.name))
             continue
 
-        # TODO: iterate through this in a predetermined order (e.g. by package
-        # name) to get repeatable results when there are conflicts. Note that
-        # if we take the prefixes returned by _group_by_prefix, then consider
-        # them in the order that they appear in PATH, this should be sufficient
-        # to get repeatable results.
         for prefix, exes_in_prefix in _group_by_prefix(exes):
-            # TODO: multiple instances of a package can live in the same
-            # prefix, and a package implementation can return multiple specs
-            # for one prefix, but without additional details (e.g. about the
-            # naming scheme which differentiates them), the spec won't be
-            # usable.
-            specs = _convert_to_iterable(
-                pkg.determine_spec_details(prefix, exes_in_prefix))
-
-            if not specs:
+            detections.append((pkg, prefix, exes_in_prefix))
+
+    # Reuse the results of previous detections whose package and
+    # executables didn't change, and run the others
+    cached = _read_detection_cache()
+    keys = [_detection_key(*x) for x in detections]
+    detected_specs = [None] * len(detections)
+    to_run = []
+    for i, key in enumerate(keys):
+        entry = cached.get(key[0]) if key else None
+        if entry and all(entry.get(k) == v for k, v in key[1].items()):
+            try:
+                detected_specs[i] = _specs_from_cache(entry['specs'])
+                continue
+            except Exception as e:
+                tty.debug('Cannot reuse detection of {0} [{1}]'
+                          .format(key[0], str(e)))
+        to_run.append(i)
+
+    jobs = jobs or min(16, spack.util.cpus.cpus_available())
+    found = _run_detections([detections[i] for i in to_run], jobs, timeout)
+
+    updated = {}
+    for i, specs in zip(to_run, found):
+        detected_specs[i] = specs or []
+        data = _specs_to_cache(specs) if specs is not None else None
+        if keys[i] and data is not None:
+            entry = dict(keys[i][1])
+            entry['specs'] = data
+            updated[keys[i][0]] = entry
+    if updated:
+        _write_detection_cache(updated)
+
+    pkg_to_entries = defaultdict(list)
+    resolved_specs = {}  # spec -> exe found for the spec
+
+    for (pkg, prefix, exes_in_prefix), specs in zip(
+            detections, detected_specs):
+        # TODO: multiple instances of a package can live in the same
+        # prefix, and a package implementation can return multiple specs
+        # for one prefix, but without additional details (e.g. about the
+        # naming scheme which differentiates them), the spec won't be
+        # usable.
+        if not specs:
+            tty.debug(
+                'The following executables in {0} were decidedly not '
+                'part of the package {1}: {2}'
+                .format(prefix, pkg.name, ', '.join(
+                    _convert_to_iterable(exes_in_prefix)))
+            )
+
+        for spec in specs:
+            pkg_prefix = _determine_base_dir(prefix)
+
+            if not pkg_prefix:
+                tty.debug("{0} does not end with a 'bin/' directory: it"
+                          " cannot be added as a Spack package"
+                          .format(prefix))
+                continue
+
+            if spec in resolved_specs:
+                prior_prefix = ', '.join(
+                    _convert_to_iterable(resolved_specs[spec]))
+
                 tty.debug(
-                    'The following executables in {0} were decidedly not '
-                    'part of the package {1}: {2}'
-                    .format(prefix, pkg.name, ', '.join(
-                        _convert_to_iterable(exes_in_prefix)))
-                )
-
-            for spec in specs:
-                pkg_prefix = _determine_base_dir(prefix)
-
-                if not pkg_prefix:
-                    tty.debug("{0} does not end with a 'bin/' directory: it"
-                              " cannot be added as a Spack package"
-                              .format(prefix))
-                    continue
-
-                if spec in resolved_specs:
-                    prior_prefix = ', '.join(
-                        _convert_to_iterable(resolved_specs[spec]))
-
-                    tty.debug(
-                        "Executables in {0} and {1} are both associated"
-                        " with the same spec {2}"
-                        .format(prefix, prior_prefix, str(spec)))
-                    continue
-                else:
-                    resolved_specs[spec] = prefix
-
-                try:
-                    spec.validate_detection()
-                except Exception as e:
-                    msg = ('"{0}" has been detected on the system but will '
-                           'not be added to packages.yaml [reason={1}]')
-                    tty.warn(msg.format(spec, str(e)))
-                    continue
-
-                if spec.external_path:
-                    pkg_prefix = spec.external_path
-
-                pkg_to_entries[pkg.name].append(
-                    ExternalPackageEntry(spec=spec, base_dir=pkg_prefix))
+                    "Executables in {0} and {1} are both associated"
+                    " with the same spec {2}"
+                    .format(prefix, prior_prefix, str(spec)))
+                continue
+            else:
+                resolved_specs[spec] = prefix
+
+            try:
+                spec.validate_detection()
+            except Exception as e:
+                msg = ('"{0}" has been detected on the system but will '
+                       'not be added to packages.yaml [reason={1}]')
+                tty.warn(msg.format(spec, str(e)))
+                continue
+
+            if spec.external_path:
+                pkg_prefix = spec.external_path
+
+            pkg_to_entries[pkg.name].append(
+                ExternalPackageEntry(spec=spec, base_dir=pkg_prefix))
 
     return pkg_to_entries
 
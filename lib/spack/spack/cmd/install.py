@@ -49,6 +49,7 @@ def update_kwargs_from_args(args, kwargs):
         'stop_at': args.until,
         'unsigned': args.unsigned,
         'full_hash_match': args.full_hash_match,
+        'concurrent_packages': args.concurrent_packages,
     })
 
     kwargs.update({
@@ -80,6 +81,10 @@ def setup_parser(subparser):
         '-u', '--until', type=str, dest='until', default=None,
         help="phase to stop after when installing (default None)")
     arguments.add_common_arguments(subparser, ['jobs'])
+    subparser.add_argument(
+        '-p', '--concurrent-packages', type=int, default=1,
+        help="maximum number of packages to build at the same time; "
+        "build jobs are shared among them (default 1)")
     subparser.add_argument(
         '--overwrite', action='store_true',
         help="reinstall an existing spec, even if it has dependents")
@@ -314,6 +319,12 @@ def install(parser, args, **kwargs):
     if args.log_file:
         reporter.filename = args.log_file
 
+    # Reports time each package install from start to end, so packages
+    # have to be built one at a time
+    if reporter.format_name and args.concurrent_packages > 1:
+        tty.warn('Building one package at a time to report on installs')
+        args.concurrent_packages = 1
+
     if args.run_tests:
         tty.warn("Deprecated option: --run-tests: use --test=all instead")
 
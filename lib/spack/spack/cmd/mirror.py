@@ -65,6 +65,10 @@ def setup_parser(subparser):
         '-n', '--versions-per-spec',
         help="the number of versions to fetch for each spec, choose 'all' to"
              " retrieve all versions of each package")
+    create_parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help="the number of specs to mirror at the same time"
+             " (default: config:mirror_jobs)")
     arguments.add_common_arguments(create_parser, ['specs'])
 
     # Destroy
@@ -319,7 +323,7 @@ def mirror_create(args):
 
     # Actually do the work to create the mirror
     present, mirrored, error = spack.mirror.create(
-        directory, mirror_specs, args.skip_unstable_versions)
+        directory, mirror_specs, args.skip_unstable_versions, jobs=args.jobs)
     p, m, e = len(present), len(mirrored), len(error)
 
     verb = "updated" if existed else "created"
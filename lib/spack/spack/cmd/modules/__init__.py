@@ -17,6 +17,7 @@
 import spack.modules
 import spack.repo
 import spack.modules.common
+import spack.subprocess_context
 
 import spack.cmd.common.arguments as arguments
 
@@ -44,6 +45,11 @@ def setup_parser(subparser):
         help='generate modules for packages installed upstream',
         action='store_true'
     )
+    refresh_parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help='the number of module files to write at the same time'
+             ' (default: config:module_jobs)'
+    )
     arguments.add_common_arguments(
         refresh_parser, ['constraint', 'yes_to_all']
     )
@@ -326,17 +332,66 @@ def refresh(module_type, specs, args):
         shutil.rmtree(module_type_root, ignore_errors=False)
     filesystem.mkdirp(module_type_root)
 
-    # Dump module index after potentially removing module tree
-    spack.modules.common.generate_module_index(
-        module_type_root, writers, overwrite=args.delete_tree)
+    # Module files are written again only if what they are generated from
+    # changed since they were written, according to the module index
+    cache = {}
+    inputs = {}
     for x in writers:
         try:
-            x.write(overwrite=True)
+            inputs[x.spec.dag_hash()] = x.inputs_hash(cache)
         except Exception as e:
             tty.debug(e)
-            msg = 'Could not write module file [{0}]'
-            tty.warn(msg.format(x.layout.filename))
-            tty.warn('\t--> {0} <--'.format(str(e)))
+    written = spack.modules.common.read_module_inputs(module_type_root)
+
+    def _outdated(writer):
+        h = writer.spec.dag_hash()
+        return (not os.path.exists(writer.layout.filename) or
+                h not in inputs or written.get(h) != inputs[h])
+
+    outdated = [x for x in writers if _outdated(x)]
+    tty.debug('{0} {1} module files are up to date'.format(
+        len(writers) - len(outdated), module_type))
+
+    jobs = args.jobs or spack.config.get('config:module_jobs', 4)
+    for x, success in zip(outdated, _write_module_files(outdated, jobs)):
+        if not success:
+            inputs.pop(x.spec.dag_hash(), None)
+
+    # Dump module index after potentially removing module tree
+    spack.modules.common.generate_module_index(
+        module_type_root, writers, overwrite=args.delete_tree, inputs=inputs)
+
+
+def _write_module_file(writer):
+    try:
+        writer.write(overwrite=True)
+    except Exception as e:
+        tty.debug(e)
+        msg = 'Could not write module file [{0}]'
+        tty.warn(msg.format(writer.layout.filename))
+        tty.warn('\t--> {0} <--'.format(str(e)))
+        return False
+    return True
+
+
+def _write_module_file_task(index):
+    writers = spack.subprocess_context.worker_state['writers']
+    return _write_module_file(writers[index])
+
+
+def _write_module_files(writers, jobs):
+    """Write module files in a pool of up to ``jobs`` processes, and return
+    whether each of them was written.
+    """
+    jobs = min(jobs, len(writers))
+
+    if jobs > 1 and spack.subprocess_context.can_fork_workers():
+        tty.debug('Writing {0} module files with {1} processes'
+                  .format(len(writers), jobs))
+        with spack.subprocess_context.workers(jobs, writers=writers) as pool:
+            return pool.map(_write_module_file_task, range(len(writers)))
+
+    return [_write_module_file(x) for x in writers]
 
 
 #: Dictionary populated with the list of sub-commands.
@@ -7,10 +7,13 @@
 system and configuring Spack to use multiple compilers.
 """
 import collections
+import hashlib
+import inspect
 import itertools
 import multiprocessing.pool
 import os
 import six
+import time
 from typing import Dict  # novm
 
 import llnl.util.lang
@@ -214,11 +217,7 @@ def find_compilers(path_hints=None):
         arguments.extend(arguments_to_detect_version_fn(o, search_paths))
 
     # Here we map the function arguments to the corresponding calls
-    tp = multiprocessing.pool.ThreadPool()
-    try:
-        detected_versions = tp.map(detect_version, arguments)
-    finally:
-        tp.close()
+    detected_versions = _detect_versions(arguments)
 
     def valid_version(item):
         value, error = item
@@ -639,6 +638,131 @@ def _default(fn_args):
     return fn(detect_version_args)
 
 
+#: Entry of the misc cache storing the versions of the compilers found by
+#: previous detections
+_detection_cache_entry = os.path.join('compilers', 'detected.json')
+
+#: Seconds for which failed detections are cached, so that transient
+#: failures, e.g. timeouts, don't stick
+_failed_detection_ttl = 600
+
+
+@llnl.util.lang.memoized
+def _compiler_fingerprint(compiler_name):
+    """Hash of the files defining how the version of a compiler is detected,
+    or None if they can't be read."""
+    sha = hashlib.sha1()
+    try:
+        for cls in (class_for_compiler_name(compiler_name),
+                    spack.compiler.Compiler):
+            with open(inspect.getfile(cls), 'rb') as f:
+                sha.update(f.read())
+    except (IOError, OSError, TypeError):
+        return None
+    return sha.hexdigest()
+
+
+def _detection_key(detect_version_args):
+    """Returns the key of the detection of a compiler version in the cache,
+    and the state of the inputs of that detection: the real path, inode,
+    modification time and size of the executable, and the compiler class.
+
+    The path of the candidate is part of the key, rather than only its real
+    path, since some executables behave differently depending on the name
+    they're called with. Returns None if the detection can't be cached.
+    """
+    compiler_id = detect_version_args.id
+
+    # Operating systems with their own way of detecting versions, e.g.
+    # from modules, don't necessarily run the executable
+    if hasattr(compiler_id.os, 'detect_version'):
+        return None
+
+    fingerprint = _compiler_fingerprint(compiler_id.compiler_name)
+    try:
+        realpath = os.path.realpath(detect_version_args.path)
+        stat = os.stat(realpath)
+    except OSError:
+        return None
+    if not fingerprint:
+        return None
+
+    key = '{0}:{1}:{2}:{3}'.format(
+        compiler_id.os, compiler_id.compiler_name,
+        detect_version_args.language, detect_version_args.path)
+    return key, {
+        'realpath': realpath,
+        'inode': stat.st_ino,
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'compiler': fingerprint,
+    }
+
+
+def _read_detection_cache():
+    import spack.caches  # avoid circular import
+    return spack.caches.read_misc_cache_json(_detection_cache_entry)
+
+
+def _write_detection_cache(detected):
+    import spack.caches  # avoid circular import
+    spack.caches.update_misc_cache_json(_detection_cache_entry, detected)
+
+
+def _detect_versions(arguments):
+    """Calls ``detect_version`` on each item of arguments, and returns the
+    results in the same order.
+
+    The results of previous detections are reused, from the misc cache, for
+    the executables that didn't change since, so that detecting the same
+    compilers again costs one ``stat`` per candidate executable. Failed
+    detections are only reused for ``_failed_detection_ttl`` seconds.
+    """
+    cached = _read_detection_cache()
+    keys = [_detection_key(x) for x in arguments]
+    now = time.time()
+
+    detected_versions = [None] * len(arguments)
+    to_detect = []
+    for i, (args, key) in enumerate(zip(arguments, keys)):
+        entry = cached.get(key[0]) if key else None
+        if entry and all(entry.get(k) == v for k, v in key[1].items()):
+            version = entry.get('version')
+            if version:
+                value = args._replace(id=args.id._replace(version=version))
+                detected_versions[i] = (value, None)
+                continue
+            elif now - entry.get('time', 0) < _failed_detection_ttl:
+                detected_versions[i] = (None, entry.get('error'))
+                continue
+        to_detect.append(i)
+
+    tty.debug('Detecting the version of {0} compiler candidates, {1} are '
+              'cached'.format(len(arguments), len(arguments) - len(to_detect)))
+    if not to_detect:
+        return detected_versions
+
+    tp = multiprocessing.pool.ThreadPool()
+    try:
+        detected = tp.map(detect_version, [arguments[i] for i in to_detect])
+    finally:
+        tp.close()
+
+    updated = {}
+    for i, (value, error) in zip(to_detect, detected):
+        detected_versions[i] = (value, error)
+        version = value.id.version if value else None
+        if keys[i] and (version is None or
+                        isinstance(version, six.string_types)):
+            entry = dict(keys[i][1])
+            entry.update(version=version, error=error, time=now)
+            updated[keys[i][0]] = entry
+
+    if updated:
+        _write_detection_cache(updated)
+    return detected_versions
+
+
 def make_compiler_list(detected_versions):
     """Process a list of detected versions and turn them into a list of
     compiler specs.
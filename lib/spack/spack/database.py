@@ -22,6 +22,7 @@
 
 import contextlib
 import datetime
+import json
 import os
 import six
 import socket
@@ -29,6 +30,11 @@
 import time
 from typing import Dict  # novm
 
+if sys.version_info >= (3, 5):
+    from collections.abc import MutableMapping  # novm
+else:
+    from collections import MutableMapping
+
 try:
     import uuid
     _use_uuid = True
@@ -92,6 +98,10 @@ def nullcontext(*args, **kwargs):
 # ensure a failed install is properly tracked).
 _pkg_lock_timeout = None
 
+# Number of entries the database journal can grow to before the next write
+# compacts it back into the index file
+_db_journal_max_entries = 1000
+
 # Types of dependencies tracked by the database
 _tracked_deps = ('link', 'run')
 
@@ -179,6 +189,9 @@ class InstallRecord(object):
         installation_time (time, optional): time of the installation
     """
 
+    __slots__ = ('spec', 'path', 'installed', 'ref_count', 'explicit',
+                 'installation_time', 'deprecated_for', 'in_buildcache')
+
     def __init__(
             self,
             spec,
@@ -236,6 +249,187 @@ def from_dict(cls, spec, dictionary):
         return InstallRecord(spec, **d)
 
 
+class _InstallRecordMap(MutableMapping):
+    """Map from DAG hashes to install records, decoding records lazily.
+
+    Records read from a database file are stored in their JSON form and
+    turned into an ``InstallRecord`` by ``decode`` the first time they are
+    looked up. Checking whether a hash is in the map, or iterating over its
+    keys, never decodes anything.
+
+    A decoded spec is connected to its dependencies, but only to the
+    dependents that have been decoded already. Call ``decode_dependents``
+    before walking the dependents of a spec in the map.
+
+    The map also keeps secondary indexes of its records by package name,
+    compiler name, explicit flag and install status, so that queries can
+    be narrowed with ``select`` before looking at any record, and tracks
+    the hashes of the records that changed since they were last written.
+    Callers that modify a record in place must call ``modified`` afterwards.
+    """
+
+    def __init__(self, decode=None):
+        self._records = {}
+        # JSON records still to be decoded -> their (name, hash, deptypes)
+        self._dependencies = {}
+        # hash -> hashes of the JSON records that depend on it
+        self._dependents = {}
+        self._decode = decode
+
+        # hash -> (name, compiler, explicit, status) it is indexed under
+        self._indexed = {}
+        self._by_name = {}
+        self._by_compiler = {}
+        self._by_explicit = {}
+        self._by_status = {}
+
+        # hashes of the records added, changed or removed since last written
+        self._modified = set()
+
+    def add_encoded(self, key, record, dependencies):
+        """Add a JSON record, to be decoded when first accessed."""
+        self._records[key] = record
+        self._dependencies[key] = dependencies
+        for _, dhash, _ in dependencies:
+            self._dependents.setdefault(dhash, []).append(key)
+        self._update_index(key)
+
+    def decoded(self, key):
+        """Whether the record for ``key`` has been decoded already."""
+        return key not in self._dependencies
+
+    def decode_dependents(self, key):
+        """Decode all the records depending, directly or transitively, on
+        the spec with DAG hash ``key``."""
+        stack, seen = [key], set()
+        while stack:
+            for parent in self._dependents.get(stack.pop(), ()):
+                if parent not in seen and parent in self._records:
+                    seen.add(parent)
+                    self[parent]
+                    stack.append(parent)
+
+    def _index_values(self, key):
+        record = self._records[key]
+        if self.decoded(key):
+            spec = record.spec
+            name = spec.name
+            compiler = spec.compiler.name if spec.compiler else None
+            explicit = record.explicit
+            installed = record.installed
+            deprecated_for = record.deprecated_for
+        else:
+            name = next(iter(record['spec']))
+            compiler = record['spec'][name].get('compiler', {}).get('name')
+            explicit = record.get('explicit', False)
+            installed = record.get('installed', False)
+            deprecated_for = record.get('deprecated_for')
+
+        if installed:
+            status = InstallStatuses.INSTALLED
+        elif deprecated_for:
+            status = InstallStatuses.DEPRECATED
+        else:
+            status = InstallStatuses.MISSING
+
+        return name, compiler, bool(explicit), status
+
+    def _indexes(self):
+        return (self._by_name, self._by_compiler,
+                self._by_explicit, self._by_status)
+
+    def _remove_from_index(self, key):
+        values = self._indexed.pop(key, None)
+        if values is None:
+            return
+
+        for index, value in zip(self._indexes(), values):
+            index[value].discard(key)
+            if not index[value]:
+                del index[value]
+
+    def _update_index(self, key):
+        self._remove_from_index(key)
+        values = self._index_values(key)
+        for index, value in zip(self._indexes(), values):
+            index.setdefault(value, set()).add(key)
+        self._indexed[key] = values
+
+    def modified(self, key):
+        """Index and track the record for ``key`` again after it was
+        modified in place."""
+        self._update_index(key)
+        self._modified.add(key)
+
+    def pop_modified(self):
+        """Return the hashes of the records modified since the last call,
+        and stop tracking them."""
+        modified, self._modified = self._modified, set()
+        return modified
+
+    def select(self, names=None, compiler=None, explicit=any,
+               installed=any):
+        """Return the set of hashes of the records that match all the
+        given constraints, without decoding any record.
+
+        Args:
+            names (list): package names the record may have
+            compiler (str): name of the compiler used for the record
+            explicit (bool or any): value of the explicit flag
+            installed (bool or any, or InstallStatus or iterable of
+                InstallStatus): install status of the record, with the
+                same semantics as in ``Database.query``
+        """
+        def union(index, values):
+            return set().union(*(index.get(v, ()) for v in values))
+
+        selected = []
+        if names is not None:
+            selected.append(union(self._by_name, names))
+        if compiler is not None:
+            selected.append(self._by_compiler.get(compiler, set()))
+        if explicit is not any:
+            selected.append(self._by_explicit.get(bool(explicit), set()))
+        if installed is not any:
+            statuses = InstallStatuses.canonicalize(installed)
+            selected.append(union(self._by_status, statuses))
+
+        if not selected:
+            return set(self._records)
+
+        selected.sort(key=len)
+        return selected[0].intersection(*selected[1:])
+
+    def __getitem__(self, key):
+        record = self._records[key]
+        if not self.decoded(key):
+            record = self._decode(
+                self, key, record, self._dependencies[key])
+            self._records[key] = record
+            del self._dependencies[key]
+        return record
+
+    def __setitem__(self, key, record):
+        self._records[key] = record
+        self._dependencies.pop(key, None)
+        self.modified(key)
+
+    def __delitem__(self, key):
+        del self._records[key]
+        self._dependencies.pop(key, None)
+        self._remove_from_index(key)
+        self._modified.add(key)
+
+    def __contains__(self, key):
+        return key in self._records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+
 class ForbiddenLockError(SpackError):
     """Raised when an upstream DB attempts to acquire a lock"""
 
@@ -337,6 +531,7 @@ def __init__(self, root, db_dir=None, upstream_dbs=None,
 
         # Set up layout of database files within the db dir
         self._index_path = os.path.join(self._db_dir, 'index.json')
+        self._journal_path = os.path.join(self._db_dir, 'index.journal')
         self._verifier_path = os.path.join(self._db_dir, 'index_verifier')
         self._lock_path = os.path.join(self._db_dir, 'lock')
 
@@ -380,7 +575,7 @@ def __init__(self, root, db_dir=None, upstream_dbs=None,
             self.lock = lk.Lock(self._lock_path,
                                 default_timeout=self.db_lock_timeout,
                                 desc='database')
-        self._data = {}
+        self._data = _InstallRecordMap()
 
         self.upstream_dbs = list(upstream_dbs) if upstream_dbs else []
 
@@ -401,6 +596,17 @@ def __init__(self, root, db_dir=None, upstream_dbs=None,
 
         self._record_fields = record_fields
 
+        # In journal mode, writes append the records modified by a
+        # transaction to the journal instead of rewriting the whole index.
+        # Readers replay the journal on top of the index in any mode.
+        self.journal = bool(
+            spack.config.get('config:db_journal') and
+            enable_transaction_locking and not is_upstream)
+        self._journal_entries = 0
+
+        # If true, the next write compacts the journal into the index
+        self._compact_journal = False
+
     def write_transaction(self):
         """Get a write lock context manager for use in a `with` block."""
         return self._write_transaction_impl(
@@ -611,15 +817,25 @@ def prefix_write_lock(self, spec):
         else:
             prefix_lock.release_write()
 
-    def _write_to_file(self, stream):
+    def _write_to_file(self, stream, hashes=None):
         """Write out the database in JSON format to the stream passed
         as argument.
 
         This function does not do any locking or transactions.
+
+        Args:
+            stream: stream where the database is written
+            hashes (list): if given, write only the records with these
+                DAG hashes. The caller is responsible for including all
+                their dependencies.
         """
+        if hashes is None:
+            hashes = self._data.keys()
+
         # map from per-spec hash code to installation record.
-        installs = dict((k, v.to_dict(include_fields=self._record_fields))
-                        for k, v in self._data.items())
+        installs = dict(
+            (k, self._data[k].to_dict(include_fields=self._record_fields))
+            for k in hashes)
 
         # database includes installation list and version.
 
@@ -639,12 +855,13 @@ def _write_to_file(self, stream):
         except (TypeError, ValueError) as e:
             raise sjson.SpackJSONError("error writing JSON database:", str(e))
 
-    def _read_spec_from_dict(self, hash_key, installs):
-        """Recursively construct a spec from a hash in a YAML database.
+    def _read_spec_from_dict(self, hash_key, record):
+        """Construct a spec without dependencies from an install record in
+        a JSON database.
 
         Does not do any locking.
         """
-        spec_dict = installs[hash_key]['spec']
+        spec_dict = record['spec']
 
         # Install records don't include hash with spec, so we add it in here
         # to ensure it is read properly.
@@ -676,41 +893,57 @@ def query_by_spec_hash(self, hash_key, data=None):
                 return True, db._data[hash_key]
         return False, None
 
-    def _assign_dependencies(self, hash_key, installs, data):
+    def _assign_dependencies(self, spec, dependencies, data):
         # Add dependencies from other records in the install DB to
         # form a full spec.
-        spec = data[hash_key].spec
-        spec_dict = installs[hash_key]['spec']
-        if 'dependencies' in spec_dict[spec.name]:
-            yaml_deps = spec_dict[spec.name]['dependencies']
-            for dname, dhash, dtypes in spack.spec.Spec.read_yaml_dep_specs(
-                    yaml_deps):
-                # It is important that we always check upstream installations
-                # in the same order, and that we always check the local
-                # installation first: if a downstream Spack installs a package
-                # then dependents in that installation could be using it.
-                # If a hash is installed locally and upstream, there isn't
-                # enough information to determine which one a local package
-                # depends on, so the convention ensures that this isn't an
-                # issue.
-                upstream, record = self.query_by_spec_hash(dhash, data=data)
-                child = record.spec if record else None
-
-                if not child:
-                    msg = ("Missing dependency not in database: "
-                           "%s needs %s-%s" % (
-                               spec.cformat('{name}{/hash:7}'),
-                               dname, dhash[:7]))
-                    if self._fail_when_missing_deps:
-                        raise MissingDependenciesError(msg)
-                    tty.warn(msg)
-                    continue
+        for dname, dhash, dtypes in dependencies:
+            # It is important that we always check upstream installations
+            # in the same order, and that we always check the local
+            # installation first: if a downstream Spack installs a package
+            # then dependents in that installation could be using it.
+            # If a hash is installed locally and upstream, there isn't
+            # enough information to determine which one a local package
+            # depends on, so the convention ensures that this isn't an
+            # issue.
+            upstream, record = self.query_by_spec_hash(dhash, data=data)
+
+            # Missing dependencies are reported when the file is read
+            if record:
+                spec._add_dependency(record.spec, dtypes)
+
+    def _decode_record(self, data, hash_key, record, dependencies):
+        """Decode an install record read from a JSON database.
+
+        Called by ``data`` the first time ``hash_key`` is looked up. The
+        dependencies of the record are decoded first, so all the specs
+        decoded from one database share their nodes.
 
-                spec._add_dependency(child, dtypes)
+        Does not do any locking.
+        """
+        try:
+            spec = self._read_spec_from_dict(hash_key, record)
+            rec = InstallRecord.from_dict(spec, record)
+            self._assign_dependencies(spec, dependencies, data)
+        except CorruptDatabaseError:
+            raise
+        except Exception as e:
+            self._invalid_record(hash_key, e)
+
+        # Mark the spec concrete only after its dependencies are connected,
+        # otherwise its hashes would be cached prematurely.
+        spec._mark_root_concrete()
+        return rec
+
+    def _invalid_record(self, hash_key, error):
+        msg = ("Invalid record in Spack database: "
+               "hash: %s, cause: %s: %s")
+        msg %= (hash_key, type(error).__name__, str(error))
+        raise CorruptDatabaseError(msg, self._index_path)
 
     def _read_from_file(self, filename):
         """Fill database from file, do not maintain old data.
-        Translate the spec portions from node-dict form to spec form.
+        The spec portions are translated from node-dict form to spec form
+        lazily, when each record is first accessed.
 
         Does not do any locking.
         """
@@ -736,6 +969,8 @@ def check(cond, msg):
         check('version' in db, "no 'version' in JSON DB.")
 
         installs = db['installs']
+        if filename == self._index_path:
+            self._journal_entries = self._replay_journal(installs)
 
         # TODO: better version checking semantics.
         version = Version(db['version'])
@@ -757,52 +992,43 @@ def check(cond, msg):
                     for k, v in self._data.items()
                 )
 
-        def invalid_record(hash_key, error):
-            msg = ("Invalid record in Spack database: "
-                   "hash: %s, cause: %s: %s")
-            msg %= (hash_key, type(error).__name__, str(error))
-            raise CorruptDatabaseError(msg, self._index_path)
-
-        # Build up the database in three passes:
-        #
-        #   1. Read in all specs without dependencies.
-        #   2. Hook dependencies up among specs.
-        #   3. Mark all specs concrete.
-        #
-        # The database is built up so that ALL specs in it share nodes
-        # (i.e., its specs are a true Merkle DAG, unlike most specs.)
-
-        # Pass 1: Iterate through database and build specs w/o dependencies
-        data = {}
+        # Specs are not decoded here: records are kept in their JSON form
+        # and decoded the first time they are looked up (see
+        # ``_InstallRecordMap``). Reading the file only collects the
+        # dependency hashes of each record, which is enough to report
+        # missing dependencies and to find the dependents of a record
+        # without decoding the whole database.
+        dependencies = {}
         for hash_key, rec in installs.items():
             try:
-                # This constructs a spec DAG from the list of all installs
-                spec = self._read_spec_from_dict(hash_key, installs)
-
-                # Insert the brand new spec in the database.  Each
-                # spec has its own copies of its dependency specs.
-                # TODO: would a more immmutable spec implementation simplify
-                #       this?
-                data[hash_key] = InstallRecord.from_dict(spec, rec)
+                spec_dict = rec['spec']
+                node_dict = spec_dict[next(iter(spec_dict))]
+                dependencies[hash_key] = list(
+                    spack.spec.Spec.read_yaml_dep_specs(
+                        node_dict.get('dependencies', {})))
             except Exception as e:
-                invalid_record(hash_key, e)
+                self._invalid_record(hash_key, e)
+
+        for hash_key, deps in dependencies.items():
+            for dname, dhash, _ in deps:
+                if dhash in installs or any(
+                        dhash in db._data for db in self.upstream_dbs):
+                    continue
 
-        # Pass 2: Assign dependencies once all specs are created.
-        for hash_key in data:
+                name = next(iter(installs[hash_key]['spec']))
+                msg = ("Missing dependency not in database: "
+                       "%s/%s needs %s-%s" % (
+                           name, hash_key[:7], dname, dhash[:7]))
+                if self._fail_when_missing_deps:
+                    raise MissingDependenciesError(msg)
+                tty.warn(msg)
+
+        data = _InstallRecordMap(self._decode_record)
+        for hash_key, rec in installs.items():
             try:
-                self._assign_dependencies(hash_key, installs, data)
-            except MissingDependenciesError:
-                raise
+                data.add_encoded(hash_key, rec, dependencies[hash_key])
             except Exception as e:
-                invalid_record(hash_key, e)
-
-        # Pass 3: Mark all specs concrete.  Specs representing real
-        # installations must be explicitly marked.
-        # We do this *after* all dependencies are connected because if we
-        # do it *while* we're constructing specs,it causes hashes to be
-        # cached prematurely.
-        for hash_key, rec in data.items():
-            rec.spec._mark_root_concrete()
+                self._invalid_record(hash_key, e)
 
         self._data = data
 
@@ -821,9 +1047,13 @@ def _read_suppress_error():
             try:
                 if os.path.isfile(self._index_path):
                     self._read_from_file(self._index_path)
+                    # Records are decoded lazily: decode them all now, so
+                    # that corrupt ones are found before rebuilding
+                    for key in list(self._data):
+                        self._data[key]
             except CorruptDatabaseError as e:
                 self._error = e
-                self._data = {}
+                self._data = _InstallRecordMap()
 
         transaction = lk.WriteTransaction(
             self.lock, acquire=_read_suppress_error, release=self._write
@@ -837,6 +1067,9 @@ def _read_suppress_error():
                 )
                 self._error = None
 
+            # Rewrite the whole index, without a journal
+            self._compact_journal = True
+
             old_data = self._data
             try:
                 self._construct_from_directory_layout(
@@ -879,7 +1112,7 @@ def _construct_from_directory_layout(self, directory_layout, old_data):
         # instead, we would perpetuate errors over a reindex.
         with directory_layout.disable_upstream_check():
             # Initialize data in the reconstructed DB
-            self._data = {}
+            self._data = _InstallRecordMap()
 
             # Start inspecting the installed prefixes
             processed_specs = set()
@@ -972,12 +1205,36 @@ def _write(self, type, value, traceback):
         database *may* be left in an inconsistent state.  It will be consistent
         after the start of the next transaction, when it read from disk again.
 
+        In journal mode, only the records modified since the last write are
+        appended to the journal, until it grows beyond
+        ``_db_journal_max_entries`` entries or a compaction is requested.
+
         This routine does no locking.
         """
         # Do not write if exceptions were raised
         if type is not None:
             return
 
+        modified = self._data.pop_modified()
+        if (self.journal and not self._compact_journal and
+                os.path.isfile(self._index_path) and
+                self._journal_entries + len(modified) <=
+                _db_journal_max_entries):
+            if not modified:
+                return
+            self._append_to_journal(modified)
+        else:
+            self._write_index()
+
+        if _use_uuid:
+            with open(self._verifier_path, 'w') as f:
+                new_verifier = str(uuid.uuid4())
+                f.write(new_verifier)
+                self.last_seen_verifier = new_verifier
+
+    def _write_index(self):
+        """Rewrite the index file with the whole database, compacting the
+        journal into it."""
         temp_file = self._index_path + (
             '.%s.%s.temp' % (socket.getfqdn(), os.getpid()))
 
@@ -986,11 +1243,6 @@ def _write(self, type, value, traceback):
             with open(temp_file, 'w') as f:
                 self._write_to_file(f)
             os.rename(temp_file, self._index_path)
-            if _use_uuid:
-                with open(self._verifier_path, 'w') as f:
-                    new_verifier = str(uuid.uuid4())
-                    f.write(new_verifier)
-                    self.last_seen_verifier = new_verifier
         except BaseException as e:
             tty.debug(e)
             # Clean up temp file if something goes wrong.
@@ -998,6 +1250,101 @@ def _write(self, type, value, traceback):
                 os.remove(temp_file)
             raise
 
+        # The index now includes all the entries of the journal. Replaying
+        # an entry is idempotent, so the index is still correct if we fail
+        # before removing the journal.
+        if os.path.exists(self._journal_path):
+            os.remove(self._journal_path)
+        self._journal_entries = 0
+        self._compact_journal = False
+
+    def _append_to_journal(self, hashes):
+        """Append the records with the given hashes to the journal. Hashes
+        that are not in the database are journaled as removed."""
+        entries = []
+        for key in sorted(hashes):
+            record = None
+            if key in self._data:
+                record = self._data[key].to_dict(
+                    include_fields=self._record_fields)
+            entries.append(json.dumps({'hash': key, 'record': record}))
+
+        # Drop the incomplete last line a failed write may have left
+        # behind, so that it doesn't swallow the first new entry. Then
+        # write all the entries at once, so that a failed write can only
+        # leave an incomplete last line behind.
+        self._truncate_journal()
+        with open(self._journal_path, 'a') as f:
+            f.write(''.join(e + '\n' for e in entries))
+        self._journal_entries += len(entries)
+
+    def _truncate_journal(self):
+        """Truncate the journal after its last complete line."""
+        if not os.path.isfile(self._journal_path):
+            return
+
+        with open(self._journal_path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            if not end:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b'\n':
+                return
+
+            # Look for the last newline, reading backwards by blocks
+            pos = end
+            while pos > 0:
+                size = min(4096, pos)
+                pos -= size
+                f.seek(pos)
+                newline = f.read(size).rfind(b'\n')
+                if newline != -1:
+                    pos += newline + 1
+                    break
+
+            tty.debug('Removing incomplete entry at the end of database '
+                      'journal {0}'.format(self._journal_path))
+            f.truncate(pos)
+
+    def _replay_journal(self, installs):
+        """Apply the entries of the journal to the install records read
+        from the index file.
+
+        Returns:
+            (int) number of entries replayed
+        """
+        if not os.path.isfile(self._journal_path):
+            return 0
+
+        entries = 0
+        with open(self._journal_path, 'r') as f:
+            lines = f.readlines()
+
+        for i, line in enumerate(lines):
+            try:
+                entry = sjson.load(line)
+            except ValueError:
+                # Failed writes leave an incomplete last line behind,
+                # which the next write removes
+                if i == len(lines) - 1:
+                    tty.debug('Ignoring incomplete entry at the end of '
+                              'database journal {0}'.format(
+                                  self._journal_path))
+                else:
+                    tty.warn('Ignoring invalid entry at line {0} of '
+                             'database journal {1}'.format(
+                                 i + 1, self._journal_path))
+                continue
+
+            if entry['record'] is None:
+                installs.pop(entry['hash'], None)
+            else:
+                installs[entry['hash']] = entry['record']
+            entries += 1
+
+        return entries
+
     def _read(self):
         """Re-read Database from the data in the set location.
 
@@ -1116,6 +1463,7 @@ def _add(
                 new_spec._add_dependency(record.spec, dep.deptypes)
                 if not upstream:
                     record.ref_count += 1
+                    self._data.modified(dkey)
 
             # Mark concrete once everything is built, and preserve
             # the original hash of concrete specs.
@@ -1130,6 +1478,7 @@ def _add(
             self._data[key].installation_time = _now()
 
         self._data[key].explicit = explicit
+        self._data.modified(key)
 
     @_autospec
     def add(self, spec, directory_layout, explicit=False):
@@ -1170,6 +1519,7 @@ def _decrement_ref_count(self, spec):
 
         rec = self._data[key]
         rec.ref_count -= 1
+        self._data.modified(key)
 
         if rec.ref_count == 0 and not rec.installed:
             del self._data[key]
@@ -1184,6 +1534,7 @@ def _increment_ref_count(self, spec):
 
         rec = self._data[key]
         rec.ref_count += 1
+        self._data.modified(key)
 
     def _remove(self, spec):
         """Non-locking version of remove(); does real work."""
@@ -1192,6 +1543,7 @@ def _remove(self, spec):
 
         if rec.ref_count > 0:
             rec.installed = False
+            self._data.modified(key)
             return rec.spec
 
         del self._data[key]
@@ -1269,8 +1621,10 @@ def mark(self, spec, key, value):
             return self._mark(spec, key, value)
 
     def _mark(self, spec, key, value):
-        record = self._data[self._get_matching_spec_key(spec)]
+        spec_key = self._get_matching_spec_key(spec)
+        record = self._data[spec_key]
         setattr(record, key, value)
+        self._data.modified(spec_key)
 
     @_autospec
     def deprecate(self, spec, deprecator):
@@ -1287,6 +1641,11 @@ def installed_relatives(self, spec, direction='children', transitive=True,
 
         relatives = set()
         for spec in self.query(spec):
+            if direction == 'parents':
+                # Dependents are only connected once they are decoded
+                for db in [self] + self.upstream_dbs:
+                    db._data.decode_dependents(spec.dag_hash())
+
             if transitive:
                 to_add = spec.traverse(
                     direction=direction, root=False, deptype=deptype)
@@ -1352,9 +1711,9 @@ def _get_by_hash_local(self, dag_hash, default=None, installed=any):
 
         # check if hash is a prefix of some installed (or previously
         # installed) spec.
-        matches = [record.spec for h, record in self._data.items()
+        matches = [self._data[h].spec for h in self._data
                    if h.startswith(dag_hash) and
-                   record.install_type_matches(installed)]
+                   self._data[h].install_type_matches(installed)]
         if matches:
             return matches
 
@@ -1458,9 +1817,37 @@ def _query(
         start_date = start_date or datetime.datetime.min
         end_date = end_date or datetime.datetime.max
 
-        for key, rec in self._data.items():
-            if hashes is not None and rec.spec.dag_hash() not in hashes:
-                continue
+        if isinstance(query_spec, six.string_types):
+            query_spec = spack.spec.Spec(query_spec)
+
+        # Narrow the candidates through the indexes of the database before
+        # decoding any record and checking it against the query.
+        names, compiler = None, None
+        if isinstance(query_spec, spack.spec.Spec):
+            if query_spec.name and query_spec.virtual:
+                # Installed specs are never virtual, only their providers
+                # can satisfy a virtual query.
+                providers = spack.repo.path.provider_index.providers_for(
+                    query_spec.name)
+                names = set(p.name for p in providers)
+            elif query_spec.name:
+                names = [query_spec.name]
+
+            if query_spec.compiler and query_spec.compiler.name:
+                compiler = query_spec.compiler.name
+
+        candidates = self._data.select(
+            names=names, compiler=compiler,
+            explicit=explicit, installed=installed)
+        if hashes is not None:
+            candidates.intersection_update(hashes)
+
+        matches = None
+        if query_spec is not any:
+            matches = spack.spec.SpecMatcher(query_spec, strict=True)
+
+        for key in candidates:
+            rec = self._data[key]
 
             if not rec.install_type_matches(installed):
                 continue
@@ -1482,8 +1869,7 @@ def _query(
                 if not (start_date < inst_date < end_date):
                     continue
 
-            if (query_spec is any or
-                rec.spec.satisfies(query_spec, strict=True)):
+            if matches is None or matches(rec.spec):
                 results.append(rec.spec)
 
         return results
@@ -1579,6 +1965,8 @@ def update_explicit(self, spec, explicit):
                 status = 'explicit' if explicit else 'implicit'
                 tty.debug(message.format(status, s=spec))
                 rec.explicit = explicit
+                if rec.spec.dag_hash() in self._data:
+                    self._data.modified(rec.spec.dag_hash())
 
 
 class UpstreamDatabaseLockingError(SpackError):
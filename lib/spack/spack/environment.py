@@ -14,6 +14,7 @@
 from ordereddict_backport import OrderedDict
 
 import llnl.util.filesystem as fs
+import llnl.util.lang
 import llnl.util.tty as tty
 from llnl.util.tty.color import colorize
 
@@ -26,11 +27,12 @@
 import spack.spec
 import spack.store
 import spack.stage
+import spack.subprocess_context
 import spack.util.spack_json as sjson
 import spack.util.spack_yaml as syaml
 import spack.config
 import spack.user_environment as uenv
-from spack.filesystem_view import YamlFilesystemView
+from spack.filesystem_view import YamlFilesystemView, get_spec_from_file
 import spack.util.environment
 from spack.spec import Spec
 from spack.spec_list import SpecList, InvalidSpecConstraintError
@@ -88,6 +90,8 @@
 default_view_name = 'default'
 # Default behavior to link all packages into views (vs. only root packages)
 default_view_link = 'all'
+# Record of the specs linked in a view root, relative to the root
+view_manifest_path = os.path.join('.spack', 'view-manifest.json')
 
 
 def valid_env_name(name):
@@ -453,6 +457,16 @@ def _eval_conditional(string):
     return eval(string, valid_variables)
 
 
+@llnl.util.lang.memoized
+def _spec_matcher(spec_str):
+    return spack.spec.SpecMatcher(spec_str)
+
+
+def _spec_matchers(spec_strs):
+    """Matchers for the specs selected or excluded by a view."""
+    return [_spec_matcher(s) for s in spec_strs]
+
+
 class ViewDescriptor(object):
     def __init__(self, base_path, root, projections={}, select=[], exclude=[],
                  link=default_view_link):
@@ -464,10 +478,10 @@ def __init__(self, base_path, root, projections={}, select=[], exclude=[],
         self.link = link
 
     def select_fn(self, spec):
-        return any(spec.satisfies(s) for s in self.select)
+        return any(match(spec) for match in _spec_matchers(self.select))
 
     def exclude_fn(self, spec):
-        return not any(spec.satisfies(e) for e in self.exclude)
+        return not any(match(spec) for match in _spec_matchers(self.exclude))
 
     def __eq__(self, other):
         return all([self.root == other.root,
@@ -600,6 +614,75 @@ def specs_for_view(self, all_specs, roots):
                 specs_for_view.append(spec_copy)
         return specs_for_view
 
+    def _projections_list(self):
+        return [[k, v] for k, v in self.projections.items()]
+
+    def _write_manifest(self, view, root, specs):
+        """Record the specs linked in the view at root, and where their
+        metadata is, so that the view can be updated incrementally."""
+        linked = {}
+        for spec in specs:
+            spec_file = os.path.join(view.get_path_meta_folder(spec),
+                                     spack.store.layout.spec_file_name)
+            linked[spec.dag_hash()] = os.path.relpath(spec_file, root)
+
+        manifest = {
+            'projections': self._projections_list(),
+            'specs': linked
+        }
+        manifest_path = os.path.join(root, view_manifest_path)
+        fs.mkdirp(os.path.dirname(manifest_path))
+        with open(manifest_path, 'w') as f:
+            sjson.dump(manifest, f)
+
+    def _update_copy(self, old_root, new_root, specs):
+        """Create the view at new_root as a copy of the view at old_root,
+        then unlink the specs that are not in specs and link the ones that
+        were missing.
+
+        Returns the view at new_root, or None if the view at old_root can't
+        be reused, e.g. because it has other projections.
+        """
+        manifest_path = os.path.join(old_root, view_manifest_path)
+        try:
+            with open(manifest_path) as f:
+                manifest = sjson.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+        # Paths to the old root in the copy are replaced in place
+        if (manifest.get('projections') != self._projections_list() or
+                len(old_root) != len(new_root)):
+            return None
+
+        linked = manifest['specs']
+        new_specs = dict((s.dag_hash(), s) for s in specs)
+        to_add = [s for h, s in new_specs.items() if h not in linked]
+        to_keep = [s for h, s in new_specs.items() if h in linked]
+        tty.debug('Updating a copy of {0}: {1} specs to link, {2} to unlink'
+                  .format(old_root, len(to_add),
+                          len(set(linked) - set(new_specs))))
+
+        try:
+            _copy_view_root(old_root, new_root)
+            view = self.view(new=new_root)
+
+            to_remove = [
+                get_spec_from_file(os.path.join(new_root, spec_file))
+                for h, spec_file in linked.items() if h not in new_specs]
+            if to_remove:
+                view.remove_specs(*to_remove, with_dependents=False,
+                                  all_specs=set(to_remove + to_keep))
+            if to_add:
+                view.add_specs(*to_add, with_dependencies=False)
+        except Exception as e:
+            tty.debug('Cannot update a copy of {0}: {1}'.format(old_root, e))
+            if os.path.exists(new_root):
+                shutil.rmtree(new_root)
+            return None
+
+        return view
+
     def regenerate(self, all_specs, roots):
         specs_for_view = self.specs_for_view(all_specs, roots)
 
@@ -609,14 +692,16 @@ def regenerate(self, all_specs, roots):
             installed_specs_for_view = set(
                 s for s in specs_for_view if s in self and s.package.installed)
 
-            # To ensure there are no conflicts with packages being installed
-            # that cannot be resolved or have repos that have been removed
-            # we always regenerate the view from scratch.
-            # We will do this by hashing the view contents and putting the view
-            # in a directory by hash, and then having a symlink to the real
-            # view in the root. The real root for a view at /dirname/basename
-            # will be /dirname/._basename_<hash>.
-            # This allows for atomic swaps when we update the view
+            # The view is never modified in place: a new view is built in a
+            # directory named after the hash of its contents, and a symlink
+            # at the root is then swapped to it. The real root for a view at
+            # /dirname/basename will be /dirname/._basename_<hash>.
+            # This allows for atomic swaps when we update the view.
+            # The new view starts as a copy of the current one, from which
+            # only the specs that changed are unlinked or linked. It is built
+            # from scratch instead if there is no current view, or it can't
+            # be copied: it has other projections, no manifest, a root path of
+            # another length, or updating the copy fails, e.g. on conflicts.
 
             # cache the roots because the way we determine which is which does
             # not work while we are updating
@@ -630,10 +715,23 @@ def regenerate(self, all_specs, roots):
             # construct view at new_root
             tty.msg("Updating view at {0}".format(self.root))
 
-            view = self.view(new=new_root)
-            fs.mkdirp(new_root)
-            view.add_specs(*installed_specs_for_view,
-                           with_dependencies=False)
+            # A root left by an interrupted regeneration is started over
+            if os.path.exists(new_root):
+                shutil.rmtree(new_root)
+
+            # Start from a copy of the current view when possible, so that
+            # only the specs that changed are linked or unlinked
+            view = None
+            if old_root and os.path.isdir(old_root):
+                view = self._update_copy(
+                    old_root, new_root, installed_specs_for_view)
+
+            if view is None:
+                view = self.view(new=new_root)
+                fs.mkdirp(new_root)
+                view.add_specs(*installed_specs_for_view,
+                               with_dependencies=False)
+            self._write_manifest(view, new_root, installed_specs_for_view)
 
             # create symlink from tmpname to new_root
             root_dirname = os.path.dirname(self.root)
@@ -659,6 +757,31 @@ def regenerate(self, all_specs, roots):
                     tty.warn(msg)
 
 
+def _copy_view_root(src, dst):
+    """Copy the view root at src to dst, which has a path of the same
+    length. Symbolic links are copied as links, and the path of src in
+    regular files and in link targets is replaced by the path of dst.
+    """
+    old, new = src.encode('utf-8'), dst.encode('utf-8')
+    for dirpath, dirnames, filenames in os.walk(src):
+        target_dir = os.path.join(dst, os.path.relpath(dirpath, src))
+        fs.mkdirp(target_dir)
+        for name in dirnames + filenames:
+            source = os.path.join(dirpath, name)
+            target = os.path.join(target_dir, name)
+            if os.path.islink(source):
+                link = os.readlink(source)
+                if link.startswith(src + os.sep):
+                    link = dst + link[len(src):]
+                os.symlink(link, target)
+            elif name in filenames:
+                with open(source, 'rb') as f:
+                    data = f.read()
+                with open(target, 'wb') as f:
+                    f.write(data.replace(old, new))
+                shutil.copystat(source, target)
+
+
 class Environment(object):
     def __init__(self, path, init_file=None, with_view=None, keep_relative=False):
         """Create a new environment.
@@ -1271,13 +1394,19 @@ def _concretize_separately(self, tests=False):
                 self._add_concrete_spec(s, concrete, new=False)
 
         # Concretize any new user specs that we haven't concretized yet
+        new_user_specs = [
+            (uspec, uspec_constraints) for uspec, uspec_constraints in zip(
+                self.user_specs, self.user_specs.specs_as_constraints)
+            if uspec not in old_concretized_user_specs
+        ]
+        concrete_specs = _concretize_separately(
+            [uspec_constraints for _, uspec_constraints in new_user_specs],
+            tests=tests)
+
         concretized_specs = []
-        for uspec, uspec_constraints in zip(
-                self.user_specs, self.user_specs.specs_as_constraints):
-            if uspec not in old_concretized_user_specs:
-                concrete = _concretize_from_constraints(uspec_constraints, tests=tests)
-                self._add_concrete_spec(uspec, concrete)
-                concretized_specs.append((uspec, concrete))
+        for (uspec, _), concrete in zip(new_user_specs, concrete_specs):
+            self._add_concrete_spec(uspec, concrete)
+            concretized_specs.append((uspec, concrete))
         return concretized_specs
 
     def concretize_and_add(self, user_spec, concrete_spec=None, tests=False):
@@ -2054,6 +2183,54 @@ def _tree_to_display(spec):
         print('')
 
 
+def _concretize_separately(specs_constraints, tests=False):
+    """Concretize independently each of a list of specs, given as lists of
+    constraints.
+
+    Up to ``config:concretize_jobs`` specs are concretized at the same time
+    in a pool of processes. Each spec is concretized exactly as it would be
+    alone, so the results don't depend on the number of processes.
+
+    Returns:
+        The list of the concrete specs, in the same order
+    """
+    jobs = min(spack.config.get('config:concretize_jobs', 1),
+               len(specs_constraints))
+
+    concrete_specs = [None] * len(specs_constraints)
+    if jobs > 1 and spack.subprocess_context.can_fork_workers():
+        tty.debug('Concretizing {0} specs with {1} processes'
+                  .format(len(specs_constraints), jobs))
+        with spack.subprocess_context.workers(jobs) as pool:
+            concrete_specs = pool.map(
+                _concretize_task,
+                [(constraints, tests) for constraints in specs_constraints],
+                chunksize=1)
+
+    # Concretize here the specs that were not concretized by workers, which
+    # also raises the errors of the specs that failed to concretize
+    return [
+        concrete if concrete is not None
+        else _concretize_from_constraints(constraints, tests=tests)
+        for concrete, constraints in zip(concrete_specs, specs_constraints)
+    ]
+
+
+def _concretize_task(args):
+    """Concretize a spec from its constraints in a worker process.
+
+    Errors can't be reliably passed back to the parent process, so ``None``
+    is returned instead, and the spec is concretized again by the parent.
+    """
+    spec_constraints, tests = args
+    try:
+        return _concretize_from_constraints(spec_constraints, tests=tests)
+    except Exception as e:
+        tty.debug('Failed to concretize {0} in a worker: {1}'
+                  .format(spec_constraints, str(e)))
+        return None
+
+
 def _concretize_from_constraints(spec_constraints, tests=False):
     # Accept only valid constraints from list and concretize spec
     # Get the named spec even if out of order
@@ -62,6 +62,19 @@ def warn_content_type_mismatch(subject, content_type='HTML'):
         subject=subject, content_type=content_type))
 
 
+def _resume_refused(returncode, headers):
+    """Whether curl could not resume a download from the data already in
+    the output file, given its return code and the HTTP headers it printed.
+    """
+    # 33: byte ranges unsupported, 36: bad resume offset
+    if returncode in (33, 36):
+        return True
+
+    # 416: requested range not satisfiable
+    statuses = re.findall(r'^HTTP/\S+\s+(\d+)', headers, flags=re.MULTILINE)
+    return bool(statuses) and statuses[-1] == '416'
+
+
 def _needs_stage(fun):
     """Many methods on fetch strategies require a stage to be set
        using set_stage().  This decorator adds a check for self.stage."""
@@ -345,7 +358,16 @@ def _fetch_from_url(self, url):
         if self.stage.save_filename:
             save_file = self.stage.save_filename
             partial_file = self.stage.save_filename + '.part'
-        tty.msg('Fetching {0}'.format(url))
+
+        # The data left by an interrupted download is kept in the partial
+        # file, and the download resumes from there
+        resumed = bool(partial_file and os.path.isfile(partial_file) and
+                       os.path.getsize(partial_file))
+        if resumed:
+            tty.msg('Resuming download of {0} after {1} bytes'.format(
+                url, os.path.getsize(partial_file)))
+        else:
+            tty.msg('Fetching {0}'.format(url))
         if partial_file:
             save_args = ['-C',
                          '-',  # continue partial downloads
@@ -397,7 +419,20 @@ def _fetch_from_url(self, url):
             if self.archive_file:
                 os.remove(self.archive_file)
 
-            if partial_file and os.path.exists(partial_file):
+            if resumed and _resume_refused(curl.returncode, headers):
+                # The server may have no data left to send
+                if (self.digest and
+                        crypto.Checker(self.digest).check(partial_file)):
+                    return partial_file, save_file
+
+                # The partial file doesn't match the data on the server
+                tty.debug('Cannot resume the download of {0}'.format(url))
+                os.remove(partial_file)
+                return self._fetch_from_url(url)
+
+            # Keep what was downloaded, unless there is nothing to resume
+            if (partial_file and os.path.exists(partial_file) and
+                    not os.path.getsize(partial_file)):
                 os.remove(partial_file)
 
             if curl.returncode == 22:
@@ -430,8 +465,24 @@ def _fetch_from_url(self, url):
                                    flags=re.IGNORECASE)
         if content_types and 'text/html' in content_types[-1]:
             warn_content_type_mismatch(self.archive_file or "the archive")
+
+        # The data downloaded before may not be from the same file, so a
+        # resumed download that doesn't match its checksum starts over
+        if resumed and not self._complete_download(partial_file):
+            tty.debug('Discarding the resumed download of {0}, which does '
+                      'not match its checksum'.format(url))
+            os.remove(partial_file)
+            return self._fetch_from_url(url)
+
         return partial_file, save_file
 
+    def _complete_download(self, path):
+        """Whether a downloaded file matches the checksum of this fetcher,
+        if it is to be checked."""
+        if not self.digest or not spack.config.get('config:checksum'):
+            return True
+        return crypto.Checker(self.digest).check(path)
+
     @property  # type: ignore # decorated properties unsupported in mypy
     @_needs_stage
     def archive_file(self):
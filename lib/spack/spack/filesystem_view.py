@@ -10,7 +10,7 @@
 import sys
 from ordereddict_backport import OrderedDict
 
-from llnl.util.link_tree import LinkTree, MergeConflictError
+from llnl.util.link_tree import LinkTree, MergeConflictError, scan_trees
 from llnl.util import tty
 from llnl.util.lang import match_predicate, index_by
 from llnl.util.tty.color import colorize
@@ -43,6 +43,19 @@
 _projections_path = '.spack/projections.yaml'
 
 
+def _default_view_hooks(pkg):
+    """Returns whether the package adds its files to views with the default
+    ``view_file_conflicts`` and ``add_files_to_view`` hooks."""
+    import spack.package  # avoid circular import
+    for name in ('view_file_conflicts', 'add_files_to_view'):
+        method = getattr(type(pkg), name)
+        default = getattr(spack.package.PackageBase, name)
+        if (getattr(method, '__func__', method) is not
+                getattr(default, '__func__', default)):
+            return False
+    return True
+
+
 def view_symlink(src, dst, **kwargs):
     # keyword arguments are irrelevant
     # here to fit required call signature
@@ -247,6 +260,9 @@ class YamlFilesystemView(FilesystemView):
     def __init__(self, root, layout, **kwargs):
         super(YamlFilesystemView, self).__init__(root, layout, **kwargs)
 
+        # Link trees of the specs being added, scanned in advance
+        self._link_trees = {}
+
         # Super class gets projections from the kwargs
         # YAML specific to get projections from YAML file
         self.projections_path = os.path.join(self._root, _projections_path)
@@ -305,9 +321,28 @@ def add_specs(self, *specs, **kwargs):
         standalones = specs - extensions
 
         set(map(self._check_no_ext_conflicts, extensions))
-        # fail on first error, otherwise link extensions as well
-        if all(map(self.add_standalone, standalones)):
-            all(map(self.add_extension, extensions))
+
+        # scan the prefixes of all the packages together, rather than one
+        # after the other while linking them
+        self._link_trees = self._scan_link_trees(standalones)
+        try:
+            # fail on first error, otherwise link extensions as well
+            if all(map(self.add_standalone, standalones)):
+                all(map(self.add_extension, extensions))
+        finally:
+            self._link_trees = {}
+
+    def _scan_link_trees(self, specs):
+        trees = {}
+        for spec in specs:
+            if spec.external:
+                continue
+            view_source = spec.package.view_source()
+            if os.path.isdir(view_source):
+                trees[view_source] = LinkTree(view_source)
+
+        scan_trees(trees.values())
+        return trees
 
     def add_extension(self, spec):
         if not spec.package.is_extension:
@@ -373,12 +408,20 @@ def merge(self, spec, ignore=None):
         view_source = pkg.view_source()
         view_dst = pkg.view_destination(self)
 
-        tree = LinkTree(view_source)
+        tree = self._link_trees.get(view_source) or LinkTree(view_source)
 
         ignore = ignore or (lambda f: False)
         ignore_file = match_predicate(
             self.layout.hidden_file_paths, ignore)
 
+        # The default hooks skip the files already in the view, which the
+        # tree does with a single listing of the view, linking in threads
+        if _default_view_hooks(pkg):
+            tree.merge_skip_existing(
+                view_dst, ignore_conflicts=self.ignore_conflicts,
+                ignore=ignore_file, link=ft.partial(self.link, spec=spec))
+            return
+
         # check for dir conflicts
         conflicts = tree.find_dir_conflicts(view_dst, ignore_file)
 
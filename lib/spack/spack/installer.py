@@ -28,9 +28,11 @@
 """
 
 import copy
+import functools
 import glob
 import heapq
 import itertools
+import multiprocessing
 import os
 import shutil
 import six
@@ -39,11 +41,17 @@
 
 from collections import defaultdict
 
+try:
+    from multiprocessing.connection import wait as _wait_for_processes
+except ImportError:  # Python 2
+    _wait_for_processes = None
+
 import llnl.util.filesystem as fs
 import llnl.util.lock as lk
 import llnl.util.tty as tty
 import spack.binary_distribution as binary_distribution
 import spack.compilers
+import spack.config
 import spack.error
 import spack.hooks
 import spack.monitor
@@ -51,6 +59,8 @@
 import spack.package_prefs as prefs
 import spack.repo
 import spack.store
+import spack.subprocess_context
+import spack.util.spack_json as sjson
 
 from llnl.util.tty.color import colorize
 from llnl.util.tty.log import log_output
@@ -63,6 +73,14 @@
 #: were added (see https://docs.python.org/2/library/heapq.html).
 _counter = itertools.count(0)
 
+#: Name of the file in the install metadata directory recording how long
+#: the package took to install, to estimate the duration of later builds.
+_install_times_file = 'install_times.json'
+
+#: Maximum number of past installs of a package whose durations are read to
+#: estimate the duration of a build.
+_max_build_time_samples = 5
+
 #: Build status indicating task has been added.
 STATUS_ADDED = 'queued'
 
@@ -84,6 +102,72 @@
 STATUS_REMOVED = 'removed'
 
 
+def _install_times_path(spec):
+    """Return the path to the file recording the install times of a spec."""
+    return os.path.join(spack.store.layout.metadata_path(spec),
+                        _install_times_file)
+
+
+def _write_install_times(pkg):
+    """
+    Record how long the package took to fetch and install in its install
+    metadata directory.
+
+    Args:
+        pkg (PackageBase): the package that was just installed
+    """
+    try:
+        with open(_install_times_path(pkg.spec), 'w') as f:
+            sjson.dump({'fetch': pkg._fetch_time,
+                        'total': pkg._total_time}, f)
+    except (IOError, OSError) as e:
+        tty.debug('Cannot record the install times of {0}: {1}'
+                  .format(pkg.name, str(e)))
+
+
+def _read_build_time(spec):
+    """
+    Return how long an installed spec took to build, in seconds, or
+    ``None`` if it is unknown.
+
+    Args:
+        spec (Spec): an installed spec
+    """
+    try:
+        with open(_install_times_path(spec)) as f:
+            times = sjson.load(f)
+        return max(0., times['total'] - times.get('fetch', 0.))
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _estimate_build_times(names):
+    """
+    Estimate how long packages take to build from the durations recorded
+    by past installs of packages with the same names.
+
+    Args:
+        names (set of str): names of the packages to build
+
+    Return:
+        (dict) mapping the names of the packages with recorded durations to
+            their mean build time, in seconds
+    """
+    estimates = {}
+    with spack.store.db.read_transaction():
+        for name in names:
+            times = []
+            for spec in spack.store.db.query_local(name):
+                build_time = _read_build_time(spec)
+                if build_time is not None:
+                    times.append(build_time)
+                    if len(times) == _max_build_time_samples:
+                        break
+            if times:
+                estimates[name] = sum(times) / len(times)
+    return estimates
+
+
 def _check_last_phase(pkg):
     """
     Ensures the specified package has a valid last phase before proceeding
@@ -288,6 +372,28 @@ def _install_from_cache(pkg, cache_only, explicit, unsigned=False,
     return True
 
 
+def _fetch_sources(index):
+    """Fetch and check the sources of a package ahead of its build, in a
+    worker process of a ``FetchPool``.
+
+    Errors are only reported in debug mode: the build fetches the sources
+    again, and fails the usual way if they still can't be fetched.
+
+    Args:
+        index (int): index of the package in the packages of the pool
+    """
+    state = spack.subprocess_context.worker_state
+    if state['stop'].is_set():
+        return
+
+    pkg = state['pkgs'][index]
+    try:
+        pkg.do_fetch()
+    except Exception as exc:
+        tty.debug('Failed to fetch {0} ahead of its build: {1}'
+                  .format(package_id(pkg), str(exc)))
+
+
 def _print_installed_pkg(message):
     """
     Output a message with a package icon.
@@ -666,6 +772,31 @@ def __init__(self, installs=[]):
         # fast then that option applies to all build requests.
         self.fail_fast = False
 
+        # Maximum number of packages built at the same time, each in its own
+        # build process. The largest number asked for by a request applies.
+        self.concurrent_packages = max(
+            [request.install_args['concurrent_packages']
+             for request in self.build_requests] or [1])
+
+        # Packages being built in the background, keyed on the package's
+        # unique id, with their build task and process
+        self.building = {}
+
+        # Packages whose sources are fetched ahead of their build, keyed on
+        # the package's unique id, with their build task and their position
+        # in the packages of the fetch pool. Entries move to
+        # ``prefetched_builds`` once the package starts building.
+        self.prefetching = {}
+        self.prefetched_builds = {}
+        self._fetch_pool = None
+
+        # Explicit package ids and errors of failed installs, to summarize
+        # once done
+        self._fail_fast_err = 'Terminating after first install failure'
+        self._single_explicit_spec = len(self.build_requests) == 1
+        self._failed_explicits = []
+        self._exists_errors = []
+
     def __repr__(self):
         """Returns a formal representation of the package installer."""
         rep = '{0}('.format(self.__class__.__name__)
@@ -802,6 +933,9 @@ def _prepare_for_install(self, task):
         keep_stage = install_args.get('keep_stage')
         restage = install_args.get('restage')
 
+        # The stage must not change under the fetch of the sources
+        self._wait_for_prefetch(task.pkg_id)
+
         # Make sure the package is ready to be locally installed.
         self._ensure_install_ready(task.pkg)
 
@@ -1100,13 +1234,21 @@ def _add_tasks(self, request, all_deps):
         fail_fast = request.install_args.get('fail_fast')
         self.fail_fast = self.fail_fast or fail_fast
 
-    def _install_task(self, task):
+    def _install_task(self, task, background=False):
         """
         Perform the installation of the requested spec and/or dependency
         represented by the build task.
 
         Args:
-            task (BuildTask): the installation build task for a package"""
+            task (BuildTask): the installation build task for a package
+            background (bool): if True, return as soon as the build process
+                of the package is started
+
+        Return:
+            (BuildProcess or None) the build process of the package if it
+                is building in the background, otherwise ``None``; see
+                ``_complete_background_task()``
+        """
 
         install_args = task.request.install_args
         cache_only = install_args.get('cache_only')
@@ -1139,32 +1281,77 @@ def _install_task(self, task):
         if not pkg.unit_test_check():
             return
 
+        # The stage of the package now belongs to its build
+        if pkg_id in self.prefetching:
+            self.prefetched_builds[pkg_id] = self.prefetching.pop(pkg_id)[0]
+
         try:
             self._setup_install_dir(pkg)
 
+            if background:
+                # Share the build jobs among the packages built at once
+                jobs = spack.build_environment.determine_number_of_jobs(
+                    parallel=True)
+                kwargs = dict(install_args, make_jobs=max(
+                    1, jobs // self.concurrent_packages))
+                return spack.build_environment.start_build_process(
+                    pkg, build_process, kwargs, wait=False)
+
             # Create a child process to do the actual installation.
             # Preserve verbosity settings across installs.
             spack.package.PackageBase._verbose = (
                 spack.build_environment.start_build_process(
                     pkg, build_process, install_args)
             )
+            self._add_to_db(task)
+        except spack.build_environment.StopPhase as e:
+            self._handle_stop_phase(pkg, e)
 
-            # Note: PARENT of the build process adds the new package to
-            # the database, so that we don't need to re-read from file.
-            spack.store.db.add(pkg.spec, spack.store.layout,
-                               explicit=explicit)
+    def _complete_background_task(self, task, process):
+        """
+        Wait for the build process of a package built in the background and
+        complete its installation.
 
-            # If a compiler, ensure it is added to the configuration
-            if task.compiler:
-                spack.compilers.add_compilers_to_config(
-                    spack.compilers.find_compilers([pkg.spec.prefix]))
+        Args:
+            task (BuildTask): the installation build task for a package
+            process (BuildProcess): the build process of the package
+        """
+        try:
+            spack.package.PackageBase._verbose = process.complete()
+            self._add_to_db(task)
         except spack.build_environment.StopPhase as e:
-            # A StopPhase exception means that do_install was asked to
-            # stop early from clients, and is not an error at this point
-            pid = '{0}: '.format(pkg.pid) if tty.show_pid() else ''
-            tty.debug('{0}{1}'.format(pid, str(e)))
-            tty.debug('Package stage directory: {0}'
-                      .format(pkg.stage.source_path))
+            self._handle_stop_phase(task.pkg, e)
+
+    def _add_to_db(self, task):
+        """
+        Add the package built for the task to the database.
+
+        Args:
+            task (BuildTask): the installation build task for a package
+        """
+        # Note: PARENT of the build process adds the new package to
+        # the database, so that we don't need to re-read from file.
+        spack.store.db.add(task.pkg.spec, spack.store.layout,
+                           explicit=task.explicit)
+
+        # If a compiler, ensure it is added to the configuration
+        if task.compiler:
+            spack.compilers.add_compilers_to_config(
+                spack.compilers.find_compilers([task.pkg.spec.prefix]))
+
+    def _handle_stop_phase(self, pkg, exc):
+        """
+        A StopPhase exception means that do_install was asked to stop early
+        from clients, and is not an error at this point.
+
+        Args:
+            pkg (PackageBase): the package being installed
+            exc (StopPhase): the exception raised by the build process
+        """
+        pid = '{0}: '.format(pkg.pid) if tty.show_pid() else ''
+        tty.debug('{0}{1}'.format(pid, str(exc)))
+        tty.debug('Package stage directory: {0}'
+                  .format(pkg.stage.source_path))
 
     def _next_is_pri0(self):
         """
@@ -1281,6 +1468,9 @@ def _requeue_task(self, task):
 
         new_task = task.next_attempt(self.installed)
         new_task.status = STATUS_INSTALLING
+
+        # Let the other tasks ready to install go first
+        new_task.critical_path = 0.
         self._push_task(new_task)
 
     def _setup_install_dir(self, pkg):
@@ -1412,28 +1602,366 @@ def _init_queue(self):
                 for dependent_id in dependents.difference(task.dependents):
                     task.add_dependent(dependent_id)
 
-    def install(self):
+        self._prioritize_tasks()
+
+    def _prioritize_tasks(self):
         """
-        Install the requested package(s) and or associated dependencies.
+        Compute the critical path of each build task from the estimated
+        build times of the packages, and reorder the build queue to start
+        the tasks with the longest critical paths first.
+
+        Packages without a recorded build time are assumed to take as long
+        as the average package with one, so the critical path falls back to
+        the longest chain of dependents when no build time is known.
+        """
+        tasks = self.build_tasks
+        if not tasks:
+            return
+
+        try:
+            estimates = _estimate_build_times(
+                set(task.pkg.name for task in tasks.values()))
+        except spack.error.SpackError as e:
+            tty.debug('Cannot estimate build times: {0}'.format(str(e)))
+            estimates = {}
+        default = (sum(estimates.values()) / len(estimates)
+                   if estimates else 1.)
+
+        # Compute the paths from the roots down, i.e., dependents first
+        paths = {}
+        for pkg_id in tasks:
+            stack = [pkg_id]
+            while stack:
+                current = stack[-1]
+                if current in paths:
+                    stack.pop()
+                    continue
+                dependents = [dep_id for dep_id in tasks[current].dependents
+                              if dep_id in tasks]
+                pending = [dep_id for dep_id in dependents
+                           if dep_id not in paths]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                task = tasks[current]
+                paths[current] = estimates.get(task.pkg.name, default) + max(
+                    [paths[dep_id] for dep_id in dependents] or [0.])
+                task.critical_path = paths[current]
+
+        self.build_pq = [(task.key, task) for task in tasks.values()]
+        heapq.heapify(self.build_pq)
+
+    def _overwrite_install_task(self, task):
+        """
+        Install the package of the build task in place of its existing
+        installation, if any.
 
         Args:
-            pkg (Package): the package to be built and installed"""
+            task (BuildTask): the installation build task for a package
+        """
+        rec, _ = self._check_db(task.pkg.spec)
+        if rec and rec.installed:
+            if rec.installation_time < task.request.overwrite_time:
+                # If it's actually overwriting, do a fs transaction
+                if os.path.exists(rec.path):
+                    with fs.replace_directory_transaction(rec.path):
+                        self._install_task(task)
+                else:
+                    tty.debug("Missing installation to overwrite")
+                    self._install_task(task)
+        else:
+            # overwriting nothing
+            self._install_task(task)
 
-        self._init_queue()
-        fail_fast_err = 'Terminating after first install failure'
-        single_explicit_spec = len(self.build_requests) == 1
-        failed_explicits = []
-        exists_errors = []
+    def _run_install(self, task, install):
+        """
+        Install the package of the build task, handling installation errors
+        the way requested by the build requests.
+
+        Args:
+            task (BuildTask): the installation build task for a package
+            install (callable): function installing the package of the task,
+                which is passed as its only argument; it may return the
+                ``BuildProcess`` of a build started in the background
+        """
+        pkg, pkg_id = task.pkg, task.pkg_id
+        keep_prefix = task.request.install_args.get('keep_prefix')
+
+        try:
+            process = install(task)
+            if process is not None:
+                # The package is building in the background, see
+                # _wait_for_build()
+                self.building[task.pkg_id] = (task, process)
+                return
+
+            self._update_installed(task)
+
+            # If we installed then we should keep the prefix
+            stop_before_phase = getattr(pkg, 'stop_before_phase', None)
+            last_phase = getattr(pkg, 'last_phase', None)
+            keep_prefix = keep_prefix or \
+                (stop_before_phase is None and last_phase is None)
+
+        except spack.directory_layout.InstallDirectoryAlreadyExistsError \
+                as exc:
+            tty.debug('Install prefix for {0} exists, keeping {1} in '
+                      'place.'.format(pkg.name, pkg.prefix))
+            self._update_installed(task)
+
+            # Only terminate at this point if a single build request was
+            # made.
+            if task.explicit and self._single_explicit_spec:
+                spack.hooks.on_install_failure(task.request.pkg.spec)
+                raise
+
+            if task.explicit:
+                self._exists_errors.append((pkg_id, str(exc)))
+
+        except KeyboardInterrupt as exc:
+            # The build has been terminated with a Ctrl-C so terminate
+            # regardless of the number of remaining specs.
+            err = 'Failed to install {0} due to {1}: {2}'
+            tty.error(err.format(pkg.name, exc.__class__.__name__,
+                      str(exc)))
+            spack.hooks.on_install_failure(task.request.pkg.spec)
+            raise
+
+        except (Exception, SystemExit) as exc:
+            self._update_failed(task, True, exc)
+            spack.hooks.on_install_failure(task.request.pkg.spec)
+
+            # Best effort installs suppress the exception and mark the
+            # package as a failure.
+            if (not isinstance(exc, spack.error.SpackError) or
+                not exc.printed):
+                # SpackErrors can be printed by the build process or at
+                # lower levels -- skip printing if already printed.
+                # TODO: sort out this and SpackError.print_context()
+                tty.error('Failed to install {0} due to {1}: {2}'
+                          .format(pkg.name, exc.__class__.__name__,
+                                  str(exc)))
+            # Terminate if requested to do so on the first failure.
+            if self.fail_fast:
+                raise InstallError('{0}: {1}'
+                                   .format(self._fail_fast_err, str(exc)))
+
+            # Terminate at this point if the single explicit spec has
+            # failed to install.
+            if self._single_explicit_spec and task.explicit:
+                raise
+
+            # Track explicit spec id and error to summarize when done
+            if task.explicit:
+                self._failed_explicits.append((pkg_id, str(exc)))
+
+        finally:
+            if pkg_id not in self.building:
+                # Remove the install prefix if anything went wrong during
+                # install.
+                if not keep_prefix:
+                    pkg.remove_prefix()
+
+                # The subprocess *may* have removed the build stage. Mark it
+                # not created so that the next time pkg.stage is invoked, we
+                # check the filesystem for it.
+                pkg.stage.created = False
+
+        # Perform basic task cleanup for the installed spec to
+        # include downgrading the write to a read lock
+        self._cleanup_task(pkg)
+
+    def _can_prefetch(self, task):
+        """
+        Return True if the sources of the package of the build task can be
+        fetched ahead of its build, without asking the user anything.
+
+        Args:
+            task (BuildTask): the installation build task for a package
+        """
+        install_args = task.request.install_args
+        if any(install_args.get(arg)
+               for arg in ('cache_only', 'fake', 'restage')):
+            return False
+
+        pkg = task.pkg
+        if not pkg.has_code or pkg.manual_download:
+            return False
+
+        if pkg.spec.external or pkg.installed_upstream or pkg.installed:
+            return False
+
+        if not pkg.stage.managed_by_spack:
+            return False
+
+        # Fetches that would ask for confirmation are left to the build
+        if (spack.config.get('config:checksum') and
+                pkg.version not in pkg.versions):
+            return False
+
+        if not (spack.config.get('config:deprecated') or
+                not pkg.versions.get(pkg.version, {}).get('deprecated')):
+            return False
+
+        # Packages with a binary in a mirror are likely installed from it,
+        # which only the build can tell: don't fetch (or lock) them early
+        if install_args.get('use_cache', True):
+            matches = binary_distribution.get_mirrors_for_spec(
+                pkg.spec, full_hash_match=install_args.get('full_hash_match'),
+                index_only=True)
+            if matches:
+                return False
+
+        return True
+
+    def _write_locked(self, pkg):
+        """
+        Return True if the write lock on the prefix of the package is held,
+        or could be acquired.
+
+        Args:
+            pkg (PackageBase): the package whose prefix is locked
+        """
+        ltype, lock = self._ensure_locked('write', pkg)
+        return ltype == 'write' and lock is not None
+
+    def _start_prefetch(self):
+        """
+        Start fetching the sources of the packages to build in the
+        background, in the order they are expected to be built.
+
+        Up to ``config:fetch_jobs`` packages are fetched at the same time,
+        by a pool of worker processes: fetchers change the working
+        directory, so they can't run in threads. Workers need to inherit the
+        packages and configuration, so they are only used where processes
+        are forked.
+
+        The stage of a package is only fetched into while holding the write
+        lock on its prefix, so packages being installed by another process
+        are left alone."""
+        jobs = spack.config.get('config:fetch_jobs', 4)
+        if not jobs or not spack.subprocess_context.can_fork_workers():
+            return
+
+        tasks = [task for _, task in sorted(self.build_pq)
+                 if task.status != STATUS_REMOVED and
+                 self._can_prefetch(task) and self._write_locked(task.pkg)]
+        if not tasks:
+            return
+
+        tty.debug('Fetching the sources of {0} package(s) ahead of their '
+                  'builds'.format(len(tasks)))
+        self._fetch_pool = FetchPool([task.pkg for task in tasks],
+                                     min(jobs, len(tasks)))
+        for position, task in enumerate(tasks):
+            self.prefetching[task.pkg_id] = (task, position)
+
+    def _wait_for_prefetch(self, pkg_id):
+        """
+        Wait for the sources of the package to be fetched, if they are
+        fetched ahead of its build.
+
+        Args:
+            pkg_id (str): identifier for the package
+        """
+        if pkg_id in self.prefetching:
+            _, position = self.prefetching[pkg_id]
+            self._fetch_pool.wait(position)
+
+    def _cleanup_prefetch(self, cancel=False):
+        """
+        Stop fetching sources ahead of the builds, and remove the stages
+        fetched for packages that were not built, or whose build failed
+        before expanding the sources, unless asked to keep them.
+
+        Stages are only removed while holding the write lock on the prefix
+        of their package, so that the stages of packages being installed by
+        another process are left alone.
+
+        Args:
+            cancel (bool): whether to interrupt the fetches in progress
+        """
+        if self._fetch_pool is not None:
+            self._fetch_pool.stop(terminate=cancel)
+            self._fetch_pool = None
+
+        tasks = [task for task, _ in self.prefetching.values()]
+        tasks.extend(
+            task for pkg_id, task in self.prefetched_builds.items()
+            if pkg_id not in self.installed and not task.pkg.stage.expanded)
+        for task in tasks:
+            if task.request.install_args.get('keep_stage'):
+                continue
+
+            if not self._write_locked(task.pkg):
+                tty.debug('Keeping the stage fetched for {0}, which is '
+                          'locked by another process'.format(task.pkg_id))
+                continue
+
+            tty.debug('Removing the stage fetched for {0}'
+                      .format(task.pkg_id))
+            task.pkg.stage.destroy()
+
+        self.prefetching.clear()
+        self.prefetched_builds.clear()
+
+    def _can_start_build(self):
+        """
+        Return True if the next build task can be processed while packages
+        are building in the background."""
+        if len(self.building) >= self.concurrent_packages:
+            return False
+
+        # Drop removed tasks from the top of the queue to check the priority
+        # of the next task: dependents of the packages being built must wait
+        # for them to be installed.
+        while self.build_pq and self.build_pq[0][1].status == STATUS_REMOVED:
+            heapq.heappop(self.build_pq)
+        return bool(self.build_pq) and self.build_pq[0][1].priority == 0
+
+    def _wait_for_build(self):
+        """
+        Wait for (at least) one of the packages building in the background
+        and complete its installation."""
+        processes = [process for _, process in self.building.values()]
+        if _wait_for_processes is not None:
+            ready = _wait_for_processes(processes)
+        else:
+            ready = [process for process in processes if process.poll()]
+            while not ready:
+                time.sleep(0.1)
+                ready = [process for process in processes if process.poll()]
+
+        for pkg_id, (task, process) in list(self.building.items()):
+            if process in ready:
+                del self.building[pkg_id]
+                self._run_install(task, functools.partial(
+                    self._complete_background_task, process=process))
+
+    def _terminate_builds(self):
+        """Terminate the builds running in the background."""
+        for task, process in self.building.values():
+            tty.debug('Terminating the build of {0}'.format(task.pkg_id))
+            process.terminate()
+            if not task.request.install_args.get('keep_prefix'):
+                task.pkg.remove_prefix()
+            task.pkg.stage.created = False
+        self.building.clear()
+
+    def _process_queue(self):
+        """Process the build tasks until the build queue is empty and all
+        of the packages building in the background are done."""
+        while self.build_pq or self.building:
+            if self.building and not self._can_start_build():
+                self._wait_for_build()
+                continue
 
-        while self.build_pq:
             task = self._pop_task()
             if task is None:
                 continue
 
             spack.hooks.on_install_start(task.request.pkg.spec)
-            install_args = task.request.install_args
-            keep_prefix = install_args.get('keep_prefix')
-
             pkg, pkg_id, spec = task.pkg, task.pkg_id, task.pkg.spec
             tty.verbose('Processing {0}: task={1}'.format(pkg_id, task))
             # Ensure that the current spec has NO uninstalled dependencies,
@@ -1482,7 +2010,7 @@ def install(self):
                 spack.hooks.on_install_failure(task.request.pkg.spec)
 
                 if self.fail_fast:
-                    raise InstallError(fail_fast_err)
+                    raise InstallError(self._fail_fast_err)
 
                 continue
 
@@ -1554,101 +2082,32 @@ def install(self):
 
             # Proceed with the installation since we have an exclusive write
             # lock on the package.
-            try:
-                if pkg.spec.dag_hash() in task.request.overwrite:
-                    rec, _ = self._check_db(pkg.spec)
-                    if rec and rec.installed:
-                        if rec.installation_time < task.request.overwrite_time:
-                            # If it's actually overwriting, do a fs transaction
-                            if os.path.exists(rec.path):
-                                with fs.replace_directory_transaction(
-                                        rec.path):
-                                    self._install_task(task)
-                            else:
-                                tty.debug("Missing installation to overwrite")
-                                self._install_task(task)
-                    else:
-                        # overwriting nothing
-                        self._install_task(task)
-                else:
-                    self._install_task(task)
-
-                self._update_installed(task)
-
-                # If we installed then we should keep the prefix
-                stop_before_phase = getattr(pkg, 'stop_before_phase', None)
-                last_phase = getattr(pkg, 'last_phase', None)
-                keep_prefix = keep_prefix or \
-                    (stop_before_phase is None and last_phase is None)
-
-            except spack.directory_layout.InstallDirectoryAlreadyExistsError \
-                    as exc:
-                tty.debug('Install prefix for {0} exists, keeping {1} in '
-                          'place.'.format(pkg.name, pkg.prefix))
-                self._update_installed(task)
-
-                # Only terminate at this point if a single build request was
-                # made.
-                if task.explicit and single_explicit_spec:
-                    spack.hooks.on_install_failure(task.request.pkg.spec)
-                    raise
-
-                if task.explicit:
-                    exists_errors.append((pkg_id, str(exc)))
-
-            except KeyboardInterrupt as exc:
-                # The build has been terminated with a Ctrl-C so terminate
-                # regardless of the number of remaining specs.
-                err = 'Failed to install {0} due to {1}: {2}'
-                tty.error(err.format(pkg.name, exc.__class__.__name__,
-                          str(exc)))
-                spack.hooks.on_install_failure(task.request.pkg.spec)
-                raise
-
-            except (Exception, SystemExit) as exc:
-                self._update_failed(task, True, exc)
-                spack.hooks.on_install_failure(task.request.pkg.spec)
-
-                # Best effort installs suppress the exception and mark the
-                # package as a failure.
-                if (not isinstance(exc, spack.error.SpackError) or
-                    not exc.printed):
-                    # SpackErrors can be printed by the build process or at
-                    # lower levels -- skip printing if already printed.
-                    # TODO: sort out this and SpackError.print_context()
-                    tty.error('Failed to install {0} due to {1}: {2}'
-                              .format(pkg.name, exc.__class__.__name__,
-                                      str(exc)))
-                # Terminate if requested to do so on the first failure.
-                if self.fail_fast:
-                    raise InstallError('{0}: {1}'
-                                       .format(fail_fast_err, str(exc)))
-
-                # Terminate at this point if the single explicit spec has
-                # failed to install.
-                if single_explicit_spec and task.explicit:
-                    raise
-
-                # Track explicit spec id and error to summarize when done
-                if task.explicit:
-                    failed_explicits.append((pkg_id, str(exc)))
+            if pkg.spec.dag_hash() in task.request.overwrite:
+                self._run_install(task, self._overwrite_install_task)
+            elif self.concurrent_packages > 1:
+                self._run_install(task, functools.partial(
+                    self._install_task, background=True))
+            else:
+                self._run_install(task, self._install_task)
 
-            finally:
-                # Remove the install prefix if anything went wrong during
-                # install.
-                if not keep_prefix:
-                    pkg.remove_prefix()
+    def install(self):
+        """
+        Install the requested package(s) and or associated dependencies.
 
-                # The subprocess *may* have removed the build stage. Mark it
-                # not created so that the next time pkg.stage is invoked, we
-                # check the filesystem for it.
-                pkg.stage.created = False
+        Args:
+            pkg (Package): the package to be built and installed"""
 
-            # Perform basic task cleanup for the installed spec to
-            # include downgrading the write to a read lock
-            self._cleanup_task(pkg)
+        self._init_queue()
+        self._start_prefetch()
+        try:
+            self._process_queue()
+        except BaseException:
+            self._terminate_builds()
+            self._cleanup_prefetch(cancel=True)
+            raise
 
         # Cleanup, which includes releasing all of the read locks
+        self._cleanup_prefetch()
         self._cleanup_all_tasks()
 
         # Ensure we properly report if one or more explicit specs failed
@@ -1656,11 +2115,11 @@ def install(self):
         missing = [request.pkg_id for request in self.build_requests if
                    request.install_args.get('install_package') and
                    request.pkg_id not in self.installed]
-        if exists_errors or failed_explicits or missing:
-            for pkg_id, err in exists_errors:
+        if self._exists_errors or self._failed_explicits or missing:
+            for pkg_id, err in self._exists_errors:
                 tty.error('{0}: {1}'.format(pkg_id, err))
 
-            for pkg_id, err in failed_explicits:
+            for pkg_id, err in self._failed_explicits:
                 tty.error('{0}: {1}'.format(pkg_id, err))
 
             for pkg_id in missing:
@@ -1788,6 +2247,11 @@ def build_process(pkg, kwargs):
             combine_phase_logs(pkg.phase_log_files, pkg.log_path)
             log(pkg)
 
+        # Record the install times before the post install hooks, which
+        # write the manifest of the installed files.
+        pkg._total_time = time.time() - start_time
+        _write_install_times(pkg)
+
         # Run post install hooks before build stage is removed.
         spack.hooks.post_install(pkg.spec)
 
@@ -1808,6 +2272,52 @@ def build_process(pkg, kwargs):
     return echo
 
 
+class FetchPool(object):
+    """A pool of worker processes fetching the sources of packages ahead of
+    their builds. Idle workers take the next package from a queue shared by
+    the pool, so packages are fetched in order. See ``_fetch_sources()``."""
+
+    def __init__(self, pkgs, jobs):
+        """
+        Start the worker processes.
+
+        Args:
+            pkgs (list of PackageBase): the packages whose sources are
+                fetched, in order
+            jobs (int): the number of worker processes
+        """
+        self._stop = multiprocessing.Event()
+        self.pool = spack.subprocess_context.start_workers(
+            jobs, pkgs=pkgs, stop=self._stop)
+        self.results = [self.pool.apply_async(_fetch_sources, (index,))
+                        for index in range(len(pkgs))]
+
+    def wait(self, position):
+        """
+        Wait until the pool is done with the package at the position.
+
+        Args:
+            position (int): position of the package in the list of the
+                packages fetched by the pool
+        """
+        self.results[position].wait()
+
+    def stop(self, terminate=False):
+        """
+        Stop the worker processes once done with the packages they are
+        fetching, or right away if asked to terminate them.
+
+        Args:
+            terminate (bool): whether to interrupt the fetches in progress
+        """
+        self._stop.set()
+        if terminate:
+            self.pool.terminate()
+        else:
+            self.pool.close()
+        self.pool.join()
+
+
 class BuildTask(object):
     """Class for representing the build task for a package."""
 
@@ -1905,6 +2415,11 @@ def __init__(self, pkg, request, compiler, start, attempts, status,
         self.uninstalled_deps = set(pkg_id for pkg_id in self.dependencies if
                                     pkg_id not in installed)
 
+        # Estimated time, in seconds, from the start of the build of the
+        # package to the end of the builds of all its dependents, which is
+        # used to start the builds on the critical path first.
+        self.critical_path = 0.
+
         # Ensure key sequence-related properties are updated accordingly.
         self.attempts = 0
         self._update()
@@ -1983,8 +2498,9 @@ def explicit(self):
 
     @property
     def key(self):
-        """The key is the tuple (# uninstalled dependencies, sequence)."""
-        return (self.priority, self.sequence)
+        """The key is the tuple (# uninstalled dependencies, -critical path,
+        sequence)."""
+        return (self.priority, -self.critical_path, self.sequence)
 
     def next_attempt(self, installed):
         """Create a new, updated task for the next installation attempt."""
@@ -2061,6 +2577,7 @@ def __str__(self):
     def _add_default_args(self):
         """Ensure standard install options are set to at least the default."""
         for arg, default in [('cache_only', False),
+                             ('concurrent_packages', 1),
                              ('context', 'build'),  # installs *always* build
                              ('dirty', False),
                              ('fail_fast', False),
@@ -11,6 +11,7 @@
 where spack is run is not connected to the internet, it allows spack
 to download packages directly from a mirror (e.g., on an intranet).
 """
+import collections
 import sys
 import os
 import traceback
@@ -39,6 +40,7 @@
 import spack.util.spack_yaml as syaml
 import spack.util.url as url_util
 import spack.spec
+import spack.subprocess_context
 from spack.version import VersionList
 from spack.util.spack_yaml import syaml_dict
 
@@ -401,7 +403,8 @@ def get_matching_versions(specs, num_versions=1):
     return matching
 
 
-def create(path, specs, skip_unstable_versions=False):
+def create(path, specs, skip_unstable_versions=False, jobs=None,
+           jobs_per_host=None):
     """Create a directory to be used as a spack mirror, and fill it with
     package archives.
 
@@ -412,6 +415,11 @@ def create(path, specs, skip_unstable_versions=False):
         skip_unstable_versions: if true, this skips adding resources when
             they do not have a stable archive checksum (as determined by
             ``fetch_strategy.stable_target``)
+        jobs (int): maximum number of specs mirrored at the same time
+            (default ``config:mirror_jobs``)
+        jobs_per_host (int): maximum number of specs whose sources are
+            fetched from the same host at the same time, or 0 for no limit
+            (default ``config:mirror_jobs_per_host``)
 
     Return Value:
         Returns a tuple of lists: (present, mirrored, error)
@@ -445,16 +453,117 @@ def create(path, specs, skip_unstable_versions=False):
 
     mirror_cache = spack.caches.MirrorCache(
         mirror_root, skip_unstable_versions=skip_unstable_versions)
-    mirror_stats = MirrorStats()
+    mirror_stats = MirrorStats(total=len(specs))
+
+    if jobs is None:
+        jobs = spack.config.get('config:mirror_jobs', 4)
+    if jobs_per_host is None:
+        jobs_per_host = spack.config.get('config:mirror_jobs_per_host', 0)
+    jobs = min(jobs, len(specs))
+
+    if jobs > 1 and spack.subprocess_context.can_fork_workers():
+        _add_specs_in_parallel(
+            specs, mirror_cache, mirror_stats, jobs, jobs_per_host)
+        return mirror_stats.stats()
 
     # Iterate through packages and download all safe tarballs for each
     for spec in specs:
+        mirror_stats.starting(spec)
         mirror_stats.next_spec(spec)
         _add_single_spec(spec, mirror_cache, mirror_stats)
 
     return mirror_stats.stats()
 
 
+def _fetch_host(spec):
+    """Return the host the sources of a spec are fetched from, or None if
+    they are not fetched from a URL."""
+    try:
+        url = getattr(spec.package.fetcher, 'url', None)
+    except Exception:
+        return None
+    return url_util.parse(url).netloc if url else None
+
+
+def _add_spec_task(index):
+    """Mirror the spec at some index in the list given to the workers, and
+    return what was added to the mirror."""
+    state = spack.subprocess_context.worker_state
+    spec = state['specs'][index]
+    stats = MirrorStats()
+    stats.next_spec(spec)
+    try:
+        _add_single_spec(spec, state['mirror'], stats)
+    except Exception as e:
+        # The pool would never report the task as done
+        tty.warn("Error while mirroring %s" % spec.cformat('{name}{@version}'),
+                 str(e))
+        stats.error()
+    return (list(stats.added_resources), list(stats.existing_resources),
+            bool(stats.errors))
+
+
+def _add_specs_in_parallel(specs, mirror, mirror_stats, jobs, jobs_per_host):
+    """Mirror specs in a pool of ``jobs`` processes, fetching the sources
+    of at most ``jobs_per_host`` specs from the same host at the same time
+    (no limit if 0).
+
+    Specs are scheduled round-robin over the hosts of their sources, so
+    that specs of other hosts don't wait for a busy host. The specs are
+    inherited by the forked workers, so only indices and paths go through
+    the pool.
+    """
+    tty.debug('Mirroring {0} specs with {1} processes'
+              .format(len(specs), jobs))
+    hosts = [_fetch_host(spec) for spec in specs]
+    queues = OrderedDict()
+    for index, host in enumerate(hosts):
+        queues.setdefault(host, collections.deque()).append(index)
+
+    running = collections.defaultdict(int)
+    in_flight = {}
+    with spack.subprocess_context.workers(
+            jobs, specs=specs, mirror=mirror) as pool:
+        while queues or in_flight:
+            # Start the next spec of each host that has a free slot, until
+            # all the workers are busy or all the hosts are
+            started = True
+            while started and len(in_flight) < jobs:
+                started = False
+                for host in list(queues):
+                    if len(in_flight) == jobs:
+                        break
+                    if (host and jobs_per_host and
+                            running[host] >= jobs_per_host):
+                        continue
+                    index = queues[host].popleft()
+                    if not queues[host]:
+                        del queues[host]
+                    running[host] += 1
+                    started = True
+                    mirror_stats.starting(specs[index])
+                    in_flight[index] = pool.apply_async(
+                        _add_spec_task, (index,))
+
+            done = [i for i, result in in_flight.items() if result.ready()]
+            while not done:
+                next(iter(in_flight.values())).wait(0.1)
+                done = [i for i, result in in_flight.items()
+                        if result.ready()]
+
+            for index in done:
+                result = in_flight.pop(index)
+                running[hosts[index]] -= 1
+                try:
+                    added, existing, failed = result.get()
+                except Exception as e:
+                    # E.g. the result couldn't be sent back by the worker
+                    tty.warn("Error while mirroring %s" %
+                             specs[index].cformat('{name}{@version}'), str(e))
+                    added, existing, failed = [], [], True
+                mirror_stats.record(specs[index], added, existing, failed)
+
+
 def add(name, url, scope):
     """Add a named mirror in the given scope"""
     mirrors = spack.config.get('mirrors', scope=scope)
@@ -501,7 +610,7 @@ def remove(name, scope):
 
 
 class MirrorStats(object):
-    def __init__(self):
+    def __init__(self, total=None):
         self.present = {}
         self.new = {}
         self.errors = set()
@@ -510,6 +619,19 @@ def __init__(self):
         self.added_resources = set()
         self.existing_resources = set()
 
+        # Number of specs to mirror, and number of specs started so far
+        self.total = total
+        self.started = 0
+
+    def starting(self, spec):
+        """Report the progress when starting to mirror a spec."""
+        self.started += 1
+        progress = ''
+        if self.total:
+            progress = '[{0}/{1}] '.format(self.started, self.total)
+        tty.msg("{0}Adding package {1} to mirror".format(
+            progress, spec.format("{name}{@version}")))
+
     def next_spec(self, spec):
         self._tally_current_spec()
         self.current_spec = spec
@@ -540,11 +662,20 @@ def added(self, resource):
     def error(self):
         self.errors.add(self.current_spec)
 
+    def record(self, spec, added, existing, failed):
+        """Account for the resources of a spec that were mirrored elsewhere,
+        e.g. in a worker process."""
+        self.next_spec(spec)
+        for resource in added:
+            self.added(resource)
+        for resource in existing:
+            self.already_existed(resource)
+        if failed:
+            self.error()
+        self._tally_current_spec()
+
 
 def _add_single_spec(spec, mirror, mirror_stats):
-    tty.msg("Adding package {pkg} to mirror".format(
-        pkg=spec.format("{name}{@version}")
-    ))
     num_retries = 3
     while num_retries > 0:
         try:
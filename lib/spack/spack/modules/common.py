@@ -31,6 +31,7 @@
 import collections
 import copy
 import datetime
+import hashlib
 import inspect
 import os.path
 import re
@@ -45,10 +46,14 @@
 import spack.paths
 import spack.schema.environment
 import spack.projections as proj
+import spack.repo
 import spack.tengine as tengine
+import spack.util.classes
+import spack.util.crypto
 import spack.util.environment
 import spack.util.file_permissions as fp
 import spack.util.path
+import spack.util.spack_json as sjson
 import spack.util.spack_yaml as syaml
 
 
@@ -239,7 +244,17 @@ def root_path(name, module_set_name):
     return spack.util.path.canonicalize_path(path)
 
 
-def generate_module_index(root, modules, overwrite=False):
+def generate_module_index(root, modules, overwrite=False, inputs=None):
+    """Write the index of the module files at root.
+
+    Args:
+        root (str): root directory of the module files
+        modules (list): writers of the module files to add to the index
+        overwrite (bool): if False, the entries of other specs already in
+            the index are kept
+        inputs (dict): hashes of the inputs module files were written from,
+            by spec hash (see ``BaseModuleFileWriter.inputs_hash``)
+    """
     index_path = os.path.join(root, 'module-index.yaml')
     if overwrite or not os.path.exists(index_path):
         entries = syaml.syaml_dict()
@@ -248,12 +263,16 @@ def generate_module_index(root, modules, overwrite=False):
             yaml_content = syaml.load(index_file)
             entries = yaml_content['module_index']
 
+    inputs = inputs or {}
     for m in modules:
         entry = {
             'path': m.layout.filename,
             'use_name': m.layout.use_name
         }
-        entries[m.spec.dag_hash()] = entry
+        dag_hash = m.spec.dag_hash()
+        if dag_hash in inputs:
+            entry['inputs'] = inputs[dag_hash]
+        entries[dag_hash] = entry
     index = {'module_index': entries}
     llnl.util.filesystem.mkdirp(root)
     with open(index_path, 'w') as index_file:
@@ -296,6 +315,42 @@ def _read_module_index(str_or_file):
     return index
 
 
+def read_module_inputs(root):
+    """Read the hashes of the inputs that the module files in the index at
+    root were written from, by spec hash."""
+    index_path = os.path.join(root, 'module-index.yaml')
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, 'r') as index_file:
+        yaml_content = syaml.load(index_file)
+    return dict(
+        (dag_hash, module_properties['inputs'])
+        for dag_hash, module_properties in
+        yaml_content['module_index'].items()
+        if 'inputs' in module_properties)
+
+
+def _file_hash(path, cache):
+    if path not in cache:
+        cache[path] = spack.util.crypto.checksum(hashlib.sha1, path)
+    return cache[path]
+
+
+def _template_files(env, name, cache):
+    """Paths of a template and of all the templates it extends, includes or
+    imports."""
+    key = ('template', name)
+    if key not in cache:
+        import jinja2.meta
+        source, filename, _ = env.loader.get_source(env, name)
+        files = [filename]
+        for other in jinja2.meta.find_referenced_templates(env.parse(source)):
+            if other:
+                files.extend(_template_files(env, other, cache))
+        cache[key] = files
+    return cache[key]
+
+
 def read_module_indices():
     other_spack_instances = spack.config.get(
         'upstreams') or {}
@@ -812,6 +867,38 @@ def _get_template(self):
         # ... and return the first match
         return choices.pop(0)
 
+    def inputs_hash(self, cache=None):
+        """Returns a hash of what the module file is generated from: the
+        spec and its prefix, the modules configuration, the template and
+        the source files of the package classes of the spec and its
+        dependencies, build systems included.
+
+        Args:
+            cache (dict): hashes of files and templates to reuse across
+                writers
+        """
+        cache = {} if cache is None else cache
+        files = list(_template_files(
+            tengine.make_environment(), self._get_template(), cache))
+        for node in self.spec.traverse():
+            key = ('package', node.fullname)
+            if key not in cache:
+                cache[key] = spack.util.classes.source_files(
+                    spack.repo.path.get_pkg_class(node.fullname))
+            files.extend(f for f in cache[key] if f not in files)
+
+        sha = hashlib.sha1()
+        sha.update(self.spec.dag_hash().encode('utf-8'))
+        sha.update(self.spec.prefix.encode('utf-8'))
+        # Module sets also read settings from the top level of the modules
+        # configuration, like prefix_inspections
+        sha.update(sjson.dump(
+            spack.config.get('modules', {})).encode('utf-8'))
+        for filename in files:
+            sha.update(filename.encode('utf-8'))
+            sha.update(_file_hash(filename, cache).encode('utf-8'))
+        return sha.hexdigest()
+
     def write(self, overwrite=False):
         """Writes the module file.
 
@@ -1700,6 +1700,8 @@ def do_install(self, **kwargs):
 
         Args:
             cache_only (bool): Fail if binary package unavailable.
+            concurrent_packages (int): Maximum number of packages to build
+                at the same time, each in its own build process.
             dirty (bool): Don't clean the build environment before installing.
             explicit (bool): True if package was explicitly installed, False
                 if package was implicitly installed (as a dependency).
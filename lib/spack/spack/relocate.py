@@ -2,6 +2,7 @@
 # Spack Project Developers. See the top-level COPYRIGHT file for details.
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
+import mmap
 import os
 import platform
 import re
@@ -70,6 +71,12 @@ def __init__(self, old_path, new_path):
         err_msg += "Create buildcache from an install path "
         err_msg += "longer than new path."
         super(BinaryTextReplaceError, self).__init__(msg, err_msg)
+        self.old_path = old_path
+        self.new_path = new_path
+
+    def __reduce__(self):
+        # Needed to be raised from worker processes
+        return type(self), (self.old_path, self.new_path)
 
 
 def _patchelf():
@@ -451,63 +458,150 @@ def needs_text_relocation(m_type, m_subtype):
     return m_type == 'text'
 
 
-def _replace_prefix_text(filename, compiled_prefixes):
-    """Replace all the occurrences of the old install prefix with a
-    new install prefix in text files that are utf-8 encoded.
+def _prefix_regex(prefixes):
+    """Return a single regex alternation that matches any of the byte
+    prefixes passed as argument.
+
+    Alternatives are tried in the order they are given, so that the
+    precedence among overlapping prefixes is the same as when the prefixes
+    were substituted one after the other.
+
+    Args:
+        prefixes (list): byte strings to be matched literally
+    """
+    return b'|'.join(re.escape(p) for p in prefixes)
+
+
+def _text_relocation_regex(prefix_to_prefix):
+    """Return the compiled regex used to relocate all the prefixes in
+    ``prefix_to_prefix`` in a single pass over a text file.
+
+    The second group of each match is the old prefix, which can be used
+    to look up the replacement.
+
+    Args:
+        prefix_to_prefix (OrderedDict): mapping from old to new byte prefixes
+    """
+    return re.compile(
+        b'(?<![\\w\\-_/])([\\w\\-_]*?)(%s)([\\w\\-_/]*)' %
+        _prefix_regex(prefix_to_prefix)
+    )
+
+
+def _prefilter_needles(prefixes):
+    """Return the smallest set of byte strings such that every prefix passed
+    as argument contains at least one of them.
+
+    A file that doesn't contain any of these strings doesn't need to be
+    relocated. Usually this reduces to the old install root, plus the
+    old location of sbang.
+
+    Args:
+        prefixes (list): old byte prefixes that need to be relocated
+    """
+    needles = []
+    for prefix in sorted(prefixes, key=len):
+        if not any(needle in prefix for needle in needles):
+            needles.append(prefix)
+    return needles
+
+
+def _mmap_file(f, access):
+    """Memory map the file object passed as argument, or return None if
+    the file is empty and thus cannot be mapped.
+    """
+    if os.fstat(f.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(f.fileno(), 0, access=access)
+
+
+def _replace_prefix_text(filename, prefix_regex, prefix_to_prefix,
+                         needles=None):
+    """Replace all the occurrences of the old install prefixes with the
+    new install prefixes in text files that are utf-8 encoded.
+
+    All the prefixes are replaced in a single pass over the file, and the
+    file is rewritten only if at least one of them has been found.
 
     Args:
         filename (str): target text file (utf-8 encoded)
-        compiled_prefixes (OrderedDict): OrderedDictionary where the keys are
-        precompiled regex of the old prefixes and the values are the new
-        prefixes (uft-8 encoded)
+        prefix_regex: compiled regex, as returned by
+            :ref:`_text_relocation_regex`, matching any of the old prefixes
+        prefix_to_prefix (OrderedDict): mapping from old to new prefixes
+            (utf-8 encoded)
+        needles (list): if given, the file is relocated only if it
+            contains any of these byte strings
     """
+    def replacement(match):
+        return match.group(1) + prefix_to_prefix[match.group(2)] + \
+            match.group(3)
+
     with open(filename, 'rb+') as f:
-        data = f.read()
+        data = _mmap_file(f, mmap.ACCESS_READ)
+        if data is None:
+            return
+        try:
+            if needles and not any(data.find(n) != -1 for n in needles):
+                return
+            if not prefix_regex.search(data):
+                return
+            data = prefix_regex.sub(replacement, data)
+        finally:
+            # The file can't be truncated while it is still mapped
+            if isinstance(data, mmap.mmap):
+                data.close()
         f.seek(0)
-        for orig_prefix_rexp, new_bytes in compiled_prefixes.items():
-            data = orig_prefix_rexp.sub(new_bytes, data)
         f.write(data)
         f.truncate()
 
 
-def _replace_prefix_bin(filename, byte_prefixes):
-    """Replace all the occurrences of the old install prefix with a
-    new install prefix in binary files.
+def _replace_prefix_bin(filename, prefix_regex, byte_prefixes,
+                        needles=None):
+    """Replace all the occurrences of the old install prefixes with the
+    new install prefixes in binary files.
 
     The new install prefix is prefixed with ``os.sep`` until the
-    lengths of the prefixes are the same.
+    lengths of the prefixes are the same. All the prefixes are replaced
+    in place, in a single pass over the memory mapped file.
 
     Args:
         filename (str): target binary file
+        prefix_regex: compiled regex matching any of the old prefixes, see
+            :ref:`_prefix_regex`
         byte_prefixes (OrderedDict): OrderedDictionary where the keys are
-        precompiled regex of the old prefixes and the values are the new
-        prefixes (uft-8 encoded)
+            the old prefixes and the values are the new prefixes (utf-8
+            encoded)
+        needles (list): if given, the file is relocated only if it
+            contains any of these byte strings
     """
-
     with open(filename, 'rb+') as f:
-        data = f.read()
-        f.seek(0)
-        for orig_bytes, new_bytes in byte_prefixes.items():
-            original_data_len = len(data)
-            # Skip this hassle if not found
-            if orig_bytes not in data:
-                continue
-            # We only care about this problem if we are about to replace
-            length_compatible = len(new_bytes) <= len(orig_bytes)
-            if not length_compatible:
-                raise BinaryTextReplaceError(orig_bytes, new_bytes)
-            pad_length = len(orig_bytes) - len(new_bytes)
-            padding = os.sep * pad_length
-            padding = padding.encode('utf-8')
-            data = data.replace(orig_bytes, new_bytes + padding)
-            # Really needs to be the same length
-            if not len(data) == original_data_len:
-                print('Length of pad:', pad_length, 'should be', len(padding))
-                print(new_bytes, 'was to replace', orig_bytes)
-                raise BinaryStringReplacementError(
-                    filename, original_data_len, len(data))
-        f.write(data)
-        f.truncate()
+        data = _mmap_file(f, mmap.ACCESS_WRITE)
+        if data is None:
+            return
+        try:
+            if needles and not any(data.find(n) != -1 for n in needles):
+                return
+
+            # Check every replacement before touching the file, so that
+            # it is left untouched if any of them is not possible
+            replacements = []
+            for match in prefix_regex.finditer(data):
+                orig_bytes = match.group(0)
+                new_bytes = byte_prefixes[orig_bytes]
+                if len(new_bytes) > len(orig_bytes):
+                    raise BinaryTextReplaceError(orig_bytes, new_bytes)
+                padding = os.sep * (len(orig_bytes) - len(new_bytes))
+                replacements.append(
+                    (match.start(), match.end(),
+                     new_bytes + padding.encode('utf-8'))
+                )
+
+            for start, end, new_bytes in replacements:
+                data[start:end] = new_bytes
+            if replacements:
+                data.flush()
+        finally:
+            data.close()
 
 
 def relocate_macho_binaries(path_names, old_layout_root, new_layout_root,
@@ -779,7 +873,63 @@ def relocate_links(links, orig_layout_root,
             tty.warn(msg.format(link_target, abs_link, new_install_prefix))
 
 
-def relocate_text(files, prefixes, concurrency=32):
+#: Minimum number of files handled by a worker process at a time
+_min_chunk_size = 16
+
+
+def _relocate_files(relocate_fn, files, relocate_args, concurrency,
+                    use_processes):
+    """Apply ``relocate_fn(filename, *relocate_args)`` to every file.
+
+    Args:
+        relocate_fn: function relocating a single file
+        files (list): files to be relocated
+        relocate_args (tuple): additional arguments for ``relocate_fn``
+        concurrency (int): desired degree of parallelism
+        use_processes (bool): if True, send chunks of files to a pool of
+            processes instead of using a pool of threads
+    """
+    if not use_processes:
+        # multiprocesing.ThreadPool.map requires single argument
+        args = [(filename,) + relocate_args for filename in files]
+        tp = multiprocessing.pool.ThreadPool(processes=concurrency)
+        try:
+            tp.map(llnl.util.lang.star(relocate_fn), args)
+        finally:
+            tp.terminate()
+            tp.join()
+        return
+
+    # Regex matching holds the GIL, so large numbers of files are sent
+    # to worker processes in chunks, to keep the pickling overhead low
+    chunk_size = max(
+        _min_chunk_size, -(-len(files) // (4 * max(concurrency, 1)))
+    )
+    chunks = [(relocate_fn, files[i:i + chunk_size], relocate_args)
+              for i in range(0, len(files), chunk_size)]
+    if len(chunks) <= 1 or concurrency <= 1:
+        for chunk in chunks:
+            _relocate_chunk(chunk)
+        return
+
+    pool = multiprocessing.Pool(processes=min(concurrency, len(chunks)))
+    try:
+        pool.map(_relocate_chunk, chunks)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _relocate_chunk(args):
+    """Relocate a chunk of files in a worker process. The single
+    argument is required by ``multiprocessing.Pool.map``.
+    """
+    relocate_fn, files, relocate_args = args
+    for filename in files:
+        relocate_fn(filename, *relocate_args)
+
+
+def relocate_text(files, prefixes, concurrency=32, use_processes=False):
     """Relocate text file from the original installation prefix to the
      new prefix.
 
@@ -789,38 +939,39 @@ def relocate_text(files, prefixes, concurrency=32):
          files (list): Text files to be relocated
          prefixes (OrderedDict): String prefixes which need to be changed
          concurrency (int): Preferred degree of parallelism
+         use_processes (bool): if True, relocate files in a pool of
+             processes rather than in a pool of threads
     """
 
     # This now needs to be handled by the caller in all cases
     # orig_sbang = '#!/bin/bash {0}/bin/sbang'.format(orig_spack)
     # new_sbang = '#!/bin/bash {0}/bin/sbang'.format(new_spack)
 
-    compiled_prefixes = OrderedDict({})
+    byte_prefixes = OrderedDict({})
 
     for orig_prefix, new_prefix in prefixes.items():
         if orig_prefix != new_prefix:
-            orig_bytes = orig_prefix.encode('utf-8')
-            orig_prefix_rexp = re.compile(
-                b'(?<![\\w\\-_/])([\\w\\-_]*?)%s([\\w\\-_/]*)' % orig_bytes)
-            new_bytes = b'\\1%s\\2' % new_prefix.encode('utf-8')
-            compiled_prefixes[orig_prefix_rexp] = new_bytes
+            byte_prefixes[orig_prefix.encode('utf-8')] = \
+                new_prefix.encode('utf-8')
 
-    # Do relocations on text that refers to the install tree
-    # multiprocesing.ThreadPool.map requires single argument
+    # Nothing to relocate
+    if not byte_prefixes:
+        return
 
-    args = []
-    for filename in files:
-        args.append((filename, compiled_prefixes))
+    # All the prefixes are matched by a single regex, so that each file
+    # is scanned only once regardless of the number of prefixes
+    prefix_regex = _text_relocation_regex(byte_prefixes)
+    needles = _prefilter_needles(byte_prefixes)
 
-    tp = multiprocessing.pool.ThreadPool(processes=concurrency)
-    try:
-        tp.map(llnl.util.lang.star(_replace_prefix_text), args)
-    finally:
-        tp.terminate()
-        tp.join()
+    # Do relocations on text that refers to the install tree
+    _relocate_files(
+        _replace_prefix_text, files, (prefix_regex, byte_prefixes, needles),
+        concurrency, use_processes
+    )
 
 
-def relocate_text_bin(binaries, prefixes, concurrency=32):
+def relocate_text_bin(binaries, prefixes, concurrency=32,
+                      use_processes=False):
     """Replace null terminated path strings hard coded into binaries.
 
     The new install prefix must be shorter than the original one.
@@ -829,6 +980,8 @@ def relocate_text_bin(binaries, prefixes, concurrency=32):
         binaries (list): binaries to be relocated
         prefixes (OrderedDict): String prefixes which need to be changed.
         concurrency (int): Desired degree of parallelism.
+        use_processes (bool): if True, relocate binaries in a pool of
+            processes rather than in a pool of threads
 
     Raises:
       BinaryTextReplaceError: when the new path is longer than the old path
@@ -847,20 +1000,18 @@ def relocate_text_bin(binaries, prefixes, concurrency=32):
                 new_bytes = new_prefix.encode('utf-8')
             byte_prefixes[orig_bytes] = new_bytes
 
-    # Do relocations on text in binaries that refers to the install tree
-    # multiprocesing.ThreadPool.map requires single argument
-    args = []
-
-    for binary in binaries:
-        args.append((binary, byte_prefixes))
+    # Nothing to relocate
+    if not byte_prefixes:
+        return
 
-    tp = multiprocessing.pool.ThreadPool(processes=concurrency)
+    prefix_regex = re.compile(_prefix_regex(byte_prefixes))
+    needles = _prefilter_needles(byte_prefixes)
 
-    try:
-        tp.map(llnl.util.lang.star(_replace_prefix_bin), args)
-    finally:
-        tp.terminate()
-        tp.join()
+    # Do relocations on text in binaries that refers to the install tree
+    _relocate_files(
+        _replace_prefix_bin, binaries, (prefix_regex, byte_prefixes, needles),
+        concurrency, use_processes
+    )
 
 
 def is_relocatable(spec):
@@ -8,6 +8,7 @@
 import contextlib
 import errno
 import functools
+import hashlib
 import inspect
 import itertools
 import os
@@ -18,7 +19,7 @@
 import sys
 import traceback
 import types
-from typing import Dict  # novm
+from typing import Dict, Tuple  # novm
 
 if sys.version_info >= (3, 5):
     from collections.abc import Mapping  # novm
@@ -35,6 +36,8 @@
 import spack.error
 import spack.patch
 import spack.spec
+import spack.subprocess_context
+import spack.util.cpus
 import spack.util.spack_json as sjson
 import spack.util.imp as simp
 import spack.provider_index
@@ -137,6 +140,9 @@ class FastPackageChecker(Mapping):
     #: Global cache, reused by every instance
     _paths_cache = {}  # type: Dict[str, Dict[str, os.stat_result]]
 
+    #: Global cache of the digests of package files, by path
+    _digests_cache = {}  # type: Dict[str, Tuple[float, int, str]]
+
     def __init__(self, packages_path):
         # The path of the repository managed by this instance
         self.packages_path = packages_path
@@ -207,6 +213,30 @@ def last_mtime(self):
         return max(
             sinfo.st_mtime for sinfo in self._packages_to_stats.values())
 
+    def digest(self, pkg_name):
+        """Return a digest of the content of the package file.
+
+        The digest is the git blob id of the file, so it doesn't depend on
+        the clone of the repository, or on the time it was checked out.
+        """
+        sinfo = self._packages_to_stats[pkg_name]
+        pkg_file = os.path.join(
+            self.packages_path, pkg_name, package_file_name
+        )
+
+        cached = self._digests_cache.get(pkg_file)
+        if cached and cached[:2] == (sinfo.st_mtime, sinfo.st_size):
+            return cached[2]
+
+        with open(pkg_file, 'rb') as f:
+            data = f.read()
+        sha = hashlib.sha1(('blob %d\0' % len(data)).encode('utf-8'))
+        sha.update(data)
+        digest = sha.hexdigest()
+
+        self._digests_cache[pkg_file] = (sinfo.st_mtime, sinfo.st_size, digest)
+        return digest
+
     def __getitem__(self, item):
         return self._packages_to_stats[item]
 
@@ -256,15 +286,36 @@ def update_package(self, pkg_name):
         package = path.get(pkg_name)
 
         # Remove the package from the list of packages, if present
-        for pkg_list in self._tag_dict.values():
-            if pkg_name in pkg_list:
-                pkg_list.remove(pkg_name)
+        self.remove_package(pkg_name)
 
         # Add it again under the appropriate tags
         for tag in getattr(package, 'tags', []):
             tag = tag.lower()
             self._tag_dict[tag].append(package.name)
 
+    def remove_package(self, pkg_name):
+        """Removes a package from the tag index.
+
+        Args:
+            pkg_name (str): name of the package to be removed from the index
+        """
+        pkg_name = pkg_name.split('.')[-1]
+        for tag, pkg_list in list(self._tag_dict.items()):
+            if pkg_name in pkg_list:
+                pkg_list.remove(pkg_name)
+            if not pkg_list:
+                del self._tag_dict[tag]
+
+    def merge(self, other):
+        """Merge another tag index into this one.
+
+        Args:
+            other (TagIndex): tag index to be merged
+        """
+        for tag, pkg_list in other.items():
+            spkgs = self._tag_dict[tag]
+            spkgs.extend(p for p in pkg_list if p not in spkgs)
+
 
 @six.add_metaclass(abc.ABCMeta)
 class Indexer(object):
@@ -305,6 +356,16 @@ def update(self, pkg_fullname):
     def write(self, stream):
         """Write the index to a file object."""
 
+    @abc.abstractmethod
+    def remove(self, pkg_fullname):
+        """Remove the information about a package from the index in memory.
+        """
+
+    @abc.abstractmethod
+    def merge(self, other):
+        """Merge into the index in memory another index of the same type,
+        e.g. one generated for other packages in a separate process."""
+
 
 class TagIndexer(Indexer):
     """Lifecycle methods for a TagIndex on a Repo."""
@@ -320,6 +381,12 @@ def update(self, pkg_fullname):
     def write(self, stream):
         self.index.to_json(stream)
 
+    def remove(self, pkg_fullname):
+        self.index.remove_package(pkg_fullname)
+
+    def merge(self, other):
+        self.index.merge(other)
+
 
 class ProviderIndexer(Indexer):
     """Lifecycle methods for virtual package providers."""
@@ -339,6 +406,12 @@ def update(self, pkg_fullname):
     def write(self, stream):
         self.index.to_json(stream)
 
+    def remove(self, pkg_fullname):
+        self.index.remove_provider(pkg_fullname)
+
+    def merge(self, other):
+        self.index.merge(other)
+
 
 class PatchIndexer(Indexer):
     """Lifecycle methods for patch cache."""
@@ -361,6 +434,41 @@ def write(self, stream):
     def update(self, pkg_fullname):
         self.index.update_package(pkg_fullname)
 
+    def remove(self, pkg_fullname):
+        self.index.remove_package(pkg_fullname)
+
+    def merge(self, other):
+        self.index.update(other)
+
+
+#: Minimum number of stale packages for which indexes are rebuilt in
+#: parallel. Below this, forking worker processes costs more than it saves.
+_min_packages_for_parallel_index = 64
+
+
+def _index_packages(args):
+    """Build fragments of the indexes of a repository, for a chunk of its
+    packages, in a worker process.
+
+    The single argument is required by ``multiprocessing.Pool.map``.
+
+    Returns:
+        A dictionary mapping the name of each index to its JSON
+        serialization, containing only the packages of the chunk.
+    """
+    namespace, indexer_types, pkg_names = args
+    fragments = {}
+    for name, indexer_type in indexer_types:
+        indexer = indexer_type()
+        indexer.create()
+        for pkg_name in pkg_names:
+            indexer.update('%s.%s' % (namespace, pkg_name))
+
+        stream = six.StringIO()
+        indexer.write(stream)
+        fragments[name] = stream.getvalue()
+    return fragments
+
 
 class RepoIndex(object):
     """Container class that manages a set of Indexers for a Repo.
@@ -415,29 +523,113 @@ def _build_all_indexes(self):
         because the main bottleneck here is loading all the packages.  It
         can take tens of seconds to regenerate sequentially, and we'd
         rather only pay that cost once rather than on several
-        invocations.
+        invocations. When many packages are stale, they are loaded in
+        a pool of processes instead.
 
         """
+        newer, needs_update = {}, {}
+        for name in self.indexers:
+            newer[name], needs_update[name] = self._packages_to_update(name)
+
+        stale = sorted(set(itertools.chain(*needs_update.values())))
+        fragments = None
+        if self._can_index_in_parallel(stale):
+            fragments = self._index_in_parallel(stale)
+
         for name, indexer in self.indexers.items():
-            self.indexes[name] = self._build_index(name, indexer)
+            self.indexes[name] = self._build_index(
+                name, indexer, needs_update[name], newer[name], stale,
+                fragments)
 
-    def _build_index(self, name, indexer):
-        """Determine which packages need an update, and update indexes."""
+    def _cache_filename(self, name):
+        # Filename of the index cache (we assume they're all json)
+        return '{0}/{1}-index.json'.format(name, self.namespace)
 
-        # Filename of the provider index cache (we assume they're all json)
-        cache_filename = '{0}/{1}-index.json'.format(name, self.namespace)
+    def _digests_filename(self, name):
+        # Filename of the digests of the package files in the index cache
+        return '{0}/{1}-digests.json'.format(name, self.namespace)
 
-        # Compute which packages needs to be updated in the cache
+    def _read_digests(self, name):
+        """Return the digests of the package files, as they were when the
+        index with the name passed as argument was last written."""
         misc_cache = spack.caches.misc_cache
-        index_mtime = misc_cache.mtime(cache_filename)
+        digests_filename = self._digests_filename(name)
+        if not misc_cache.init_entry(digests_filename):
+            return {}
 
-        needs_update = [
+        with misc_cache.read_transaction(digests_filename) as f:
+            return sjson.load(f)['digests']
+
+    def _packages_to_update(self, name):
+        """Determine which packages may need an update in an index.
+
+        Only the packages whose file is newer than the index are checked,
+        and they need an update only if the content of the file is not
+        the same it was when the index was written. Thus a fresh checkout
+        of a repository doesn't invalidate the indexes.
+
+        Returns:
+            A tuple with the names of the packages whose file is newer than
+            the index, and the names of those among them that changed.
+        """
+        index_mtime = spack.caches.misc_cache.mtime(self._cache_filename(name))
+        newer = [
             x for x, sinfo in self.checker.items()
             if sinfo.st_mtime > index_mtime
         ]
+        if not newer:
+            return newer, []
+
+        digests = self._read_digests(name)
+        needs_update = [
+            x for x in newer if digests.get(x) != self.checker.digest(x)
+        ]
+        return newer, needs_update
+
+    def _can_index_in_parallel(self, stale):
+        return (len(stale) >= _min_packages_for_parallel_index and
+                spack.util.cpus.cpus_available() > 1 and
+                spack.subprocess_context.can_fork_workers())
+
+    def _index_in_parallel(self, pkg_names):
+        """Load the packages passed as argument in a pool of processes,
+        and return the serialized fragments of all the indexes for them."""
+        processes = spack.util.cpus.cpus_available()
+        chunk_size = -(-len(pkg_names) // (4 * processes))
+        indexer_types = [
+            (name, type(indexer)) for name, indexer in self.indexers.items()
+        ]
+        chunks = [
+            (self.namespace, indexer_types, pkg_names[i:i + chunk_size])
+            for i in range(0, len(pkg_names), chunk_size)
+        ]
+
+        tty.debug('Indexing {0} packages in {1} with {2} processes'.format(
+            len(pkg_names), self.namespace, processes))
+        with spack.subprocess_context.workers(processes) as pool:
+            return pool.map(_index_packages, chunks)
+
+    def _build_index(self, name, indexer, needs_update, newer, stale=None,
+                     fragments=None):
+        """Update an index with the packages that need an update.
+
+        Args:
+            name (str): name of the index
+            indexer (Indexer): indexer for the index
+            needs_update (list): names of the packages whose file changed
+                since the index was written
+            newer (list): names of the packages whose file is newer than
+                the index
+            stale (list): names of the packages stale in any of the indexes
+            fragments (list): if given, the serialized fragments, covering
+                all the stale packages, to be merged into the index instead
+                of updating it package by package
+        """
+        cache_filename = self._cache_filename(name)
+        misc_cache = spack.caches.misc_cache
 
         index_existed = misc_cache.init_entry(cache_filename)
-        if index_existed and not needs_update:
+        if index_existed and not newer:
             # If the index exists and doesn't need an update, read it
             with misc_cache.read_transaction(cache_filename) as f:
                 indexer.read(f)
@@ -447,12 +639,31 @@ def _build_index(self, name, indexer):
             with misc_cache.write_transaction(cache_filename) as (old, new):
                 indexer.read(old) if old else indexer.create()
 
-                for pkg_name in needs_update:
-                    namespaced_name = '%s.%s' % (self.namespace, pkg_name)
-                    indexer.update(namespaced_name)
+                if fragments is None:
+                    for pkg_name in needs_update:
+                        namespaced_name = '%s.%s' % (self.namespace, pkg_name)
+                        indexer.update(namespaced_name)
+                else:
+                    for pkg_name in stale:
+                        indexer.remove('%s.%s' % (self.namespace, pkg_name))
+
+                    for fragment in fragments:
+                        partial = type(indexer)()
+                        partial.read(six.StringIO(fragment[name]))
+                        indexer.merge(partial.index)
 
                 indexer.write(new)
 
+            # Record the digests of the package files that are newer than
+            # the old index. If none of them changed, rewriting the index
+            # above refreshed its mtime, so they won't be checked again.
+            digests = self._read_digests(name) if index_existed else {}
+            digests.update((x, self.checker.digest(x)) for x in newer)
+            digests_filename = self._digests_filename(name)
+            misc_cache.init_entry(digests_filename)
+            with misc_cache.write_transaction(digests_filename) as (old, new):
+                sjson.dump({'digests': digests}, new)
+
         return indexer.index
 
 
@@ -88,7 +88,13 @@
                 'type': 'string',
                 'enum': ['original', 'clingo']
             },
+            'concretize_jobs': {'type': 'integer', 'minimum': 1},
+            'fetch_jobs': {'type': 'integer', 'minimum': 0},
+            'mirror_jobs': {'type': 'integer', 'minimum': 1},
+            'mirror_jobs_per_host': {'type': 'integer', 'minimum': 0},
+            'module_jobs': {'type': 'integer', 'minimum': 1},
             'db_lock_timeout': {'type': 'integer', 'minimum': 1},
+            'db_journal': {'type': 'boolean'},
             'package_lock_timeout': {
                 'anyOf': [
                     {'type': 'integer', 'minimum': 1},
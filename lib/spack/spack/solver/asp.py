@@ -6,6 +6,7 @@
 
 import collections
 import copy
+import hashlib
 import itertools
 import os
 import pprint
@@ -36,11 +37,15 @@
 import spack.dependency
 import spack.directives
 import spack.error
+import spack.hash_types as ht
 import spack.spec
 import spack.package
 import spack.package_prefs
 import spack.repo
 import spack.bootstrap
+import spack.caches
+import spack.util.classes
+import spack.util.spack_json as sjson
 import spack.variant
 import spack.version
 
@@ -72,6 +77,36 @@ def write(self, out=sys.stdout):
         out.write("Total: %.4f\n" % (now - self.start))
 
 
+#: Version of the format of the package facts cached in the misc cache.
+#: Changes to the code generating facts are picked up by a digest of this
+#: file, so this needs to change only if the format itself changes.
+_facts_cache_version = 1
+
+#: Digests of the source files of package classes, by path
+_source_digests = {}
+
+#: Maximum size, in bytes, of the solve results cached in the misc cache.
+#: The least recently used results are evicted beyond that size.
+_solve_cache_size = 64 * 1024 * 1024
+
+#: Package facts read from or written to the misc cache by this process, by
+#: key, so that solving many specs reads the facts of each package once
+_package_facts = {}
+
+
+def _source_digest(path):
+    """Return the sha1 of the content of a file, cached by mtime and size."""
+    sinfo = os.stat(path)
+    cached = _source_digests.get(path)
+    if cached and cached[:2] == (sinfo.st_mtime, sinfo.st_size):
+        return cached[2]
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    _source_digests[path] = (sinfo.st_mtime, sinfo.st_size, digest)
+    return digest
+
+
 def issequence(obj):
     if isinstance(obj, string_types):
         return False
@@ -152,6 +187,26 @@ def __getattr__(self, name):
 fn = AspFunctionBuilder()
 
 
+class _ConditionId(int):
+    """Id of a condition, which is renumbered when package facts are
+    replayed from the cache."""
+
+
+class _FactsRecorder(object):
+    """Solver driver proxy recording the facts it passes to the driver."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.facts = []
+
+    def fact(self, head):
+        self.facts.append(head)
+        self.driver.fact(head)
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+
 def all_compilers_in_config():
     return spack.compilers.all_compilers()
 
@@ -421,6 +476,10 @@ def __init__(self):
         self.compiler_version_constraints = set()
         self.post_facts = []
 
+        # digest of what package facts depend on, besides packages, which
+        # is used to key the package facts in the misc cache (set by setup)
+        self.facts_context = None
+
         # id for dummy variables
         self._condition_id_counter = itertools.count()
 
@@ -599,6 +658,14 @@ def pkg_rules(self, pkg, tests):
         self.pkg_version_rules(pkg)
         self.gen.newline()
 
+        self.pkg_directive_rules(pkg, tests)
+
+    def pkg_directive_rules(self, pkg, tests):
+        """Output the facts for the directives of a package: everything in
+        ``pkg_rules()`` but the versions, which depend on the specs to
+        solve."""
+        pkg = packagize(pkg)
+
         # variants
         for name, variant in sorted(pkg.variants.items()):
             self.gen.fact(fn.variant(pkg.name, name))
@@ -679,7 +746,7 @@ def condition(self, required_spec, imposed_spec=None, name=None):
         named_cond.name = named_cond.name or name
         assert named_cond.name, "must provide name for anonymous condtions!"
 
-        condition_id = next(self._condition_id_counter)
+        condition_id = _ConditionId(next(self._condition_id_counter))
         self.gen.fact(fn.condition(condition_id))
 
         # requirements trigger the condition
@@ -1326,6 +1393,148 @@ def define_variant_values(self):
         for pkg, variant, value in sorted(self.variant_values_from_specs):
             self.gen.fact(fn.variant_possible_value(pkg, variant, value))
 
+    def package_facts_key(self, pkg_name, tests):
+        """Return the key of the cached facts for a package, which digests
+        the source of the package class, the configuration and whether the
+        tests of the package are solved for."""
+        pkg_cls = spack.repo.path.get_pkg_class(pkg_name)
+        tests = tests is True or bool(tests and pkg_name in tests)
+
+        sha = hashlib.sha1()
+        sha.update(self.facts_context.encode('utf-8'))
+        sha.update(str(tests).encode('utf-8'))
+        for path in spack.util.classes.source_files(pkg_cls):
+            sha.update(_source_digest(path).encode('utf-8'))
+        return sha.hexdigest()
+
+    def package_facts(self, pkg_name, tests):
+        """Output the facts for a package that do not depend on the specs to
+        solve: the rules for its directives and its preferences.
+
+        The facts are cached in the misc cache, and replayed as long as
+        neither the package nor the configuration change.
+        """
+        key = self.package_facts_key(pkg_name, tests)
+        if key in _package_facts:
+            self.replay_package_facts(_package_facts[key])
+            return
+
+        cache_key = 'asp/{0}.json'.format(pkg_name)
+        misc_cache = spack.caches.misc_cache
+
+        try:
+            if misc_cache.init_entry(cache_key):
+                with misc_cache.read_transaction(cache_key) as f:
+                    entry = sjson.load(f)
+                if entry.get('key') == key:
+                    _package_facts[key] = entry
+                    self.replay_package_facts(entry)
+                    return
+        except (spack.error.SpackError, IOError, OSError, ValueError) as e:
+            tty.debug('Cannot read the facts of {0} from the cache: {1}'
+                      .format(pkg_name, str(e)))
+
+        entry = self.record_package_facts(pkg_name, tests)
+        entry['key'] = key
+        _package_facts[key] = entry
+        try:
+            with misc_cache.write_transaction(cache_key) as (old, new):
+                sjson.dump(entry, new)
+        except (spack.error.SpackError, IOError, OSError) as e:
+            tty.debug('Cannot write the facts of {0} to the cache: {1}'
+                      .format(pkg_name, str(e)))
+
+    def _generate_package_facts(self, pkg_name, tests):
+        self.pkg_directive_rules(pkg_name, tests)
+        self.preferred_variants(pkg_name)
+        self.preferred_targets(pkg_name)
+        self.preferred_versions(pkg_name)
+
+    def record_package_facts(self, pkg_name, tests):
+        """Output the facts for a package, and return them with the
+        constraints they add to the solver setup, in a cache entry."""
+        saved = (self.gen, self.version_constraints, self.target_constraints,
+                 self.compiler_version_constraints,
+                 self.variant_values_from_specs)
+        self.gen = _FactsRecorder(self.gen)
+        self.version_constraints = set()
+        self.target_constraints = set()
+        self.compiler_version_constraints = set()
+        self.variant_values_from_specs = set()
+
+        first_condition = next(self._condition_id_counter)
+        self._condition_id_counter = itertools.count(first_condition)
+        try:
+            self._generate_package_facts(pkg_name, tests)
+            recorded = (self.gen.facts, self.version_constraints,
+                        self.target_constraints,
+                        self.compiler_version_constraints,
+                        self.variant_values_from_specs)
+        finally:
+            (self.gen, self.version_constraints, self.target_constraints,
+             self.compiler_version_constraints,
+             self.variant_values_from_specs) = saved
+
+        facts, versions, targets, compilers, variant_values = recorded
+        self.version_constraints |= versions
+        self.target_constraints |= targets
+        self.compiler_version_constraints |= compilers
+        self.variant_values_from_specs |= variant_values
+
+        # Condition ids are stored relative to the first one, and every
+        # argument is stored as it is passed to clingo, i.e. as an int or
+        # as a string
+        def encode(arg):
+            if isinstance(arg, _ConditionId):
+                return {'condition': arg - first_condition}
+            elif isinstance(arg, int) and not isinstance(arg, bool):
+                return int(arg)
+            return str(arg)
+
+        next_condition = next(self._condition_id_counter)
+        self._condition_id_counter = itertools.count(next_condition)
+        return {
+            'version': _facts_cache_version,
+            'conditions': next_condition - first_condition,
+            'facts': [[f.name, [encode(arg) for arg in f.args]]
+                      for f in facts],
+            'version_constraints': sorted(
+                [name, str(v)] for name, v in versions),
+            'target_constraints': sorted(
+                [name, str(t)] for name, t in targets),
+            'compiler_version_constraints': sorted(
+                [name, str(c)] for name, c in compilers),
+            'variant_values': sorted(
+                list(v) for v in variant_values),
+        }
+
+    def replay_package_facts(self, entry):
+        """Output the facts for a package recorded in a cache entry by
+        ``record_package_facts()``."""
+        conditions = [_ConditionId(next(self._condition_id_counter))
+                      for _ in range(entry['conditions'])]
+
+        def decode(arg):
+            if isinstance(arg, dict):
+                return conditions[arg['condition']]
+            return arg
+
+        for name, args in entry['facts']:
+            self.gen.fact(AspFunction(name, [decode(arg) for arg in args]))
+
+        for name, versions in entry['version_constraints']:
+            self.version_constraints.add(
+                (name, spack.version.VersionList(versions)))
+        for name, target in entry['target_constraints']:
+            self.target_constraints.add(
+                (name, spack.architecture.Target(target)))
+        for name, compiler in entry['compiler_version_constraints']:
+            self.compiler_version_constraints.add(
+                (name, spack.spec.CompilerSpec(compiler)))
+        for pkg_name, variant_name, value in entry['variant_values']:
+            self.variant_values_from_specs.add(
+                (pkg_name, variant_name, value))
+
     def setup(self, driver, specs, tests=False):
         """Generate an ASP program with relevant constraints for specs.
 
@@ -1378,14 +1587,22 @@ def setup(self, driver, specs, tests=False):
         self.external_packages()
         self.flag_defaults()
 
+        # Besides packages, the package facts depend on the configuration,
+        # the compilers and the virtuals in the specs
+        self.facts_context = sjson.dump({
+            'version': _facts_cache_version,
+            'solver': _source_digest(os.path.splitext(__file__)[0] + '.py'),
+            'packages': spack.config.get('packages'),
+            'compilers': sorted(str(c) for c in self.possible_compilers),
+            'virtuals': sorted(self.possible_virtuals),
+        })
+
         self.gen.h1('Package Constraints')
         for pkg in sorted(pkgs):
             self.gen.h2('Package rules: %s' % pkg)
-            self.pkg_rules(pkg, tests=tests)
-            self.gen.h2('Package preferences: %s' % pkg)
-            self.preferred_variants(pkg)
-            self.preferred_targets(pkg)
-            self.preferred_versions(pkg)
+            self.pkg_version_rules(pkg)
+            self.gen.newline()
+            self.package_facts(pkg, tests)
 
         # Inject dev_path from environment
         env = spack.environment.get_env(None, None)
@@ -1649,18 +1866,131 @@ def _develop_specs_from_env(spec, env):
 #
 # These are handwritten parts for the Spack ASP model.
 #
+def _solve_cache_key(specs, models, tests):
+    """Return the key of the result of a solve in the misc cache.
+
+    The key digests everything the result depends on: the specs, the
+    packages that could be in the solution, the configuration, the host
+    architecture and the solver itself.
+    """
+    check_packages_exist(specs)
+    possible = spack.package.possible_dependencies(
+        *specs,
+        virtuals=set(x.name for x in specs if x.virtual),
+        deptype=spack.dependency.all_deptypes
+    )
+
+    packages = {}
+    for pkg_name in sorted(possible):
+        pkg_cls = spack.repo.path.get_pkg_class(pkg_name)
+        packages[pkg_name] = [
+            _source_digest(path)
+            for path in spack.util.classes.source_files(pkg_cls)]
+
+    solver_dir = os.path.dirname(__file__)
+    solver_files = [os.path.splitext(__file__)[0] + '.py',
+                    os.path.join(solver_dir, 'concretize.lp'),
+                    os.path.join(solver_dir, 'display.lp')]
+
+    env = spack.environment.get_env(None, None)
+    data = sjson.dump({
+        'specs': [str(spec) for spec in specs],
+        'models': models,
+        'tests': sorted(tests) if isinstance(tests, (list, set)) else tests,
+        'packages': packages,
+        'config': dict(
+            (section, spack.config.get(section))
+            for section in ('packages', 'compilers', 'repos')),
+        'deprecated': spack.config.get('config:deprecated', False),
+        'develop': env.dev_specs if env else {},
+        'arch': str(spack.architecture.default_arch()),
+        'solver': [_source_digest(path) for path in solver_files],
+        'clingo': getattr(clingo, '__version__', None),
+    })
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def _solve_cache_entry(key):
+    return 'solve/{0}.json'.format(key)
+
+
+def _read_solve_result(key):
+    """Return the result of a solve cached under a key, or ``None``."""
+    misc_cache = spack.caches.misc_cache
+    cache_key = _solve_cache_entry(key)
+    if not misc_cache.init_entry(cache_key):
+        return None
+
+    with misc_cache.read_transaction(cache_key) as f:
+        entry = sjson.load(f)
+
+    # Mark the entry as recently used
+    os.utime(misc_cache.cache_path(cache_key), None)
+
+    result = Result()
+    result.satisfiable = True
+    result.nmodels = entry['nmodels']
+    result.criteria = entry['criteria']
+    for opt, i, roots in entry['answers']:
+        answer = {}
+        for data in roots:
+            for node in spack.spec.Spec.from_dict(data).traverse():
+                answer.setdefault(node.name, node)
+        result.answers.append((opt, i, answer))
+    return result
+
+
+def _write_solve_result(key, result):
+    """Cache the result of a satisfiable solve under a key, and evict the
+    least recently used results if the cache grows beyond its size."""
+    answers = []
+    for opt, i, answer in result.answers:
+        # Only the specs that are not dependencies of others need to be
+        # stored: the others are read back with them.
+        nodes = list(answer.values())
+        dependencies = set(
+            id(dep) for node in nodes for dep in node.dependencies())
+        roots = [node.to_dict(hash=ht.build_hash) for node in nodes
+                 if id(node) not in dependencies]
+        answers.append((opt, i, roots))
+
+    misc_cache = spack.caches.misc_cache
+    cache_key = _solve_cache_entry(key)
+    misc_cache.init_entry(cache_key)
+    with misc_cache.write_transaction(cache_key) as (old, new):
+        sjson.dump({
+            'nmodels': result.nmodels,
+            'criteria': result.criteria,
+            'answers': answers,
+        }, new)
+
+    cache_dir = os.path.dirname(misc_cache.cache_path(cache_key))
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.json'):
+            sinfo = os.stat(os.path.join(cache_dir, name))
+            entries.append((sinfo.st_mtime, sinfo.st_size, name))
+
+    size = sum(entry_size for _, entry_size, _ in entries)
+    for _, entry_size, name in sorted(entries):
+        if size <= _solve_cache_size:
+            break
+        misc_cache.remove('solve/{0}'.format(name))
+        size -= entry_size
+
+
 def solve(specs, dump=(), models=0, timers=False, stats=False, tests=False):
     """Solve for a stable model of specs.
 
+    Results of satisfiable solves are cached in the misc cache, and returned
+    from there as long as nothing they depend on changes, unless the solve
+    is dumped or timed.
+
     Arguments:
         specs (list): list of Specs to solve.
         dump (tuple): what to dump
         models (int): number of models to search (default: 0)
     """
-    driver = PyclingoDriver()
-    if "asp" in dump:
-        driver.out = sys.stdout
-
     # Check upfront that the variants are admissible
     for root in specs:
         for s in root.traverse():
@@ -1668,5 +1998,29 @@ def solve(specs, dump=(), models=0, timers=False, stats=False, tests=False):
                 continue
             spack.spec.Spec.ensure_valid_variants(s)
 
+    key = None
+    if not (dump or timers or stats):
+        try:
+            key = _solve_cache_key(specs, models, tests)
+            result = _read_solve_result(key)
+            if result is not None:
+                return result
+        except (spack.error.SpackError, IOError, OSError,
+                ValueError, KeyError) as e:
+            tty.debug('Cannot read the solve result from the cache: {0}'
+                      .format(str(e)))
+
+    driver = PyclingoDriver()
+    if "asp" in dump:
+        driver.out = sys.stdout
+
     setup = SpackSolverSetup()
-    return driver.solve(setup, specs, dump, models, timers, stats, tests)
+    result = driver.solve(setup, specs, dump, models, timers, stats, tests)
+
+    if key and result.satisfiable:
+        try:
+            _write_solve_result(key, result)
+        except (spack.error.SpackError, IOError, OSError) as e:
+            tty.debug('Cannot write the solve result to the cache: {0}'
+                      .format(str(e)))
+    return result
@@ -114,6 +114,7 @@
 import spack.util.string
 import spack.variant as vt
 import spack.version as vn
+from spack.util.string import intern_str
 
 
 if sys.version_info >= (3, 3):
@@ -124,6 +125,7 @@
 
 __all__ = [
     'Spec',
+    'SpecMatcher',
     'parse',
     'SpecParseError',
     'DuplicateDependencyError',
@@ -177,6 +179,14 @@
 #: every time we call str()
 _any_version = vn.VersionList([':'])
 
+#: Results of ``Spec.satisfies_dependencies``, by constraints of the specs
+#: compared. They depend on which packages are virtual and on what packages
+#: provide, so the cache is only valid for the repository in ``repo``.
+_satisfies_cache = {'repo': None, 'results': {}}
+
+#: Maximum number of results in ``_satisfies_cache``
+_max_satisfies_cache = 2 ** 14
+
 default_format = '{name}{@version}'
 default_format += '{%compiler.name}{@compiler.version}{compiler_flags}'
 default_format += '{variants}{arch=architecture}'
@@ -204,6 +214,8 @@ def __call__(self, match):
 
 @lang.lazy_lexicographic_ordering
 class ArchSpec(object):
+    __slots__ = ('_platform', '_os', '_target')
+
     def __init__(self, spec_or_platform_tuple=(None, None, None)):
         """ Architecture specification a package should be built with.
 
@@ -520,7 +532,8 @@ def from_dict(d):
         operating_system = d.get('platform_os', None) or d['os']
         target = spack.architecture.Target.from_dict_or_value(d['target'])
 
-        return ArchSpec((d['platform'], operating_system, target))
+        return ArchSpec((intern_str(d['platform']),
+                         intern_str(operating_system), target))
 
     def __str__(self):
         return "%s-%s-%s" % (self.platform, self.os, self.target)
@@ -541,6 +554,8 @@ class CompilerSpec(object):
        versions that a package should be built with.  CompilerSpecs have a
        name and a version list. """
 
+    __slots__ = ('name', 'versions')
+
     def __init__(self, *args):
         nargs = len(args)
         if nargs == 1:
@@ -637,7 +652,7 @@ def to_dict(self):
     @staticmethod
     def from_dict(d):
         d = d['compiler']
-        return CompilerSpec(d['name'], vn.VersionList.from_dict(d))
+        return CompilerSpec(intern_str(d['name']), vn.VersionList.from_dict(d))
 
     def __str__(self):
         out = self.name
@@ -666,6 +681,8 @@ class DependencySpec(object):
     - deptypes: list of strings, representing dependency relationships.
     """
 
+    __slots__ = ('parent', 'spec', 'deptypes')
+
     def __init__(self, parent, spec, deptypes):
         self.parent = parent
         self.spec = spec
@@ -704,6 +721,7 @@ def __str__(self):
 
 
 class FlagMap(lang.HashableMap):
+    __slots__ = ('spec',)
 
     def __init__(self, spec):
         super(FlagMap, self).__init__()
@@ -771,6 +789,7 @@ def __str__(self):
 class DependencyMap(lang.HashableMap):
     """Each spec has a DependencyMap containing specs for its dependencies.
        The DependencyMap is keyed by name. """
+    __slots__ = ()
 
     def __str__(self):
         return "{deps: %s}" % ', '.join(str(d) for d in sorted(self.values()))
@@ -1028,8 +1047,18 @@ def __init__(self, spec, name, query_parameters):
 @lang.lazy_lexicographic_ordering(set_hash=False)
 class Spec(object):
 
-    #: Cache for spec's prefix, computed lazily in the corresponding property
-    _prefix = None
+    # Specs are created by the tens of thousands when reading databases and
+    # lockfiles, so their attributes are stored in slots. Packages can still
+    # set other attributes on the specs of their dependents, which go to
+    # __dict__, created only for the specs that have any.
+    __slots__ = (
+        'name', 'versions', 'variants', 'architecture', 'compiler',
+        'compiler_flags', '_dependents', '_dependencies', 'namespace',
+        '_hash', '_build_hash', '_full_hash', '_dunder_hash', '_package',
+        '_prefix', '_normal', '_concrete', 'external_path',
+        'external_modules', '_hashes_final', 'extra_attributes',
+        '_build_spec', '__dict__'
+    )
 
     def __init__(self, spec_like=None,
                  normal=False, concrete=False, external_path=None,
@@ -1050,6 +1079,9 @@ def __init__(self, spec_like=None,
         self._full_hash = full_hash
 
         """
+        #: Cache for spec's prefix, computed lazily in the corresponding
+        #: property
+        self._prefix = None
 
         # Copy if spec_like is a Spec.
         if isinstance(spec_like, Spec):
@@ -1503,7 +1535,7 @@ def _spec_hash(self, hash):
         # TODO: curently we strip build dependencies by default.  Rethink
         # this when we move to using package hashing on all specs.
         node_dict = self.to_node_dict(hash=hash)
-        yaml_text = syaml.dump(node_dict, default_flow_style=True)
+        yaml_text = syaml.dump_flow(node_dict)
         return spack.util.hash.b32_hash(yaml_text)
 
     def _cached_hash(self, hash, length=None):
@@ -1818,8 +1850,8 @@ def from_node_dict(node):
         node = node[name]
 
         spec = Spec()
-        spec.name = name
-        spec.namespace = node.get('namespace', None)
+        spec.name = intern_str(name)
+        spec.namespace = intern_str(node.get('namespace', None))
         spec._hash = node.get('hash', None)
         spec._build_hash = node.get('build_hash', None)
         spec._full_hash = node.get('full_hash', None)
@@ -1838,7 +1870,7 @@ def from_node_dict(node):
         if 'parameters' in node:
             for name, value in node['parameters'].items():
                 if name in _valid_compiler_flags:
-                    spec.compiler_flags[name] = value
+                    spec.compiler_flags[intern_str(name)] = value
                 else:
                     spec.variants[name] = vt.MultiValuedVariant.from_node_dict(
                         name, value)
@@ -2328,7 +2360,6 @@ def feq(cfield, sfield):
                 if spec._dup(replacement, deps=False, cleardeps=False):
                     changed = True
 
-                spec._dependencies.owner = spec
                 self_index.update(spec)
                 done = False
                 break
@@ -3269,6 +3300,53 @@ def satisfies_dependencies(self, other, strict=False):
         if not other._dependencies:
             return True
 
+        # The checks below build provider indexes for both DAGs, which is
+        # costly, while the same pairs of specs are compared over and over
+        # during concretization.
+        if _satisfies_cache['repo'] is not spack.repo.path:
+            _satisfies_cache['repo'] = spack.repo.path
+            _satisfies_cache['results'] = {}
+        results = _satisfies_cache['results']
+
+        key = (self._satisfies_key(), other._satisfies_key(), strict)
+        result = results.get(key)
+        if result is None:
+            if len(results) >= _max_satisfies_cache:
+                results.clear()
+            result = self._satisfies_dependencies(other, strict)
+            results[key] = result
+        return result
+
+    def _satisfies_key(self):
+        """Hashable key with all the constraints in this DAG that
+        ``satisfies_dependencies`` looks at.
+        """
+        # The DAG hash leaves out build dependencies, the build hash doesn't
+        if self.concrete:
+            return self.build_hash()
+
+        def node_key(node):
+            compiler = node.compiler
+            if compiler is not None:
+                compiler = (compiler.name, tuple(compiler.versions))
+            return (
+                node.name,
+                node.namespace,
+                node._concrete,
+                tuple(node.versions),
+                compiler,
+                tuple((name, type(variant), variant.value)
+                      for name, variant in sorted(node.variants.items())),
+                tuple((name, tuple(flags))
+                      for name, flags in sorted(node.compiler_flags.items())),
+                str(node.architecture) if node.architecture else None,
+                tuple(sorted((name, tuple(sorted(dep.deptypes)))
+                             for name, dep in node._dependencies.items()))
+            )
+
+        return tuple(node_key(node) for node in self.traverse())
+
+    def _satisfies_dependencies(self, other, strict):
         if strict:
             # if we have no dependencies, we can't satisfy any constraints.
             if not self._dependencies:
@@ -3498,6 +3576,7 @@ def copy(self, deps=True, **kwargs):
 
         """
         clone = Spec.__new__(Spec)
+        clone._prefix = None
         clone._dup(self, deps=deps, **kwargs)
         return clone
 
@@ -4344,6 +4423,140 @@ def __hash__(self):
         return hash(lang.tuplify(self._cmp_iter))
 
 
+class SpecMatcher(object):
+    """Predicate telling whether specs satisfy a constraint, for filters that
+    check many specs against the same constraint.
+
+    ``SpecMatcher(constraint, strict)(spec)`` is the same as
+    ``spec.satisfies(constraint, strict=strict)``, but the checks on each
+    node of the constraint are worked out once, when the matcher is built.
+    Checking a concrete spec then only costs as much as the constraints
+    it has to meet. Specs that aren't concrete, and constraints that need
+    the providers of virtual packages to be checked, are delegated to
+    ``Spec.satisfies``.
+
+    The constraint must not be modified while the matcher is in use.
+    """
+
+    def __init__(self, constraint, strict=False):
+        if not isinstance(constraint, Spec):
+            constraint = Spec(constraint)
+        self.constraint = constraint
+        self.strict = strict
+        self._compile()
+
+    def _compile(self):
+        # Which packages are virtual depends on the repository
+        self._repo = spack.repo.path
+
+        constraint, strict = self.constraint, self.strict
+        self._hash = constraint.dag_hash() if constraint.concrete else None
+        self._virtual = bool(constraint.name) and constraint.virtual
+        self._checks = self._node_checks(constraint, strict)
+
+        # Concrete specs are checked strictly against the dependencies
+        # of anonymous constraints, see Spec.satisfies
+        self._deps_strict = strict or not constraint.name
+        self._deps = dict(
+            (dep.name, self._node_checks(dep, self._deps_strict))
+            for dep in constraint.traverse(root=False) if not dep.virtual)
+        self._has_deps = bool(constraint._dependencies)
+
+    @staticmethod
+    def _node_checks(node, strict):
+        """Predicates that a concrete node with the same name as ``node``
+        meets if, and only if, it satisfies ``node`` (without looking at
+        dependencies).
+        """
+        checks = []
+
+        namespace = node.namespace
+        if namespace is not None:
+            checks.append(
+                lambda s: s.namespace is None or s.namespace == namespace)
+
+        versions = node.versions
+        if not versions:
+            if strict:
+                checks.append(lambda s: not s.versions)
+        elif versions != _any_version:
+            checks.append(lambda s: (
+                s.versions.satisfies(versions, strict=strict)
+                if s.versions else not strict))
+
+        compiler = node.compiler
+        if compiler:
+            checks.append(lambda s: (
+                s.compiler.satisfies(compiler, strict=strict)
+                if s.compiler else not strict))
+
+        # Variants and flags of concrete specs are always checked strictly
+        variants = list(node.variants.items())
+        if variants:
+            checks.append(lambda s: all(
+                name in s.variants and s.variants[name].satisfies(variant)
+                for name, variant in variants))
+
+        architecture = node.architecture
+        if architecture:
+            checks.append(lambda s: (
+                s.architecture.satisfies(architecture, strict)
+                if s.architecture else not strict))
+
+        flags = [(name, set(values))
+                 for name, values in node.compiler_flags.items()]
+        if flags:
+            checks.append(lambda s: all(
+                name in s.compiler_flags and
+                set(s.compiler_flags[name]) == values
+                for name, values in flags))
+
+        return checks
+
+    def __call__(self, spec):
+        if self._repo is not spack.repo.path:
+            self._compile()
+
+        if self._hash is not None:
+            return spec.concrete and spec.dag_hash() == self._hash
+
+        constraint = self.constraint
+        if not spec.concrete or (self._virtual and
+                                 spec.name != constraint.name):
+            return spec.satisfies(constraint, strict=self.strict)
+
+        if constraint.name and spec.name != constraint.name:
+            return False
+
+        if not all(check(spec) for check in self._checks):
+            return False
+
+        if not self._has_deps:
+            return True
+
+        # Dependencies of the constraint must be satisfied by the nodes with
+        # the same name in spec, and must all be there if checked strictly
+        nodes = {}
+        if self._deps:
+            for node in spec.traverse(root=False):
+                if node.name in self._deps:
+                    nodes[node.name] = node
+                    if len(nodes) == len(self._deps):
+                        break
+
+        for name, checks in self._deps.items():
+            node = nodes.get(name)
+            if node is None:
+                if self._deps_strict:
+                    return False
+            elif not all(check(node) for check in checks):
+                return False
+
+        # What is left to check are the providers of virtual packages
+        return spec.satisfies_dependencies(
+            constraint, strict=self._deps_strict)
+
+
 class LazySpecCache(collections.defaultdict):
     """Cache for Specs that uses a spec_like as key, and computes lazily
     the corresponding value ``Spec(spec_like``.
@@ -28,6 +28,7 @@
 import spack.config
 import spack.error
 import spack.mirror
+import spack.util.crypto
 import spack.util.lock
 import spack.fetch_strategy as fs
 import spack.util.pattern as pattern
@@ -572,6 +573,17 @@ def cache_mirror(self, mirror, stats):
         absolute_storage_path = os.path.join(
             mirror.root, self.mirror_paths.storage_path)
 
+        # An archive that doesn't match its checksum, e.g. because a previous
+        # attempt was interrupted, is fetched again
+        digest = getattr(self.default_fetcher, 'digest', None)
+        if (digest and spack.config.get('config:checksum') and
+                os.path.isfile(absolute_storage_path) and
+                not spack.util.crypto.Checker(digest).check(
+                    absolute_storage_path)):
+            tty.warn('Replacing {0} in the mirror, which does not match its '
+                     'checksum'.format(self.mirror_paths.storage_path))
+            os.remove(absolute_storage_path)
+
         if os.path.exists(absolute_storage_path):
             stats.already_existed(absolute_storage_path)
         else:
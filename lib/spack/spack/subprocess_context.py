@@ -15,6 +15,7 @@
 
 from types import ModuleType
 
+import contextlib
 import pickle
 import pydoc
 import io
@@ -38,6 +39,52 @@ def append_patch(patch):
     patches.append(patch)
 
 
+def can_fork_workers():
+    """Return whether work can be spread over a pool of worker processes.
+
+    Workers need to inherit the configuration, the repositories and the
+    objects they work on from their parent, so they are only used where
+    processes are forked, and never from within another worker (which is
+    a daemon and can't have children).
+    """
+    return not _serialize and not multiprocessing.current_process().daemon
+
+
+#: State inherited by the workers of a pool started by ``start_workers``
+worker_state = {}
+
+
+def _init_worker(state):
+    worker_state.clear()
+    worker_state.update(state)
+
+
+def start_workers(processes, **state):
+    """Start a pool of ``processes`` worker processes.
+
+    The keyword arguments are inherited by the forked workers, and available
+    to their tasks in ``worker_state``. Only the arguments and results of
+    the tasks, such as indices in a list of the state, are pickled.
+
+    Returns:
+        (multiprocessing.pool.Pool) the pool of workers
+    """
+    return multiprocessing.Pool(
+        processes=processes, initializer=_init_worker, initargs=(state,))
+
+
+@contextlib.contextmanager
+def workers(processes, **state):
+    """Context manager for a pool started by ``start_workers``, whose
+    workers are terminated on exit."""
+    pool = start_workers(processes, **state)
+    try:
+        yield pool
+    finally:
+        pool.terminate()
+        pool.join()
+
+
 def serialize(obj):
     serialized_obj = io.BytesIO()
     pickle.dump(obj, serialized_obj)
@@ -18,6 +18,7 @@
 import spack.repo
 import spack.store
 import spack.util.gpg
+import spack.util.spack_json as sjson
 import spack.util.web as web_util
 
 from spack.directory_layout import YamlDirectoryLayout
@@ -473,6 +474,60 @@ def test_generate_index_missing(monkeypatch, tmpdir, mutable_config):
     assert 'libelf' not in cache_list
 
 
+@pytest.mark.usefixtures('mock_packages', 'config')
+def test_generate_package_index_incremental(tmpdir, monkeypatch, capfd):
+    cache_dir = tmpdir.ensure('build_cache', dir=True)
+    cache_url = 'file://{0}'.format(cache_dir.strpath)
+
+    def add_to_cache(name):
+        s = Spec(name).concretized()
+        cache_dir.join(bindist.tarball_name(s, '.spec.yaml')).write(
+            s.to_yaml())
+        return s
+
+    fetched = []
+    fetch_spec_file = bindist._fetch_spec_file
+
+    def counting_fetch_spec_file(cache_prefix, file_path):
+        fetched.append(file_path)
+        return fetch_spec_file(cache_prefix, file_path)
+
+    monkeypatch.setattr(
+        bindist, '_fetch_spec_file', counting_fetch_spec_file)
+
+    add_to_cache('libelf')
+    add_to_cache('libdwarf')
+    bindist.generate_package_index(cache_url, incremental=True)
+    assert len(fetched) == 2
+
+    # Only the new spec file is fetched on the next update
+    s = add_to_cache('mpileaks')
+    del fetched[:]
+    bindist.generate_package_index(cache_url, incremental=True, shards=True)
+    assert fetched == [bindist.tarball_name(s, '.spec.yaml')]
+    incremental_index = cache_dir.join('index.json').read()
+
+    # The result is the same as regenerating the index from scratch
+    bindist.generate_package_index(cache_url)
+    assert cache_dir.join('index.json').read() == incremental_index
+
+    # The shard for mpileaks can be read on its own
+    manifest = sjson.load(cache_dir.join('index', 'manifest.json').read())
+    prefix = s.dag_hash()[:manifest['manifest']['prefix_length']]
+    assert prefix in manifest['manifest']['shards']
+    shard = sjson.load(cache_dir.join('index', prefix + '.json').read())
+    installs = shard['database']['installs']
+    assert all(dep.dag_hash() in installs for dep in s.traverse())
+
+    # Without fingerprints, all the spec files are fetched again
+    monkeypatch.setattr(web_util, 'list_url_fingerprints', lambda url: None)
+    del fetched[:]
+    capfd.readouterr()
+    bindist.generate_package_index(cache_url, incremental=True)
+    assert len(fetched) == 3
+    assert 'incremental mode is inactive' in capfd.readouterr()[1]
+
+
 def test_generate_indices_key_error(monkeypatch, capfd):
 
     def mock_list_url(url, recursive=False):
@@ -9,7 +9,11 @@
 import pytest
 
 import llnl.util.filesystem
+import spack.caches
+import spack.compiler
+import spack.compilers
 import spack.main
+import spack.util.file_cache
 import spack.version
 
 compiler = spack.main.SpackCommand('compiler')
@@ -77,6 +81,57 @@ def test_compiler_find_without_paths(no_compilers_yaml, working_env, tmpdir):
     assert 'gcc' in output
 
 
+def test_compiler_find_caches_versions(
+        no_compilers_yaml, working_env, tmpdir, monkeypatch):
+    cache = spack.util.file_cache.FileCache(str(tmpdir.join('misc-cache')))
+    monkeypatch.setattr(spack.caches, 'misc_cache', cache)
+
+    gcc = tmpdir.ensure('bin', dir=True).join('gcc')
+    gcc.write('#!/bin/sh\necho "4.5.3"\n')
+    gcc.chmod(0o700)
+    os.environ['PATH'] = str(tmpdir.join('bin'))
+
+    detected = []
+    detect_version = spack.compilers.detect_version
+
+    def _detect_version(args):
+        detected.append(args.path)
+        return detect_version(args)
+
+    monkeypatch.setattr(spack.compilers, 'detect_version', _detect_version)
+
+    def _find_compilers():
+        return set(str(c.spec) for c in spack.compilers.find_compilers())
+
+    # The executable is run once for each operating system
+    assert _find_compilers() == set(['gcc@4.5.3'])
+    assert set(detected) == set([str(gcc)])
+    runs = len(detected)
+
+    # Unchanged executables are not run again
+    assert _find_compilers() == set(['gcc@4.5.3'])
+    assert len(detected) == runs
+
+    # Modified executables are, forgetting their output like a new process
+    gcc.write('#!/bin/sh\necho "10.2.0"\n')
+    spack.compiler._get_compiler_version_output.cache.clear()
+    assert _find_compilers() == set(['gcc@10.2.0'])
+    assert len(detected) == 2 * runs
+
+    # Failed detections are only cached for a while
+    gcc.write('#!/bin/sh\nexit 1\n')
+    spack.compiler._get_compiler_version_output.cache.clear()
+    assert not _find_compilers()
+    assert len(detected) == 3 * runs
+
+    assert not _find_compilers()
+    assert len(detected) == 3 * runs
+
+    monkeypatch.setattr(spack.compilers, '_failed_detection_ttl', 0)
+    assert not _find_compilers()
+    assert len(detected) == 4 * runs
+
+
 @pytest.mark.regression('17589')
 def test_compiler_find_no_apple_gcc(no_compilers_yaml, working_env, tmpdir):
     with tmpdir.as_cwd():
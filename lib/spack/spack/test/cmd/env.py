@@ -11,11 +11,14 @@
 import llnl.util.filesystem as fs
 import llnl.util.link_tree
 
+import spack.config
+import spack.error
 import spack.hash_types as ht
 import spack.modules
 import spack.environment as ev
 
 from spack.cmd.env import _env_create
+from spack.filesystem_view import YamlFilesystemView
 from spack.spec import Spec
 from spack.main import SpackCommand, SpackCommandError
 from spack.stage import stage_prefix
@@ -50,7 +53,8 @@ def check_mpileaks_and_deps_in_view(viewdir):
 def check_viewdir_removal(viewdir):
     """Check that the uninstall/removal worked."""
     assert (not os.path.exists(str(viewdir.join('.spack'))) or
-            os.listdir(str(viewdir.join('.spack'))) == ['projections.yaml'])
+            set(os.listdir(str(viewdir.join('.spack')))) <= set(
+                ['projections.yaml', os.path.basename(ev.view_manifest_path)]))
 
 
 @pytest.fixture()
@@ -1248,6 +1252,43 @@ def test_env_updates_view_force_remove(
     check_viewdir_removal(view_dir)
 
 
+def test_env_updates_view_incrementally(
+        tmpdir, mock_stage, mock_fetch, install_mockery, monkeypatch):
+    view_dir = tmpdir.join('view')
+    env('create', '--with-view=%s' % view_dir, 'test')
+    with ev.read('test'):
+        install('--fake', 'libelf')
+
+    manifest = view_dir.join(ev.view_manifest_path)
+    assert os.path.exists(str(manifest))
+
+    # Only the specs missing from the current view are linked
+    added = []
+    add_specs = YamlFilesystemView.add_specs
+
+    def _add_specs(self, *specs, **kwargs):
+        added.extend(s.name for s in specs)
+        return add_specs(self, *specs, **kwargs)
+
+    monkeypatch.setattr(YamlFilesystemView, 'add_specs', _add_specs)
+    with ev.read('test'):
+        install('--fake', 'mpileaks')
+
+    check_mpileaks_and_deps_in_view(view_dir)
+    assert os.path.exists(str(view_dir.join('.spack', 'libelf')))
+    assert 'mpileaks' in added
+    assert 'libelf' not in added
+
+    with ev.read('test'):
+        remove('mpileaks')
+        concretize()
+
+    assert not os.path.exists(str(view_dir.join('.spack', 'mpileaks')))
+    assert os.path.exists(str(view_dir.join('.spack', 'libelf')))
+    hashes = sjson.load(manifest.read())['specs']
+    assert sorted(hashes) == [Spec('libelf').concretized().dag_hash()]
+
+
 def test_env_activate_view_fails(
         tmpdir, mock_stage, mock_fetch, install_mockery, env_deactivate):
     """Sanity check on env activate to make sure it requires shell support"""
@@ -2561,3 +2602,27 @@ def test_multiple_modules_post_env_hook(tmpdir, install_mockery, mock_fetch):
 
     assert view_prefix not in full_contents
     assert spec.prefix in full_contents
+
+
+def test_concretize_user_specs_separately_in_parallel():
+    specs = ['mpileaks', 'libelf', 'dyninst', 'callpath ^mpich2']
+
+    def concretize(name, jobs):
+        e = ev.create(name)
+        for spec in specs:
+            e.add(spec)
+        with spack.config.override('config:concretize_jobs', jobs):
+            return dict((str(user_spec), concrete.dag_hash())
+                        for user_spec, concrete in e.concretize())
+
+    assert concretize('parallel', 3) == concretize('serial', 1)
+
+
+def test_concretize_separately_in_parallel_error():
+    e = ev.create('parallel')
+    e.add('libelf')
+    e.add('mpileaks %foo@1.0')
+
+    with spack.config.override('config:concretize_jobs', 2):
+        with pytest.raises(spack.error.SpackError):
+            e.concretize()
@@ -6,8 +6,11 @@
 
 import os
 import os.path
+import time
 
 import spack
+import spack.caches
+import spack.util.file_cache
 from spack.spec import Spec
 from spack.cmd.external import ExternalPackageEntry
 from spack.main import SpackCommand
@@ -267,3 +270,105 @@ def test_use_tags_for_detection(
     assert 'The following specs have been' in output
     assert 'cmake' in output
     assert 'openssl' not in output
+
+
+@pytest.fixture()
+def detection_cache(tmpdir, monkeypatch):
+    cache = spack.util.file_cache.FileCache(str(tmpdir.join('misc-cache')))
+    monkeypatch.setattr(spack.caches, 'misc_cache', cache)
+    return cache
+
+
+def test_detection_results_are_cached(
+        mock_executable, detection_cache, monkeypatch):
+    pkgs_to_check = [spack.repo.get('cmake')]
+    cmake_path = mock_executable("cmake", output='echo "cmake version 1.foo"')
+    system_path_to_exe = {cmake_path: 'cmake'}
+
+    def _get_specs():
+        pkg_to_entries = spack.cmd.external._get_external_packages(
+            pkgs_to_check, system_path_to_exe, jobs=1)
+        return [e.spec for e in pkg_to_entries['cmake']]
+
+    assert _get_specs() == [Spec('cmake@1.foo')]
+
+    # The executable is not run again while it doesn't change
+    calls = []
+    cmake_cls = spack.repo.path.get_pkg_class('cmake')
+    determine_version = cmake_cls.determine_version
+
+    def _determine_version(cls, exe):
+        calls.append(exe)
+        return determine_version(exe)
+
+    monkeypatch.setattr(
+        cmake_cls, 'determine_version', classmethod(_determine_version))
+    assert _get_specs() == [Spec('cmake@1.foo')]
+    assert not calls
+
+    # A new executable at the same path is run
+    os.remove(cmake_path)
+    mock_executable("cmake", output='echo "cmake version 3.17.2"')
+    assert _get_specs() == [Spec('cmake@3.17.2')]
+    assert calls == [cmake_path]
+
+
+def test_detection_timeout(mock_executable, detection_cache):
+    pkgs_to_check = [spack.repo.get('cmake')]
+    fast_path = mock_executable(
+        "cmake", output='echo "cmake version 1.foo"', subdir=('fast', 'bin'))
+    slow_path = mock_executable(
+        "cmake", output='sleep 30; echo "cmake version 2.foo"',
+        subdir=('slow', 'bin'))
+    system_path_to_exe = {fast_path: 'cmake', slow_path: 'cmake'}
+
+    pkg_to_entries = spack.cmd.external._get_external_packages(
+        pkgs_to_check, system_path_to_exe, jobs=2, timeout=2)
+
+    assert [e.spec for e in pkg_to_entries['cmake']] == [Spec('cmake@1.foo')]
+
+    # Detections that timed out are not cached
+    detected = spack.cmd.external._read_detection_cache()
+    assert sorted(detected) == [
+        'cmake:{0}'.format(os.path.dirname(fast_path))]
+
+
+def test_detection_timeout_is_not_cumulative(
+        mock_executable, detection_cache, monkeypatch):
+    pkgs_to_check = [spack.repo.get('cmake')]
+    system_path_to_exe = {}
+    for i in range(4):
+        path = mock_executable(
+            "cmake", output='sleep 30; echo "cmake version 2.foo"',
+            subdir=('slow{0}'.format(i), 'bin'))
+        system_path_to_exe[path] = 'cmake'
+
+    warnings = []
+    monkeypatch.setattr(spack.cmd.external.tty, 'warn', warnings.append)
+
+    # Detections time out from the time they start, and the ones queued
+    # behind stuck workers are started by the workers replacing them
+    pkg_to_entries = spack.cmd.external._get_external_packages(
+        pkgs_to_check, system_path_to_exe, jobs=2, timeout=1)
+    assert not pkg_to_entries.get('cmake')
+    assert len(warnings) == 4
+    assert all('after 1 seconds' in w for w in warnings)
+
+
+def test_detection_timeout_kills_executables(
+        mock_executable, detection_cache, tmpdir):
+    pkgs_to_check = [spack.repo.get('cmake')]
+    fast_path = mock_executable(
+        "cmake", output='echo "cmake version 1.foo"', subdir=('fast', 'bin'))
+    done = tmpdir.join('done')
+    slow_path = mock_executable(
+        "cmake", output='sleep 2; touch {0}'.format(done),
+        subdir=('slow', 'bin'))
+    system_path_to_exe = {fast_path: 'cmake', slow_path: 'cmake'}
+
+    spack.cmd.external._get_external_packages(
+        pkgs_to_check, system_path_to_exe, jobs=2, timeout=1)
+
+    # The executable of the detection that was given up doesn't outlive it
+    time.sleep(2)
+    assert not done.exists()
@@ -19,6 +19,7 @@
 import spack.compilers as compilers
 import spack.hash_types as ht
 import spack.package
+import spack.installer
 import spack.cmd.install
 from spack.error import SpackError
 from spack.spec import Spec, CompilerSpec
@@ -203,24 +204,26 @@ def test_install_overwrite(
 
     manifest = os.path.join(spec.prefix, spack.store.layout.metadata_dir,
                             spack.store.layout.manifest_file_name)
+    # Install times differ between installs
+    ignore = [manifest, spack.installer._install_times_path(spec)]
 
     assert os.path.exists(spec.prefix)
-    expected_md5 = fs.hash_directory(spec.prefix, ignore=[manifest])
+    expected_md5 = fs.hash_directory(spec.prefix, ignore=ignore)
 
     # Modify the first installation to be sure the content is not the same
     # as the one after we reinstalled
     with open(os.path.join(spec.prefix, 'only_in_old'), 'w') as f:
         f.write('This content is here to differentiate installations.')
 
-    bad_md5 = fs.hash_directory(spec.prefix, ignore=[manifest])
+    bad_md5 = fs.hash_directory(spec.prefix, ignore=ignore)
 
     assert bad_md5 != expected_md5
 
     install('--overwrite', '-y', 'libdwarf')
 
     assert os.path.exists(spec.prefix)
-    assert fs.hash_directory(spec.prefix, ignore=[manifest]) == expected_md5
-    assert fs.hash_directory(spec.prefix, ignore=[manifest]) != bad_md5
+    assert fs.hash_directory(spec.prefix, ignore=ignore) == expected_md5
+    assert fs.hash_directory(spec.prefix, ignore=ignore) != bad_md5
 
 
 def test_install_overwrite_not_installed(
@@ -254,16 +257,20 @@ def test_install_overwrite_multiple(
                                spack.store.layout.metadata_dir,
                                spack.store.layout.manifest_file_name)
 
+    ld_ignore = [ld_manifest, spack.installer._install_times_path(libdwarf)]
+
     assert os.path.exists(libdwarf.prefix)
     expected_libdwarf_md5 = fs.hash_directory(libdwarf.prefix,
-                                              ignore=[ld_manifest])
+                                              ignore=ld_ignore)
 
     cm_manifest = os.path.join(cmake.prefix,
                                spack.store.layout.metadata_dir,
                                spack.store.layout.manifest_file_name)
 
+    cm_ignore = [cm_manifest, spack.installer._install_times_path(cmake)]
+
     assert os.path.exists(cmake.prefix)
-    expected_cmake_md5 = fs.hash_directory(cmake.prefix, ignore=[cm_manifest])
+    expected_cmake_md5 = fs.hash_directory(cmake.prefix, ignore=cm_ignore)
 
     # Modify the first installation to be sure the content is not the same
     # as the one after we reinstalled
@@ -272,8 +279,8 @@ def test_install_overwrite_multiple(
     with open(os.path.join(cmake.prefix, 'only_in_old'), 'w') as f:
         f.write('This content is here to differentiate installations.')
 
-    bad_libdwarf_md5 = fs.hash_directory(libdwarf.prefix, ignore=[ld_manifest])
-    bad_cmake_md5 = fs.hash_directory(cmake.prefix, ignore=[cm_manifest])
+    bad_libdwarf_md5 = fs.hash_directory(libdwarf.prefix, ignore=ld_ignore)
+    bad_cmake_md5 = fs.hash_directory(cmake.prefix, ignore=cm_ignore)
 
     assert bad_libdwarf_md5 != expected_libdwarf_md5
     assert bad_cmake_md5 != expected_cmake_md5
@@ -282,8 +289,8 @@ def test_install_overwrite_multiple(
     assert os.path.exists(libdwarf.prefix)
     assert os.path.exists(cmake.prefix)
 
-    ld_hash = fs.hash_directory(libdwarf.prefix, ignore=[ld_manifest])
-    cm_hash = fs.hash_directory(cmake.prefix, ignore=[cm_manifest])
+    ld_hash = fs.hash_directory(libdwarf.prefix, ignore=ld_ignore)
+    cm_hash = fs.hash_directory(cmake.prefix, ignore=cm_ignore)
     assert ld_hash == expected_libdwarf_md5
     assert cm_hash == expected_cmake_md5
     assert ld_hash != bad_libdwarf_md5
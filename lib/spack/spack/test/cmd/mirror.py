@@ -92,6 +92,28 @@ def test_mirror_skip_unstable(tmpdir_factory, mock_packages, config,
             set(['trivial-pkg-with-valid-hash']))
 
 
+def test_mirror_replaces_corrupted_archive(
+        tmpdir_factory, mock_packages, config, source_for_pkg_with_hash):
+    mirror_dir = str(tmpdir_factory.mktemp('mirror-dir'))
+    specs = [spack.spec.Spec('trivial-pkg-with-valid-hash').concretized()]
+    spack.mirror.create(mirror_dir, specs)
+
+    # An archive matching its checksum is not fetched again
+    present, mirrored, error = spack.mirror.create(mirror_dir, specs)
+    assert present == specs and not mirrored and not error
+
+    archive = os.path.join(
+        mirror_dir, 'trivial-pkg-with-valid-hash',
+        'trivial-pkg-with-valid-hash-1.0')
+    with open(archive, 'w') as f:
+        f.write('truncated')
+
+    present, mirrored, error = spack.mirror.create(mirror_dir, specs)
+    assert mirrored == specs and not present and not error
+    with open(archive) as f:
+        assert f.read() == specs[0].package.hashed_content
+
+
 class MockMirrorArgs(object):
     def __init__(self, specs=None, all=False, file=None,
                  versions_per_spec=None, dependencies=False,
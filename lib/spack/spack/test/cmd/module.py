@@ -11,6 +11,7 @@
 import spack.config
 import spack.main
 import spack.modules
+import spack.package
 import spack.store
 
 module = spack.main.SpackCommand('module')
@@ -99,6 +100,58 @@ def test_remove_and_add(database, module_type):
         assert os.path.exists(item)
 
 
+@pytest.mark.db
+def test_refresh_writes_outdated_modules(database, monkeypatch):
+    """Tests only the module files whose inputs changed since they were
+    written are written again."""
+    module('tcl', 'refresh', '-y', '-j', '2', 'libelf')
+    assert all(os.path.exists(x) for x in _module_files('tcl', 'libelf'))
+
+    written = []
+
+    def _write(writer, overwrite=False):
+        written.append(writer.spec.name)
+
+    writer_cls = spack.modules.module_types['tcl']
+    monkeypatch.setattr(writer_cls, 'write', _write)
+
+    module('tcl', 'refresh', '-y', '-j', '1', 'libelf')
+    assert not written
+
+    module_set = dict(spack.config.get('modules:default'))
+    module_set['tcl'] = {'all': {'environment': {'set': {'FOO': 'bar'}}}}
+    with spack.config.override('modules:default', module_set):
+        module('tcl', 'refresh', '-y', '-j', '1', 'libelf')
+    assert written == ['libelf']
+
+    # Settings outside of the module set are inputs too
+    with spack.config.override('modules:prefix_inspections',
+                               {'bin': ['PATH'], 'foo': ['FOO']}):
+        module('tcl', 'refresh', '-y', '-j', '1', 'libelf')
+    assert written == ['libelf'] * 2
+
+    # ... and so are the source files of the base classes of the packages
+    file_hash = spack.modules.common._file_hash
+
+    def _file_hash(path, cache):
+        if path == spack.package.__file__.replace('.pyc', '.py'):
+            return 'changed'
+        return file_hash(path, cache)
+
+    monkeypatch.setattr(spack.modules.common, '_file_hash', _file_hash)
+    module('tcl', 'refresh', '-y', '-j', '1', 'libelf')
+    assert written == ['libelf'] * 3
+
+    # Module files whose inputs can't be hashed are always written
+    def _inputs_hash(writer, cache):
+        raise ValueError('cannot hash the inputs')
+
+    monkeypatch.setattr(writer_cls, 'inputs_hash', _inputs_hash)
+    module('tcl', 'refresh', '-y', '-j', '1', 'libelf')
+    module('tcl', 'refresh', '-y', '-j', '1', 'libelf')
+    assert written == ['libelf'] * 5
+
+
 @pytest.mark.db
 @pytest.mark.parametrize('cli_args', [
     ['libelf'],
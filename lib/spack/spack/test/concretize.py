@@ -12,7 +12,9 @@
 import llnl.util.lang
 
 import spack.architecture
+import spack.caches
 import spack.concretize
+import spack.config
 import spack.error
 import spack.repo
 
@@ -1244,3 +1246,114 @@ def test_deprecated_versions_not_selected(self, spec_str, expected):
 
         for abstract_spec in expected:
             assert abstract_spec in s
+
+
+class _FactsCollector(object):
+    """Solver driver collecting the facts of a solver setup."""
+    def __init__(self):
+        self.facts = []
+
+    def fact(self, head):
+        self.facts.append(str(head))
+
+    def h1(self, name):
+        pass
+
+    h2 = h1
+
+    def newline(self):
+        pass
+
+
+def test_package_facts_cache(mutable_config, mock_packages, tmpdir,
+                             monkeypatch):
+    """Test the facts of packages are replayed from the misc cache."""
+    import spack.solver.asp as asp
+    import spack.util.file_cache
+
+    monkeypatch.setattr(spack.caches, 'misc_cache',
+                        spack.util.file_cache.FileCache(str(tmpdir)))
+
+    def setup():
+        # Read the facts from the misc cache, not from memory
+        monkeypatch.setattr(asp, '_package_facts', {})
+        setup = asp.SpackSolverSetup()
+        driver = _FactsCollector()
+        setup.setup(driver, [Spec('mpileaks ^mpich')])
+        return setup, driver.facts
+
+    generated_setup, generated = setup()
+    assert tmpdir.join('asp', 'mpileaks.json').check()
+
+    def _record(*args):
+        raise AssertionError('package facts were not replayed')
+
+    record_package_facts = asp.SpackSolverSetup.record_package_facts
+    asp.SpackSolverSetup.record_package_facts = _record
+    try:
+        replayed_setup, replayed = setup()
+    finally:
+        asp.SpackSolverSetup.record_package_facts = record_package_facts
+
+    assert replayed == generated
+    for attr in ('version_constraints', 'target_constraints',
+                 'compiler_version_constraints', 'variant_values_from_specs'):
+        assert getattr(replayed_setup, attr) == getattr(generated_setup, attr)
+
+    # Package preferences invalidate the cached facts
+    spack.config.set('packages:mpileaks', {'version': ['2.2']})
+    _, preferred = setup()
+    assert 'preferred_version_declared("mpileaks", "2.2", -1)' in preferred
+
+
+def test_solve_result_cache(mutable_config, mock_packages, tmpdir,
+                            monkeypatch):
+    """Test satisfiable solve results are returned from the misc cache."""
+    import spack.solver.asp as asp
+    import spack.util.file_cache
+
+    monkeypatch.setattr(spack.caches, 'misc_cache',
+                        spack.util.file_cache.FileCache(str(tmpdir)))
+
+    class _Driver(object):
+        """Solver driver concretizing with the original concretizer."""
+        solves = 0
+
+        def solve(self, setup, specs, *args):
+            _Driver.solves += 1
+            result = asp.Result()
+            result.satisfiable = True
+            result.criteria = ['version weight']
+            answer = {}
+            for spec in specs:
+                for node in spec.concretized().traverse():
+                    answer[node.name] = node
+            result.answers.append(([0], 0, answer))
+            return result
+
+    monkeypatch.setattr(asp, 'PyclingoDriver', _Driver)
+
+    specs = [Spec('mpileaks ^mpich')]
+    solved = asp.solve(specs)
+    cached = asp.solve(specs)
+    assert _Driver.solves == 1
+
+    _, _, solved_answer = solved.answers[0]
+    _, _, cached_answer = cached.answers[0]
+    assert cached.criteria == solved.criteria
+    assert sorted(cached_answer) == sorted(solved_answer)
+    for name, spec in solved_answer.items():
+        assert cached_answer[name].concrete
+        assert cached_answer[name].dag_hash() == spec.dag_hash()
+
+    # Dumping the solve bypasses the cache, and so does a config change
+    asp.solve(specs, timers=True)
+    assert _Driver.solves == 2
+    spack.config.set('packages:mpileaks', {'version': ['2.2']})
+    asp.solve(specs)
+    assert _Driver.solves == 3
+
+    # The least recently used results are evicted beyond the cache size
+    monkeypatch.setattr(asp, '_solve_cache_size', 1)
+    asp.solve([Spec('libelf')])
+    assert tmpdir.join('solve').listdir(lambda p: p.ext == '.json') == []
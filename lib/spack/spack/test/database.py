@@ -9,7 +9,9 @@
 """
 import datetime
 import functools
+import gc
 import os
+import sys
 import pytest
 import json
 try:
@@ -506,6 +508,36 @@ def test_026_reindex_after_deprecate(mutable_database):
     _check_db_sanity(mutable_database)
 
 
+def test_027_reindex_corrupt_record(mutable_database):
+    """Make sure reindex rebuilds a database with a corrupt record."""
+    with open(mutable_database._index_path) as f:
+        index = json.load(f)
+    record = next(iter(index['database']['installs'].values()))
+    node = next(iter(record['spec'].values()))
+    node['arch'] = 5
+    with open(mutable_database._index_path, 'w') as f:
+        json.dump(index, f)
+
+    spack.store.store.reindex()
+    _check_db_sanity(mutable_database)
+
+
+def test_028_read_malformed_record(mutable_database):
+    """Make sure a record that can't be indexed is reported as corrupt."""
+    with open(mutable_database._index_path) as f:
+        index = json.load(f)
+    record = next(iter(index['database']['installs'].values()))
+    node = next(iter(record['spec'].values()))
+    node['compiler'] = 5
+    with open(mutable_database._index_path, 'w') as f:
+        json.dump(index, f)
+
+    db = spack.database.Database(mutable_database.root)
+    with pytest.raises(spack.database.CorruptDatabaseError):
+        with db.read_transaction():
+            pass
+
+
 class ReadModify(object):
     """Provide a function which can execute in a separate process that removes
     a spec from the database.
@@ -893,3 +925,193 @@ def _raise(db, spec):
     with pytest.raises(Exception):
         with spack.store.db.prefix_write_lock(s):
             assert False
+
+
+def test_database_decodes_records_lazily(database):
+    """Specs are decoded from the index only when their record is used."""
+    db = spack.database.Database(database.root)
+    with db.read_transaction():
+        assert not any(db._data.decoded(h) for h in db._data)
+
+        mpileaks = db.query_one('mpileaks ^mpich')
+        assert mpileaks == database.query_one('mpileaks ^mpich')
+
+        # Only the mpileaks records and their dependencies were decoded
+        decoded = set(h for h in db._data if db._data.decoded(h))
+        assert decoded == set(
+            s.dag_hash() for x in db.query('mpileaks', installed=any)
+            for s in x.traverse())
+        assert len(decoded) < len(db._data)
+
+        # Dependents are decoded when they are asked for
+        callpath = mpileaks['callpath']
+        dependents = db.installed_relatives(callpath, 'parents')
+        expected = database.installed_relatives(callpath, 'parents')
+        assert dependents == expected
+        assert len(dependents) == 1
+
+
+def test_query_narrowed_through_indexes(mutable_database):
+    """Queries narrowed through the indexes give the same results as a
+    check of every record in the database."""
+    def check_queries():
+        for query_spec, installed, explicit in [
+                ('mpileaks', True, any),
+                ('mpi', any, any),
+                ('%gcc', True, True),
+                (any, False, any),
+                (any, any, False),
+                ('callpath ^mpich', any, True)]:
+            with mutable_database.read_transaction():
+                expected = [
+                    rec.spec for rec in mutable_database._data.values()
+                    if rec.install_type_matches(installed) and
+                    (explicit is any or rec.explicit == explicit) and
+                    (query_spec is any or
+                     rec.spec.satisfies(query_spec, strict=True))]
+                results = mutable_database.query(
+                    query_spec, installed=installed, explicit=explicit)
+            assert sorted(results) == sorted(expected)
+
+    check_queries()
+
+    # The indexes follow the changes of the records
+    callpath = mutable_database.query_one('callpath ^mpich')
+    mutable_database.mark(callpath, 'explicit', True)
+    mutable_database.remove(callpath)
+    mutable_database.remove('mpileaks ^zmpi')
+    assert mutable_database.query('callpath ^mpich', explicit=True,
+                                  installed=False) == [callpath]
+    check_queries()
+
+
+def test_database_journal(mutable_database, monkeypatch):
+    """In journal mode, writes append to the journal and readers replay it
+    on top of the index."""
+    monkeypatch.setattr(mutable_database, 'journal', True)
+    with open(mutable_database._index_path) as f:
+        index = f.read()
+
+    mutable_database.remove('mpileaks ^zmpi')
+    mutable_database.mark('callpath ^mpich', 'explicit', True)
+
+    with open(mutable_database._index_path) as f:
+        assert f.read() == index
+    journal = mutable_database._journal_path
+    assert os.path.isfile(journal)
+
+    def check_replayed():
+        db = spack.database.Database(mutable_database.root)
+        for kwargs in ({'installed': any}, {'explicit': True}):
+            assert db.query(**kwargs) == mutable_database.query(**kwargs)
+        return db
+
+    assert not check_replayed().query('mpileaks ^zmpi', installed=any)
+
+    # An incomplete entry left behind by a failed write is ignored
+    with open(journal, 'a') as f:
+        f.write('{"hash": "abcdef')
+    check_replayed()
+
+    # Writes compact the journal once it grows too large
+    monkeypatch.setattr(spack.database, '_db_journal_max_entries', 1)
+    mutable_database.mark('callpath ^mpich', 'explicit', False)
+    assert not os.path.exists(journal)
+    check_replayed()
+
+    # ... and reindex always compacts it
+    monkeypatch.setattr(spack.database, '_db_journal_max_entries', 1000)
+    mutable_database.mark('callpath ^mpich', 'explicit', True)
+    assert os.path.isfile(journal)
+    mutable_database.reindex(spack.store.layout)
+    assert not os.path.exists(journal)
+    check_replayed()
+
+
+def test_database_journal_write_after_incomplete_entry(
+        mutable_database, monkeypatch):
+    """Writes following a failed one are not lost when the journal is
+    replayed."""
+    monkeypatch.setattr(mutable_database, 'journal', True)
+    mutable_database.mark('callpath ^mpich', 'explicit', True)
+
+    # A failed write leaves an incomplete entry behind
+    journal = mutable_database._journal_path
+    with open(journal, 'a') as f:
+        f.write('{"hash": "abcdef')
+
+    mutable_database.remove('mpileaks ^zmpi')
+
+    # The incomplete entry was dropped instead of swallowing the next one
+    with open(journal) as f:
+        entries = [json.loads(line) for line in f]
+    assert len(entries) > 1
+
+    # Read the journal without compacting it
+    db = spack.database.Database(mutable_database.root)
+    assert not db.query('mpileaks ^zmpi', installed=any)
+    assert db.query('callpath ^mpich', explicit=True)
+    assert os.path.isfile(journal)
+
+
+def _replicate_index(db, copies, path):
+    """Write to ``path`` an index.json holding ``copies`` copies of the
+    records of ``db``, with different hashes."""
+    with open(db._index_path) as f:
+        index = json.load(f)
+
+    digits = 'abcdefghijklmnopqrstuvwxyz234567'
+    installs = {}
+    for i in range(copies):
+        suffix = ''.join(digits[(i >> (5 * j)) % 32] for j in range(6))
+        for dag_hash, record in index['database']['installs'].items():
+            record = json.loads(json.dumps(record))
+            node = next(iter(record['spec'].values()))
+            for dep in node.get('dependencies', {}).values():
+                dep['hash'] = dep['hash'][:-6] + suffix
+            installs[dag_hash[:-6] + suffix] = record
+    index['database']['installs'] = installs
+
+    os.makedirs(os.path.join(path, '.spack-db'))
+    with open(os.path.join(path, '.spack-db', 'index.json'), 'w') as f:
+        json.dump(index, f)
+
+
+@pytest.mark.maybeslow
+@pytest.mark.skipif(sys.version_info < (3, 4),
+                    reason="tracemalloc is not available")
+def test_database_memory_benchmark(database, tmpdir):
+    """Test the memory used by the specs of a large database stays low."""
+    import tracemalloc  # novm
+
+    copies = 200
+    _replicate_index(database, copies, str(tmpdir))
+    db = spack.database.Database(str(tmpdir))
+
+    def _memory_used(function):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = function()
+            gc.collect()
+            used, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return used, result
+
+    def _read_index():
+        with open(db._index_path) as f:
+            return json.load(f)
+
+    def _query():
+        with db.read_transaction():
+            return db.query_local(installed=any)
+
+    # The baseline is the memory used by the parsed JSON of the records
+    json_used, _ = _memory_used(_read_index)
+    used, records = _memory_used(_query)
+    assert len(records) == copies * len(database.query_local(installed=any))
+
+    # Records took about 10% more memory than their JSON before spec nodes
+    # had slots, and about 20% less since
+    assert used < 0.9 * json_used
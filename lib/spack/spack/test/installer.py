@@ -1078,6 +1078,9 @@ def _requeued(installer, task):
     const_arg = installer_args(['b'], {})
     installer = create_installer(const_arg)
 
+    # Don't lock packages to fetch their sources ahead of their builds
+    monkeypatch.setattr(inst.PackageInstaller, '_start_prefetch', _none)
+
     # Ensure never acquire a lock
     monkeypatch.setattr(inst.PackageInstaller, '_ensure_locked', _not_locked)
 
@@ -1111,6 +1114,9 @@ def _prep(installer, task):
     def _requeued(installer, task):
         tty.msg('requeued {0}' .format(inst.package_id(task.pkg)))
 
+    # Don't lock packages to fetch their sources ahead of their builds
+    monkeypatch.setattr(inst.PackageInstaller, '_start_prefetch', _none)
+
     # Flag the package as installed
     monkeypatch.setattr(inst.PackageInstaller, '_prepare_for_install', _prep)
 
@@ -1143,6 +1149,9 @@ def _prep(installer, task):
     def _requeued(installer, task):
         tty.msg('requeued {0}' .format(task.pkg.spec.name))
 
+    # Don't lock packages to fetch their sources ahead of their builds
+    monkeypatch.setattr(inst.PackageInstaller, '_start_prefetch', _none)
+
     # Force a read lock
     monkeypatch.setattr(inst.PackageInstaller, '_ensure_locked', _read)
 
@@ -1218,3 +1227,145 @@ def test_install_skip_patch(install_mockery, mock_fetch):
 
     spec, install_args = const_arg[0]
     assert inst.package_id(spec.package) in installer.installed
+
+
+def test_install_task_background(install_mockery, monkeypatch):
+    """Test background builds share the build jobs among packages."""
+    started = {}
+
+    def _start(pkg, function, kwargs, wait=True):
+        started.update(kwargs, wait=wait)
+        return 'process'
+
+    const_arg = installer_args(['a'], {'concurrent_packages': 2})
+    installer = create_installer(const_arg)
+    task = create_build_task(installer.build_requests[0].pkg)
+
+    monkeypatch.setattr(spack.package.PackageBase, 'unit_test_check', _true)
+    monkeypatch.setattr(inst.PackageInstaller, '_setup_install_dir', _noop)
+    monkeypatch.setattr(spack.build_environment, 'start_build_process',
+                        _start)
+    monkeypatch.setattr(spack.build_environment, 'determine_number_of_jobs',
+                        lambda parallel: 7)
+
+    assert installer._install_task(task, background=True) == 'process'
+    assert not started['wait']
+    assert started['make_jobs'] == 3
+
+
+def test_install_concurrent_packages(install_mockery, mock_fetch):
+    """Test installing independent dependencies at the same time."""
+    const_arg = installer_args(['dttop'], {'concurrent_packages': 3})
+    installer = create_installer(const_arg)
+    assert installer.concurrent_packages == 3
+
+    installer.install()
+
+    spec, _ = const_arg[0]
+    assert not installer.building
+    for s in spec.traverse():
+        assert inst.package_id(s.package) in installer.installed
+        assert s.package.installed
+
+
+def test_install_times_recorded(install_mockery, mock_fetch):
+    """Test the build time of an install is recorded for later estimates."""
+    const_arg = installer_args(['a'], {})
+    installer = create_installer(const_arg)
+    installer.install()
+
+    spec, _ = const_arg[0]
+    assert os.path.exists(inst._install_times_path(spec))
+    assert inst._read_build_time(spec) >= 0.
+    assert 'a' in inst._estimate_build_times(set(['a', 'b']))
+
+
+def test_prioritize_tasks_critical_path(install_mockery, monkeypatch):
+    """Test ready tasks are ordered by their estimated critical path."""
+    # dttop depends on dtbuild1, dtlink1 and dtrun1, and the latter two
+    # have leaf dependencies (dtlink3 -> dtlink4, dtrun3 -> dtbuild3)
+    estimates = {'dtlink4': 1., 'dtbuild3': 100.}
+    monkeypatch.setattr(inst, '_estimate_build_times', lambda names: dict(
+        (name, estimates[name]) for name in names if name in estimates))
+
+    const_arg = installer_args(['dttop'], {})
+    installer = create_installer(const_arg)
+    installer._init_queue()
+
+    tasks = dict((task.pkg.name, task)
+                 for task in installer.build_tasks.values())
+    assert tasks['dtbuild3'].critical_path > tasks['dtlink4'].critical_path
+    assert tasks['dtbuild3'].critical_path > tasks['dttop'].critical_path
+
+    # The slowest leaf is started first among the tasks ready to install
+    assert installer._pop_task().pkg.name == 'dtbuild3'
+
+
+def test_prefetch_sources(install_mockery, mock_fetch):
+    """Test sources are fetched ahead of the builds, and the stages of the
+    packages that were not built are removed."""
+    const_arg = installer_args(['a'], {})
+    installer = create_installer(const_arg)
+    installer._init_queue()
+    installer._start_prefetch()
+    assert set(installer.prefetching) == set(installer.build_tasks)
+
+    for pkg_id, (task, _) in installer.prefetching.items():
+        installer._wait_for_prefetch(pkg_id)
+        assert task.pkg.stage.archive_file
+
+    installer._cleanup_prefetch()
+    assert not installer.prefetching
+    for task in installer.build_tasks.values():
+        assert not os.path.exists(task.pkg.stage.path)
+
+
+def test_prefetch_locked_elsewhere(install_mockery, mock_fetch, monkeypatch):
+    """Test the stages of packages locked by another process are neither
+    fetched nor removed."""
+    const_arg = installer_args(['a'], {})
+    installer = create_installer(const_arg)
+    installer._init_queue()
+    installer._start_prefetch()
+    for pkg_id in installer.prefetching:
+        installer._wait_for_prefetch(pkg_id)
+
+    monkeypatch.setattr(inst.PackageInstaller, '_ensure_locked', _not_locked)
+    installer._cleanup_prefetch()
+    for task in installer.build_tasks.values():
+        assert os.path.exists(task.pkg.stage.path)
+        task.pkg.stage.destroy()
+
+    installer._start_prefetch()
+    assert not installer.prefetching
+
+
+def test_prefetch_skips_binaries(install_mockery, mock_fetch, monkeypatch):
+    """Test sources of packages with a binary in a mirror are neither
+    fetched ahead of the builds nor locked."""
+    def _mirrors_for_spec(spec, full_hash_match=False, index_only=False):
+        assert index_only
+        return [{'mirror_url': 'file:///mirror', 'spec': spec}]
+
+    const_arg = installer_args(['a'], {})
+    installer = create_installer(const_arg)
+    installer._init_queue()
+    monkeypatch.setattr(spack.binary_distribution, 'get_mirrors_for_spec',
+                        _mirrors_for_spec)
+    locked = []
+    monkeypatch.setattr(inst.PackageInstaller, '_write_locked',
+                        lambda installer, pkg: locked.append(pkg))
+    installer._start_prefetch()
+    assert not installer.prefetching
+    assert not locked
+
+
+def test_prefetch_disabled(install_mockery, mock_fetch):
+    """Test sources are not fetched ahead of the builds without fetch
+    jobs."""
+    const_arg = installer_args(['a'], {})
+    installer = create_installer(const_arg)
+    installer._init_queue()
+    with spack.config.override('config:fetch_jobs', 0):
+        installer._start_prefetch()
+    assert not installer.prefetching
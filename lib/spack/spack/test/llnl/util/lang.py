@@ -155,3 +155,27 @@ def test_uniq():
     assert [1, 2, 3] == llnl.util.lang.uniq([1, 1, 1, 1, 2, 2, 2, 3, 3])
     assert [1, 2, 1] == llnl.util.lang.uniq([1, 1, 1, 1, 2, 2, 2, 1, 1])
     assert [] == llnl.util.lang.uniq([])
+
+
+def test_object_wrapper_with_slots():
+    class Slotted(object):
+        __slots__ = ('name', '__dict__')
+
+        def __init__(self, name):
+            self.name = name
+
+    class Wrapper(llnl.util.lang.ObjectWrapper):
+        def __init__(self, wrapped, query):
+            super(Wrapper, self).__init__(wrapped)
+            self.query = query
+
+    obj = Slotted('foo')
+    obj.extra = 'bar'
+    assert llnl.util.lang.slot_names(Slotted) == ['name']
+
+    wrapper = Wrapper(obj, 'baz')
+    assert isinstance(wrapper, Slotted) and isinstance(wrapper, Wrapper)
+    assert (wrapper.name, wrapper.extra, wrapper.query) == ('foo', 'bar', 'baz')
+
+    # Wrapping a wrapper works too
+    assert Wrapper(wrapper, 'qux').query == 'qux'
@@ -6,8 +6,10 @@
 import os
 
 import pytest
+
+import llnl.util.link_tree
 from llnl.util.filesystem import working_dir, mkdirp, touchp
-from llnl.util.link_tree import LinkTree
+from llnl.util.link_tree import LinkTree, MergeConflictError, scan_trees
 from spack.stage import Stage
 
 
@@ -166,3 +168,79 @@ def test_ignore(stage, link_tree):
 
         assert os.path.isfile('source/.spec')
         assert os.path.isfile('dest/.spec')
+
+
+@pytest.fixture()
+def threaded(monkeypatch):
+    """Process even the smallest batches in a pool of threads."""
+    monkeypatch.setattr(llnl.util.link_tree, 'min_parallel_items', 1)
+
+
+@pytest.mark.usefixtures('threaded')
+def test_merge_in_threads(stage, link_tree):
+    with working_dir(stage.path):
+        mkdirp('dest/c/d')
+        link_tree.merge('dest', relative=True)
+
+        check_file_link('dest/1',       'source/1')
+        check_file_link('dest/a/b/2',   'source/a/b/2')
+        check_file_link('dest/a/b/3',   'source/a/b/3')
+        check_file_link('dest/c/4',     'source/c/4')
+        check_file_link('dest/c/d/5',   'source/c/d/5')
+        check_file_link('dest/c/d/6',   'source/c/d/6')
+        check_file_link('dest/c/d/e/7', 'source/c/d/e/7')
+
+        link_tree.unmerge('dest')
+
+        assert os.path.isdir('dest/c/d')
+        assert not os.path.exists('dest/1')
+        assert not os.path.exists('dest/a')
+        assert not os.path.exists('dest/c/d/e')
+
+
+@pytest.mark.usefixtures('threaded')
+def test_merge_conflicts(stage, link_tree):
+    with working_dir(stage.path):
+        touchp('dest/1')
+        assert link_tree.find_conflict('dest') == 'dest/1'
+        with pytest.raises(MergeConflictError):
+            link_tree.merge('dest')
+
+        # existing files are skipped when conflicts are ignored
+        link_tree.merge('dest', ignore_conflicts=True)
+        assert not os.path.islink('dest/1')
+        check_file_link('dest/c/d/e/7', 'source/c/d/e/7')
+        link_tree.unmerge('dest', remove_file=lambda s, d: os.remove(d))
+
+        # a file where the source has a directory always conflicts
+        touchp('dest/c')
+        assert link_tree.find_dir_conflicts('dest', lambda x: False) == [
+            'File blocks directory: dest/c']
+        with pytest.raises(MergeConflictError):
+            link_tree.merge('dest', ignore_conflicts=True)
+
+
+def test_symlinked_directories_are_linked(stage, link_tree):
+    with working_dir(stage.path):
+        os.symlink('c', 'source/l')
+        link_tree.merge('dest')
+
+        assert os.path.islink('dest/l')
+        assert os.path.realpath('dest/l') == os.path.realpath('source/c')
+
+
+@pytest.mark.usefixtures('threaded')
+def test_scan_trees(stage):
+    with working_dir(stage.path):
+        touchp('other/a/b/8')
+        trees = [LinkTree(os.path.abspath(d)) for d in ('source', 'other')]
+        scan_trees(trees)
+
+        # the scans are used even though the trees changed since
+        touchp('other/a/b/9')
+        for tree in trees:
+            tree.merge('dest')
+
+        check_file_link('dest/a/b/2', 'source/a/b/2')
+        check_file_link('dest/a/b/8', 'other/a/b/8')
+        assert not os.path.exists('dest/a/b/9')
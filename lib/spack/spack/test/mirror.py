@@ -187,8 +187,9 @@ def successful_apply(*args, **kwargs):
         monkeypatch.setattr(spack.patch, 'apply_patch', successful_apply)
         monkeypatch.setattr(spack.caches.MirrorCache, 'store', record_store)
 
+        # The files are recorded in this process
         with spack.config.override('config:checksum', False):
-            spack.mirror.create(mirror_root, list(spec.traverse()))
+            spack.mirror.create(mirror_root, list(spec.traverse()), jobs=1)
 
         assert not (set([
             'abcd1234abcd1234abcd1234abcd1234abcd1234abcd1234abcd1234abcd1234',
@@ -224,3 +225,61 @@ def test_mirror_cache_symlinks(tmpdir):
     assert os.path.exists(link_target)
     assert (os.path.normpath(link_target) ==
             os.path.join(cache.root, reference.storage_path))
+
+
+def _mirror_files(root):
+    return sorted(
+        os.path.relpath(os.path.join(dirpath, name), root)
+        for dirpath, _, names in os.walk(root) for name in names)
+
+
+@pytest.mark.parametrize('jobs_per_host', [0, 1])
+def test_mirror_create_parallel(
+        tmpdir, mock_packages, config, monkeypatch, jobs_per_host):
+    """Test specs mirrored in parallel give the same mirror as when they
+    are mirrored one after the other."""
+    spec = Spec('patch-several-dependencies').concretized()
+    specs = list(spec.traverse())
+
+    def successful_fetch(_class):
+        with open(_class.stage.save_filename, 'w') as f:
+            f.write(_class.url)
+
+    monkeypatch.setattr(spack.fetch_strategy.URLFetchStrategy, 'fetch',
+                        successful_fetch)
+
+    results = []
+    with spack.config.override('config:checksum', False):
+        for jobs in (1, 3):
+            mirror_root = str(tmpdir.join('mirror-%d' % jobs))
+            present, mirrored, error = spack.mirror.create(
+                mirror_root, specs, jobs=jobs, jobs_per_host=jobs_per_host)
+            assert not present and not error
+            results.append((sorted(s.name for s in mirrored),
+                            _mirror_files(mirror_root)))
+
+            # Creating the mirror again leaves it unchanged
+            present, mirrored, error = spack.mirror.create(
+                mirror_root, specs, jobs=jobs, jobs_per_host=jobs_per_host)
+            assert not mirrored and not error
+            assert sorted(s.name for s in present) == results[-1][0]
+
+    assert results[0] == results[1]
+
+
+def _unpicklable_result(index):
+    return lambda: index
+
+
+def test_mirror_create_parallel_bad_result(
+        tmpdir, mock_packages, config, monkeypatch):
+    """Test specs whose results can't be sent back by the workers are
+    reported as errors, instead of being waited for forever."""
+    spec = Spec('patch-several-dependencies').concretized()
+    specs = list(spec.traverse())
+
+    monkeypatch.setattr(spack.mirror, '_add_spec_task', _unpicklable_result)
+    present, mirrored, error = spack.mirror.create(
+        str(tmpdir.join('mirror')), specs, jobs=3)
+    assert not present and not mirrored
+    assert sorted(s.name for s in error) == sorted(s.name for s in specs)
@@ -280,7 +280,11 @@ def test_replace_prefix_bin(hello_world):
     executable = hello_world(rpaths=['/usr/lib', '/usr/lib64'])
 
     # Relocate the RPATHs
-    spack.relocate._replace_prefix_bin(str(executable), {b'/usr': b'/foo'})
+    prefixes = {b'/usr': b'/foo'}
+    spack.relocate._replace_prefix_bin(
+        str(executable), re.compile(spack.relocate._prefix_regex(prefixes)),
+        prefixes
+    )
 
     # Some compilers add rpaths so ensure changes included in final result
     assert '/foo/lib:/foo/lib64' in rpaths_for(executable)
@@ -405,3 +409,124 @@ def test_relocate_text_bin_raise_if_new_prefix_is_longer(tmpdir):
         spack.relocate.relocate_text_bin(
             [fpath], {short_prefix: long_prefix}
         )
+
+
+def test_relocate_text_bin_padding(tmpdir):
+    fpath = str(tmpdir.join('fakebin'))
+    with open(fpath, 'wb') as f:
+        f.write(b'\0/old/prefix/lib\0/old/root/dep/lib\0/unrelated\0')
+    spack.relocate.relocate_text_bin([fpath], collections.OrderedDict([
+        (b'/old/prefix', b'/new'), (b'/old/root', b'/new/rt')
+    ]))
+    with open(fpath, 'rb') as f:
+        data = f.read()
+    assert data == b'\0/new////////lib\0/new/rt///dep/lib\0/unrelated\0'
+
+
+def test_relocate_text_bin_empty_file(tmpdir):
+    fpath = tmpdir.join('empty')
+    fpath.write('')
+    spack.relocate.relocate_text_bin([str(fpath)], {b'/short': b'/long'})
+    assert fpath.read() == ''
+
+
+def _sequential_relocate_text(filename, prefixes):
+    """Reference implementation that substitutes one prefix at a time."""
+    with open(filename, 'rb') as f:
+        data = f.read()
+    for orig_prefix, new_prefix in prefixes.items():
+        orig_prefix_rexp = re.compile(
+            b'(?<![\\w\\-_/])([\\w\\-_]*?)%s([\\w\\-_/]*)' %
+            re.escape(orig_prefix.encode('utf-8')))
+        data = orig_prefix_rexp.sub(
+            b'\\1%s\\2' % new_prefix.encode('utf-8'), data
+        )
+    return data
+
+
+@pytest.mark.maybeslow
+@pytest.mark.parametrize('use_processes', [False, True])
+@pytest.mark.parametrize('nprefixes,nfiles', [(10, 10), (250, 50)])
+def test_relocate_text_synthetic_prefix_tree(
+        tmpdir, nprefixes, nfiles, use_processes
+):
+    # Build a synthetic install tree where every file refers to a
+    # subset of many dependency prefixes, then check that relocating all
+    # of them in a single pass gives the same result as substituting one
+    # prefix at a time. Run with --durations to compare timings.
+    old_root, new_root = '/old/layout/root', '/the/new/root'
+    prefixes = collections.OrderedDict()
+    for i in range(nprefixes):
+        name = 'pkg{0}-1.{0}-{1:032x}'.format(i, i * 7919)
+        prefixes[os.path.join(old_root, name)] = os.path.join(new_root, name)
+    prefixes[old_root] = new_root
+
+    old_prefixes = list(prefixes)
+    files, expected = [], []
+    for i in range(nfiles):
+        lines = []
+        for j in range(0, nprefixes, 3):
+            prefix = old_prefixes[(i + j) % nprefixes]
+            lines.append('export PATH={0}/bin:$PATH'.format(prefix))
+            lines.append('-L{0}/lib -Wl,-rpath,{0}/lib64'.format(prefix))
+            lines.append('no prefix here, just some text {0}'.format(j))
+        lines.append('#!/bin/bash {0}/bin/sbang'.format(old_root))
+        fpath = str(tmpdir.join('file{0}.txt'.format(i)))
+        with open(fpath, 'w') as f:
+            f.write('\n'.join(lines))
+        files.append(fpath)
+        expected.append(_sequential_relocate_text(fpath, prefixes))
+
+    spack.relocate.relocate_text(
+        files, prefixes, concurrency=4, use_processes=use_processes
+    )
+
+    for fpath, expected_data in zip(files, expected):
+        with open(fpath, 'rb') as f:
+            data = f.read()
+        assert data == expected_data
+        assert old_root.encode('utf-8') not in data
+
+
+def test_prefilter_needles():
+    needles = spack.relocate._prefilter_needles([
+        b'/old/root/a-1.0', b'#!/bin/bash /spack/bin/sbang', b'/old/root',
+        b'/old/root/b-2.0', b'/spack'
+    ])
+    assert sorted(needles) == [b'/old/root', b'/spack']
+
+
+def test_relocate_text_skips_files_without_prefixes(tmpdir, monkeypatch):
+    untouched = tmpdir.join('untouched.txt')
+    untouched.write('/some/other/path')
+    os.utime(str(untouched), (0, 0))
+
+    # Files without any of the old prefixes are not even matched
+    class _Regex(object):
+        def search(self, data):
+            raise AssertionError('{0} was matched'.format(untouched))
+
+        sub = finditer = search
+
+    monkeypatch.setattr(spack.relocate, '_text_relocation_regex',
+                        lambda prefixes: _Regex())
+    spack.relocate.relocate_text([str(untouched)], {'/old/root': '/new'})
+
+    assert untouched.read() == '/some/other/path'
+    assert untouched.mtime() == 0
+
+
+def test_relocate_text_bin_raise_from_worker_processes(tmpdir):
+    fpaths = []
+    for i in range(3 * spack.relocate._min_chunk_size):
+        fpath = str(tmpdir.join('fakebin{0}'.format(i)))
+        with open(fpath, 'w') as f:
+            f.write('/short')
+        fpaths.append(fpath)
+
+    with pytest.raises(spack.relocate.BinaryTextReplaceError) as e:
+        spack.relocate.relocate_text_bin(
+            fpaths, {b'/short': b'/much/longer'},
+            concurrency=2, use_processes=True
+        )
+    assert '/much/longer' in str(e.value)
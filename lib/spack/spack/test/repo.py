@@ -6,8 +6,11 @@
 import os
 import pytest
 
+import spack.caches
 import spack.repo
 import spack.paths
+import spack.util.cpus
+import spack.util.file_cache
 
 
 @pytest.fixture()
@@ -79,3 +82,96 @@ def test_namespace_hasattr(attr_name, exists, mutable_mock_repo):
     # of a custom __getattr__ implementation
     nms = spack.repo.SpackNamespace('spack.pkg.builtin.mock')
     assert hasattr(nms, attr_name) == exists
+
+
+def test_repo_index_parallel_rebuild(mock_packages, tmpdir, monkeypatch):
+    def build_indexes(cache_dir):
+        monkeypatch.setattr(
+            spack.caches, 'misc_cache',
+            spack.util.file_cache.FileCache(str(cache_dir)))
+        repo = spack.repo.Repo(spack.paths.mock_packages_path)
+        return dict(
+            (name, repo.index[name]) for name in ('providers', 'tags',
+                                                  'patches'))
+
+    serial = build_indexes(tmpdir.join('serial'))
+
+    parallel_calls = []
+    index_in_parallel = spack.repo.RepoIndex._index_in_parallel
+
+    def _index_in_parallel(self, pkg_names):
+        parallel_calls.append(pkg_names)
+        return index_in_parallel(self, pkg_names)
+
+    monkeypatch.setattr(spack.repo, '_min_packages_for_parallel_index', 1)
+    monkeypatch.setattr(spack.util.cpus, 'cpus_available', lambda: 2)
+    monkeypatch.setattr(
+        spack.repo.RepoIndex, '_index_in_parallel', _index_in_parallel)
+    parallel = build_indexes(tmpdir.join('parallel'))
+
+    assert len(parallel_calls) == 1
+    assert parallel['providers'] == serial['providers']
+    assert parallel['patches'].index == serial['patches'].index
+    assert sorted(parallel['tags']) == sorted(serial['tags'])
+    for tag in serial['tags']:
+        assert sorted(parallel['tags'][tag]) == sorted(serial['tags'][tag])
+
+
+def test_repo_index_checks_content_of_newer_files(
+        tmpdir, monkeypatch, mutable_config
+):
+    monkeypatch.setattr(
+        spack.caches, 'misc_cache',
+        spack.util.file_cache.FileCache(str(tmpdir.join('cache'))))
+
+    repo_dir = tmpdir.join('repo')
+    repo_dir.join('repo.yaml').write(
+        'repo:\n  namespace: digest_test_repo\n', ensure=True)
+    package_template = '''\
+from spack import *
+
+
+class {0}(Package):
+    url = "http://www.example.com/{1}-1.0.tar.gz"
+    tags = ['{2}']
+
+    version('1.0', '0123456789abcdef0123456789abcdef')
+'''
+    pkg_files = {}
+    for name in ('foo', 'bar'):
+        pkg_files[name] = repo_dir.join('packages', name, 'package.py')
+        pkg_files[name].write(
+            package_template.format(name.capitalize(), name, 'old'),
+            ensure=True)
+
+    updated = []
+    update = spack.repo.TagIndexer.update
+
+    def _update(self, pkg_fullname):
+        updated.append(pkg_fullname)
+        return update(self, pkg_fullname)
+
+    monkeypatch.setattr(spack.repo.TagIndexer, 'update', _update)
+
+    def tag_index():
+        repo = spack.repo.Repo(str(repo_dir))
+        repo._pkg_checker.invalidate()
+        with spack.repo.use_repositories(repo):
+            return dict(repo.tag_index)
+
+    assert sorted(tag_index()['old']) == ['bar', 'foo']
+    assert sorted(updated) == ['digest_test_repo.bar', 'digest_test_repo.foo']
+
+    # Files with newer mtime but the same content don't need an update
+    del updated[:]
+    future = pkg_files['foo'].mtime() + 100
+    for pkg_file in pkg_files.values():
+        os.utime(str(pkg_file), (future, future))
+    tag_index()
+    assert updated == []
+
+    # Only files whose content changed are reindexed
+    pkg_files['foo'].write(package_template.format('Foo', 'foo', 'new'))
+    os.utime(str(pkg_files['foo']), (future + 100, future + 100))
+    assert tag_index() == {'old': ['bar'], 'new': ['foo']}
+    assert updated == ['digest_test_repo.foo']
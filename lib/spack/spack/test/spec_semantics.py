@@ -12,10 +12,15 @@
 from spack.variant import InvalidVariantValueError, UnknownVariantError
 from spack.variant import MultipleValuesInExclusiveVariantError
 from spack.variant import substitute_abstract_variants
+from spack.util.mock_package import MockPackageMultiRepo
+from spack.version import VersionList
 
 import spack.architecture
 import spack.directives
 import spack.error
+import spack.repo
+import spack.spec
+import spack.variant
 
 
 def make_spec(spec_like, concrete):
@@ -1083,6 +1088,69 @@ def test_satisfies_dependencies_ordered(self):
         s._add_dependency(d, ())
         assert s.satisfies('mpileaks ^zmpi ^fake', strict=True)
 
+    def test_satisfies_dependencies_after_changes(self):
+        """Results of satisfies_dependencies are reused, but not for specs
+        that changed since they were compared.
+        """
+        s = Spec('mpileaks ^mpich')
+        assert s.satisfies('mpileaks ^mpi@2:')
+        assert s.satisfies('mpileaks ^mpi@2:')
+
+        s['mpich'].versions = VersionList(['1.0'])
+        assert not s.satisfies('mpileaks ^mpi@2:')
+
+        s['mpich'].variants['foo'] = spack.variant.BoolValuedVariant(
+            'foo', True)
+        assert not s.satisfies('mpileaks ^mpich~foo')
+        assert not s.satisfies('mpileaks ^mpich~foo', strict=True)
+        assert s.satisfies('mpileaks ^mpich+foo')
+
+
+def test_satisfies_concrete_specs_differing_in_build_deps(config):
+    """Concrete specs that differ only in their build dependencies have the
+    same DAG hash, but not the same results for satisfies.
+    """
+    mock_repo = MockPackageMultiRepo()
+    b = mock_repo.add_package('b', [], [])
+    mock_repo.add_package('a', [b], [('build',)])
+
+    with spack.repo.use_repositories(mock_repo):
+        b1 = Spec('a ^b@1').concretized()
+        b2 = Spec('a ^b@2').concretized()
+        assert b1.dag_hash() == b2.dag_hash()
+
+        assert b1.satisfies('^b@1')
+        assert not b2.satisfies('^b@1')
+        assert b2.satisfies('^b@2')
+        assert not b1.satisfies('^b@2')
+
+
+def test_spec_matcher(mock_packages, config):
+    """Matchers agree with Spec.satisfies, strict or not."""
+    specs = []
+    for spec_str in ('mpileaks ^mpich', 'mpileaks ^zmpi', 'mpich',
+                     'dyninst ^libelf@0.8.12', 'libelf@0.8.13%clang',
+                     'multivalue-variant foo=bar,baz'):
+        spec = Spec(spec_str).concretized()
+        specs.extend(spec.traverse())
+    abstract = Spec('mpileaks ^mpich')
+
+    for constraint in (
+            'mpileaks', 'mpileaks@2.3', 'mpileaks@:2.2', 'mpileaks@2.3:2.4',
+            'mpileaks%gcc', 'mpileaks%gcc@4.5.0', 'mpileaks%clang',
+            '+debug', '~debug', 'mpileaks arch=test-debian6-core2',
+            'mpileaks cflags=-O2', 'mpileaks ^mpich', 'mpileaks ^zmpi',
+            'mpileaks ^mpi', 'mpileaks ^mpi@2:', 'mpileaks ^callpath@1.0',
+            '^mpich@3.0.4', '^fake', 'mpi', 'mpi@3:', 'mpich',
+            'builtin.mock.mpich', 'libelf@0.8.13%gcc',
+            'dyninst ^libelf@0.8.12', 'multivalue-variant foo=bar',
+            specs[0]):
+        for strict in (False, True):
+            matches = spack.spec.SpecMatcher(constraint, strict=strict)
+            for spec in specs + [abstract]:
+                expected = spec.satisfies(constraint, strict=strict)
+                assert matches(spec) == expected
+
 
 @pytest.mark.regression('3887')
 @pytest.mark.parametrize('spec_str', [
@@ -15,9 +15,12 @@
 
 import pytest
 
+from ordereddict_backport import OrderedDict
+
 import spack.architecture
 import spack.hash_types as ht
 import spack.spec
+import spack.util.hash
 import spack.util.spack_json as sjson
 import spack.util.spack_yaml as syaml
 import spack.version
@@ -225,6 +228,75 @@ def test_ordered_read_not_required_for_consistent_dag_hash(
             assert spec.full_hash() == round_trip_reversed_json_spec.full_hash()
 
 
+@pytest.mark.parametrize("hash_type", [
+    ht.dag_hash,
+    ht.build_hash,
+    ht.full_hash
+])
+@pytest.mark.parametrize("spec_str", [
+    'mpileaks ^zmpi',
+    'mpileaks+debug~opt ^mpich',
+    'multivalue-variant foo="bar,baz"',
+    'externaltool',
+    'externaltest',
+    'dttop',
+    'patch-several-dependencies',
+])
+def test_flow_dump_keeps_hashes(spec_str, hash_type, config, mock_packages):
+    """Spec hashes are the same as the ones computed with ruamel."""
+    spec = Spec(spec_str)
+    spec.concretize()
+
+    for node in spec.traverse():
+        node_dict = node.to_node_dict(hash=hash_type)
+        yaml_text = syaml.dump(node_dict, default_flow_style=True)
+        assert syaml.dump_flow(node_dict) == yaml_text
+
+        expected = spack.util.hash.b32_hash(yaml_text)
+        assert node._spec_hash(hash_type) == expected
+
+
+#: Scalars that ruamel writes in many different ways
+flow_scalars = [
+    '', ' a', 'a ', '~', '-', '-a', '@x', '%x', '*', '1e3', '0x1f', '1_0',
+    '12:30', '2021-01-01', 'a #b', 'a#b', 'a,b', 'a: b', 'a:', '[a]', 'a]',
+    '{a}', 'a}', '!a', '&a', 'a&', '|', '>', '?', '? a', 'a?', '=', '<<',
+    '.5', '1.', '+1', '0o7', '"a"', "'a'", 'a\\b', 'a\tb', u'\xe9',
+    'yes', 'no', 'on', 'off', 'y', 'n', 'Yes', 'NO', 'true', 'True',
+    'TRUE', 'tRUE', 'false', 'null', 'Null', 'nULL', 'a-', 'a.', 'a/b+c.d',
+    'x' * 99, 'x' * 100, 'x' * 122, 'x' * 123, 'x' * 128,
+    None, True, False, 0, -1, 2 ** 70, 1.5, 1e20,
+    float('inf'),
+]
+
+
+@pytest.mark.parametrize('scalar', flow_scalars)
+def test_flow_dump_scalars(scalar):
+    """Scalars are written by ``dump_flow`` as keys and values like ruamel
+    writes them.
+    """
+    data = syaml_dict([
+        (scalar, [scalar, (scalar,), syaml_dict([(scalar, scalar)])]),
+        ('key', {'list': [], 'dict': {}, scalar: [None]}),
+    ])
+    expected = syaml.dump(data, default_flow_style=True)
+    assert syaml.dump_flow(data) == expected
+
+
+@pytest.mark.parametrize('data', [
+    {'multiline': 'a\nb'},
+    {'ordered': OrderedDict([('a', 1)])},
+    {'set': set([1])},
+    {('a', 'b'): 1},
+    ['a', 'b'],
+    'a',
+])
+def test_flow_dump_fallback(data):
+    """Data ``dump_flow`` can't write by itself is written by ruamel."""
+    expected = syaml.dump(data, default_flow_style=True)
+    assert syaml.dump_flow(data) == expected
+
+
 @pytest.mark.parametrize("module", [
     spack.spec,
     spack.architecture,
@@ -4,6 +4,7 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
 import collections
+import hashlib
 import os
 import pytest
 import sys
@@ -207,6 +208,32 @@ def test_url_extra_fetch(tmpdir, mock_archive):
         fetcher.fetch()
 
 
+@pytest.mark.parametrize('partial', ['start', 'other', 'all', 'longer'])
+def test_url_resume(tmpdir, mock_archive, config, partial):
+    """Ensure an interrupted download is resumed, or started over if the
+    data already downloaded can't be from the same file."""
+    with open(mock_archive.archive_file, 'rb') as f:
+        data = f.read()
+    half = len(data) // 2
+    partial_data = {
+        'start': data[:half],
+        'other': b'x' * half,
+        'all': data,
+        'longer': data + b'x',
+    }[partial]
+
+    digest = crypto.checksum(hashlib.sha256, mock_archive.archive_file)
+    fetcher = fs.URLFetchStrategy(mock_archive.url, sha256=digest)
+    with Stage(fetcher, path=str(tmpdir)) as stage:
+        with open(stage.save_filename + '.part', 'wb') as f:
+            f.write(partial_data)
+        stage.fetch()
+
+        with open(fetcher.archive_file, 'rb') as f:
+            assert f.read() == data
+        assert not os.path.exists(stage.save_filename + '.part')
+
+
 @pytest.mark.parametrize('url,urls,version,expected', [
     (None,
      ['https://ftpmirror.gnu.org/autoconf/autoconf-2.69.tar.gz',
@@ -377,6 +377,27 @@ def test_intersect_with_containment():
     check_intersection('11.2', '11.2', '11')
 
 
+@pytest.mark.parametrize('a,b', [
+    (':0.2,1.1,1.3,develop', '1'),
+    ('1.1:1.3,1.5,1.7:1.9,2.1', '1.2,1.4:1.5,1.8:,2'),
+    ('0.1,0.3,1.2.3,1.6:2,3', ':0.2,1.2:1.5,2.0.1,3:'),
+    (':1.0,1.5:1.6,2.1.1', '0.5:1.5.2,1.6.3,2'),
+])
+def test_intersection_of_lists(a, b):
+    """Intersections of lists match the union of the intersections of all
+    their elements, and are symmetric.
+    """
+    a, b = VersionList(a), VersionList(b)
+    expected = VersionList()
+    for x in a:
+        for y in b:
+            expected.add(x.intersection(y))
+
+    assert a.intersection(b) == expected
+    assert b.intersection(a) == expected
+    assert a.overlaps(b) == bool(expected)
+
+
 def test_union_with_containment():
     check_union(':1.6', '1.6.5', ':1.6')
     check_union(':1.6', ':1.6', '1.6.5')
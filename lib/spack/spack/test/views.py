@@ -4,7 +4,9 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
 import os
+import pytest
 
+from llnl.util.link_tree import MergeConflictError
 from spack.spec import Spec
 from spack.directory_layout import YamlDirectoryLayout
 from spack.filesystem_view import YamlFilesystemView
@@ -41,3 +43,32 @@ def test_remove_extensions_ordered(install_mockery, mock_fetch, tmpdir):
 
     e1 = e2['extension1']
     view.remove_specs(e1, e2)
+
+
+def test_view_merge_hooks(install_mockery, mock_fetch, tmpdir, monkeypatch):
+    """Test files already in a view conflict with the files of packages
+    using the default hooks, and that overridden hooks are called."""
+    spec = Spec('extension1').concretized()
+    spec.package.do_install()
+
+    view_dir = tmpdir.join('view')
+    view_dir.ensure('bin', 'extension1')
+    layout = YamlDirectoryLayout(str(view_dir))
+    view = YamlFilesystemView(str(view_dir), layout)
+    with pytest.raises(MergeConflictError):
+        view.merge(spec)
+
+    view = YamlFilesystemView(str(view_dir), layout, ignore_conflicts=True)
+    view.merge(spec)
+    assert not view_dir.join('bin', 'extension1').islink()
+
+    merged = []
+
+    def _add_files_to_view(pkg, view, merge_map):
+        merged.extend(merge_map.values())
+
+    monkeypatch.setattr(type(spec.package), 'add_files_to_view',
+                        _add_files_to_view)
+    view_dir.join('bin', 'extension1').remove()
+    view.merge(spec)
+    assert merged == [str(view_dir.join('bin', 'extension1'))]
@@ -10,9 +10,12 @@
 import llnl.util.tty as tty
 
 import inspect
+import os
+import sys
 
 __all__ = [
-    'list_classes'
+    'list_classes',
+    'source_files'
 ]
 
 
@@ -37,3 +40,19 @@ def list_classes(parent_module, mod_path):
         classes.append(cls)
 
     return classes
+
+
+def source_files(cls):
+    """Return the source files of the modules defining a class and its
+    base classes, e.g. the package.py of a package and its build system."""
+    files = []
+    for base in cls.__mro__:
+        module = sys.modules.get(base.__module__)
+        path = getattr(module, '__file__', None)
+        if not path:
+            continue
+        if path.endswith('.pyc'):
+            path = path[:-1]
+        if path not in files and os.path.exists(path):
+            files.append(path)
+    return files
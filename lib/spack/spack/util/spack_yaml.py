@@ -18,7 +18,7 @@
 from typing import List  # novm
 
 from ordereddict_backport import OrderedDict
-from six import string_types, StringIO
+from six import integer_types, string_types, text_type, StringIO
 
 import ruamel.yaml as yaml
 from ruamel.yaml import RoundTripLoader, RoundTripDumper
@@ -222,6 +222,106 @@ def dump(obj, default_flow_style=False, stream=None):
                      Dumper=SafeDumper, stream=stream)
 
 
+#: Flow style representations of the scalars seen by ``dump_flow``, keyed
+#: by type, value and whether the scalar is a mapping key
+_flow_scalars = {}
+
+#: Maximum number of scalars whose representation is cached
+_max_flow_scalars = 2 ** 16
+
+#: Strings that are always written as plain scalars, without quotes
+_plain_str = re.compile(r'^[A-Za-z_][A-Za-z0-9_./+-]*$')
+
+#: Plain looking strings that still need quotes, as they denote booleans
+#: or null
+_quoted_plain = set(('true', 'True', 'TRUE', 'false', 'False', 'FALSE',
+                     'null', 'Null', 'NULL'))
+
+#: Scalar types that ``dump_flow`` knows how to write
+_flow_scalar_types = set(
+    [str, text_type, syaml_str, syaml_int, float, bool, type(None)] +
+    list(integer_types))
+
+
+class _NotFlowDumpable(Exception):
+    """Raised when ``dump_flow`` can't write an object by itself."""
+
+
+def _flow_scalar(value, key):
+    """Return the flow style representation of a scalar.
+
+    Representations are computed by ruamel the first time a scalar is
+    seen, so they are always the same as the ones ``dump`` would write.
+    """
+    if type(value) not in _flow_scalar_types:
+        raise _NotFlowDumpable()
+
+    # Long keys are written as explicit keys, and ruamel counts the tag
+    # of the key in its length, so leave them out of the shortcut
+    if (isinstance(value, string_types) and _plain_str.match(value) and
+            value not in _quoted_plain and (not key or len(value) < 100)):
+        return value
+
+    cache_key = (type(value), value, key)
+    text = _flow_scalars.get(cache_key)
+    if text is not None:
+        return text
+
+    if key:
+        text = dump(syaml_dict([(value, 0)]), default_flow_style=True)
+        prefix, suffix = '{', ': 0}\n'
+    else:
+        text = dump([value], default_flow_style=True)
+        prefix, suffix = '[', ']\n'
+
+    # Multiline scalars are written with an indentation that depends on
+    # where they are in the document, so leave them to ruamel
+    if (not text.startswith(prefix) or not text.endswith(suffix) or
+            text.count('\n') > 1):
+        raise _NotFlowDumpable()
+    text = text[len(prefix):-len(suffix)]
+
+    if len(_flow_scalars) >= _max_flow_scalars:
+        _flow_scalars.clear()
+    _flow_scalars[cache_key] = text
+    return text
+
+
+def _flow(obj):
+    """Return the flow style representation of an object."""
+    obj_type = type(obj)
+    if obj_type in (dict, syaml_dict):
+        return '{%s}' % ', '.join(
+            '%s: %s' % (_flow_scalar(k, True), _flow(v))
+            for k, v in obj.items())
+    elif obj_type in (list, syaml_list, tuple):
+        return '[%s]' % ', '.join(_flow(v) for v in obj)
+    return _flow_scalar(obj, False)
+
+
+def dump_flow(obj):
+    """Fast equivalent of ``dump(obj, default_flow_style=True)``.
+
+    The structure of dictionaries and lists is written directly, and
+    ruamel is only used to write each distinct scalar once, so the output
+    is byte-identical to the one of ``dump``. This is used to compute spec
+    hashes, which must not change. Objects this function doesn't know how
+    to write are passed to ``dump``.
+
+    Args:
+        obj: object to be written
+
+    Returns:
+        (str): flow style YAML representation of the object
+    """
+    if type(obj) in (dict, syaml_dict, list, syaml_list):
+        try:
+            return _flow(obj) + '\n'
+        except _NotFlowDumpable:
+            pass
+    return dump(obj, default_flow_style=True)
+
+
 def file_line(mark):
     """Format a mark as <file>:<line> information."""
     result = mark.name
@@ -3,6 +3,8 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
+import six
+
 
 def comma_list(sequence, article=''):
     if type(sequence) != list:
@@ -55,3 +57,15 @@ def plural(n, singular, plural=None, show_n=True):
         return "%s%s" % (number, plural)
     else:
         return "%s%ss" % (number, singular)
+
+
+def intern_str(value):
+    """Intern ``value`` if it is a string, otherwise return it unchanged.
+
+    Used for the strings read from spec files, like names and namespaces,
+    which are repeated across many specs.
+    """
+    if isinstance(value, str):
+        # Subclasses of str, like those read from YAML, can't be interned
+        return six.moves.intern(str(value))
+    return value
@@ -13,6 +13,7 @@
 import re
 import shutil
 import ssl
+import stat
 import sys
 import traceback
 
@@ -295,7 +296,7 @@ def _iter_s3_contents(contents, prefix):
         if key == '.':
             continue
 
-        yield key
+        yield key, entry
 
 
 def _list_s3_objects(client, bucket, prefix, num_entries, start_after=None):
@@ -353,11 +354,40 @@ def list_url(url, recursive=False):
     if url.scheme == 's3':
         s3 = s3_util.create_s3_session(url)
         if recursive:
-            return list(_iter_s3_prefix(s3, url))
+            return list(key for key, _ in _iter_s3_prefix(s3, url))
 
         return list(set(
             key.split('/', 1)[0]
-            for key in _iter_s3_prefix(s3, url)))
+            for key, _ in _iter_s3_prefix(s3, url)))
+
+
+def list_url_fingerprints(url):
+    """Return a dictionary mapping each file directly under ``url`` to a
+    string that changes whenever the file is modified.
+
+    The fingerprint is computed from the metadata returned by the listing
+    (size and modification time for local files, size and ETag for S3), so
+    no file needs to be fetched. Returns None for other schemes, which
+    ``list_url`` can't list either.
+    """
+    url = url_util.parse(url)
+
+    local_path = url_util.local_file_path(url)
+    if local_path:
+        fingerprints = {}
+        for subpath in os.listdir(local_path):
+            st = os.stat(os.path.join(local_path, subpath))
+            if stat.S_ISREG(st.st_mode):
+                fingerprints[subpath] = '{0}-{1}'.format(
+                    st.st_size, st.st_mtime)
+        return fingerprints
+
+    if url.scheme == 's3':
+        s3 = s3_util.create_s3_session(url)
+        return dict(
+            (key, '{0}-{1}'.format(entry.get('Size'), entry.get('ETag')))
+            for key, entry in _iter_s3_prefix(s3, url)
+            if '/' not in key)
 
 
 def spider(root_urls, depth=0, concurrency=32):
@@ -22,7 +22,7 @@
 import llnl.util.tty.color
 import llnl.util.lang as lang
 
-from spack.util.string import comma_or
+from spack.util.string import comma_or, intern_str
 import spack.directives
 import spack.error as error
 
@@ -213,6 +213,9 @@ class AbstractVariant(object):
     values.
     """
 
+    __slots__ = ('name', '_value', '_original_value',
+                 '_patches_in_order_of_appearance')
+
     def __init__(self, name, value):
         self.name = name
 
@@ -227,10 +230,11 @@ def __init__(self, name, value):
     @staticmethod
     def from_node_dict(name, value):
         """Reconstruct a variant from a node dict."""
+        name = intern_str(name)
         if isinstance(value, list):
             # read multi-value variants in and be faithful to the YAML
             mvar = MultiValuedVariant(name, ())
-            mvar._value = tuple(value)
+            mvar._value = tuple(intern_str(v) for v in value)
             mvar._original_value = mvar._value
             return mvar
 
@@ -378,6 +382,9 @@ def __str__(self):
 
 class MultiValuedVariant(AbstractVariant):
     """A variant that can hold multiple values at once."""
+
+    __slots__ = ()
+
     @implicit_variant_conversion
     def satisfies(self, other):
         """Returns true if ``other.name == self.name`` and ``other.value`` is
@@ -404,6 +411,8 @@ def append(self, value):
 class SingleValuedVariant(AbstractVariant):
     """A variant that can hold multiple values, but one at a time."""
 
+    __slots__ = ()
+
     def _value_setter(self, value):
         # Treat the value as a multi-valued variant
         super(SingleValuedVariant, self)._value_setter(value)
@@ -455,6 +464,8 @@ class BoolValuedVariant(SingleValuedVariant):
     BoolValuedVariant can also hold the value '*', for coerced
     comparisons between ``foo=*`` and ``+foo`` or ``~foo``."""
 
+    __slots__ = ()
+
     def _value_setter(self, value):
         # Check the string representation of the value and turn
         # it to a boolean
@@ -484,6 +495,8 @@ class VariantMap(lang.HashableMap):
     if the key is not already present.
     """
 
+    __slots__ = ('spec',)
+
     def __init__(self, spec):
         super(VariantMap, self).__init__()
         self.spec = spec
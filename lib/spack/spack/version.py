@@ -99,6 +99,8 @@ def coercing_method(a, b, *args, **kwargs):
 class Version(object):
     """Class to represent versions"""
 
+    __slots__ = ('string', 'version', 'separators')
+
     def __init__(self, string):
         if not isinstance(string, str):
             string = str(string)
@@ -382,6 +384,8 @@ def intersection(self, other):
 
 class VersionRange(object):
 
+    __slots__ = ('start', 'end')
+
     def __init__(self, start, end):
         if isinstance(start, string_types):
             start = Version(start)
@@ -585,6 +589,8 @@ def __str__(self):
 class VersionList(object):
     """Sorted, non-redundant list of Versions and VersionRanges."""
 
+    __slots__ = ('versions',)
+
     def __init__(self, vlist=None):
         self.versions = []
         if vlist is not None:
@@ -666,19 +672,35 @@ def preferred(self):
             latest = self.highest()
         return latest
 
+    def _bisect(self, version, lo=0):
+        """Index of the first element of this list, from ``lo``, that may
+        overlap with ``version``.
+
+        Elements don't overlap with each other, so only the element just
+        before the insertion point of ``version`` may overlap with it.
+        """
+        return max(bisect_left(self.versions, version, lo) - 1, lo)
+
     @coerced
     def overlaps(self, other):
         if not other or not self:
             return False
 
-        s = o = 0
+        key = (_OVERLAPS, tuple(self.versions), tuple(other.versions))
+        result = _version_cache.get(key)
+        if result is None:
+            result = _version_cache_set(key, self._overlaps(other))
+        return result
+
+    def _overlaps(self, other):
+        s, o = self._bisect(other[0]), 0
         while s < len(self) and o < len(other):
             if self[s].overlaps(other[o]):
                 return True
             elif self[s] < other[o]:
-                s += 1
+                s = self._bisect(other[o], s + 1)
             else:
-                o += 1
+                o = other._bisect(self[s], o + 1)
         return False
 
     def to_dict(self):
@@ -698,7 +720,7 @@ def from_dict(dictionary):
         if 'versions' in dictionary:
             return VersionList(dictionary['versions'])
         elif 'version' in dictionary:
-            return VersionList([dictionary['version']])
+            return VersionList([_intern_version(dictionary['version'])])
         else:
             raise ValueError("Dict must have 'version' or 'versions' in it.")
 
@@ -716,17 +738,25 @@ def satisfies(self, other, strict=False):
         if not other or not self:
             return False
 
+        key = (_SATISFIES, tuple(self.versions), tuple(other.versions),
+               strict)
+        result = _version_cache.get(key)
+        if result is None:
+            result = _version_cache_set(key, self._satisfies(other, strict))
+        return result
+
+    def _satisfies(self, other, strict):
         if strict:
             return self in other
 
-        s = o = 0
+        s, o = self._bisect(other[0]), 0
         while s < len(self) and o < len(other):
             if self[s].satisfies(other[o]):
                 return True
             elif self[s] < other[o]:
-                s += 1
+                s = self._bisect(other[o], s + 1)
             else:
-                o += 1
+                o = other._bisect(self[s], o + 1)
         return False
 
     @coerced
@@ -742,11 +772,21 @@ def union(self, other):
 
     @coerced
     def intersection(self, other):
-        # TODO: make this faster.  This is O(n^2).
+        # Both lists are sorted and their elements don't overlap, so they
+        # can be swept together, always moving past the element that ends
+        # first, as it can't overlap with anything further in the other
+        # list.
         result = VersionList()
-        for s in self:
-            for o in other:
-                result.add(s.intersection(o))
+        if not self or not other:
+            return result
+
+        s, o = self._bisect(other[0]), 0
+        while s < len(self) and o < len(other):
+            result.add(self[s].intersection(other[o]))
+            if _ends_before(self[s], other[o]):
+                s += 1
+            else:
+                o += 1
         return result
 
     @coerced
@@ -824,6 +864,60 @@ def __repr__(self):
         return str(self.versions)
 
 
+def _ends_before(a, b):
+    """Whether the Version or VersionRange ``a`` ends before ``b`` does.
+
+    Versions stand for all the versions they are a prefix of, so e.g.
+    ``1.6.5`` ends before ``1.6`` and not the other way around.
+    """
+    a_end = a.end if type(a) == VersionRange else a
+    b_end = b.end if type(b) == VersionRange else b
+    if a_end is None:
+        return False
+    if b_end is None:
+        return True
+    if a_end == b_end:
+        return False
+    if a_end in b_end:
+        return True
+    return a_end < b_end and b_end not in a_end
+
+
+#: Results of the comparisons of version lists, by kind of comparison and
+#: elements of the lists. Versions and ranges are never modified, so the
+#: results stay valid. Intersections aren't cached, as versions that compare
+#: equal may still be spelled differently (e.g. ``1.0`` and ``1_0``).
+_version_cache = {}
+
+#: Maximum number of results in ``_version_cache``
+_max_version_cache = 2 ** 16
+
+_OVERLAPS, _SATISFIES = range(2)
+
+
+def _version_cache_set(key, result):
+    if len(_version_cache) >= _max_version_cache:
+        _version_cache.clear()
+    _version_cache[key] = result
+    return result
+
+
+#: Concrete versions read from dictionaries, by string. Versions are never
+#: modified, so all the specs read with the same version can share it.
+_interned_versions = {}
+
+
+def _intern_version(string):
+    """Return the shared Version for a concrete version string."""
+    string = str(string)
+    version = _interned_versions.get(string)
+    if version is None:
+        version = _string_to_version(string)
+        if type(version) == Version:
+            _interned_versions[string] = version
+    return version
+
+
 def _string_to_version(string):
     """Converts a string to a Version, VersionList, or VersionRange.
        This is private.  Client code should use ver().